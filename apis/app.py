@@ -1,17 +1,47 @@
 from flask import Flask
-from flasgger import Swagger
 
-from apis.models.model import db
+from apis.commands.build_apispec import build_apispec_command
+from apis.commands.import_equipment import import_equipment_command
+from apis.commands.rebuild_equipment_summary import (
+    rebuild_equipment_summary_command,
+)
+from apis.models.model import db, uses_sqlite
+from apis.models.replicas import replica_router
+from apis.models.sqlite import configure_sqlite
 from apis.healthcheck import healthcheck_blueprint
 from apis.controllers.vessels_endpoint import vessels_blueprint
 from apis.controllers.equipments_endpoint import equipments_blueprint
+from apis.controllers.jobs_endpoint import jobs_blueprint
+from apis.services.equipment_index import equipment_index
+from apis.services.equipments import status_update_coalescer
+from apis.services.jobs import job_runner
+from apis.services.vessels import vessel_id_cache
+from apis.utils.admission import admission_controller
+from apis.utils.apidocs import init_apidocs
+from apis.utils.instrumentation import init_instrumentation
+from apis.utils.json_response import configure_json
+from apis.utils.response_cache import response_cache
+from config import pool_options
 
 
 def create_app(app_name="VESSELS", test_config=False, production_conf=False):
     app = Flask(app_name)
-    Swagger(app)
     if test_config:
         app.config.from_object("config.TestConfig")
+    elif production_conf:
+        app.config.from_object("config.ProductionConfig")
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            **app.config["SQLALCHEMY_ENGINE_OPTIONS"],
+            **pool_options(
+                app.config["WEB_WORKERS"],
+                app.config["WEB_THREADS"]
+                + app.config["JOB_WORKERS"]
+                + app.config["INDEX_CONNECTIONS"],
+                app.config["DB_MAX_CONNECTIONS"],
+                app.config["DB_RESERVED_CONNECTIONS"],
+                unpooled=app.config["INDEX_CONNECTIONS"],
+            ),
+        }
     else:
         app.config.from_object("config.RunConfig")
 
@@ -19,8 +49,35 @@ def create_app(app_name="VESSELS", test_config=False, production_conf=False):
     app.register_blueprint(healthcheck_blueprint)
     app.register_blueprint(vessels_blueprint, url_prefix="/vessel")
     app.register_blueprint(equipments_blueprint, url_prefix="/equipment")
+    app.register_blueprint(jobs_blueprint, url_prefix="/jobs")
 
+    init_apidocs(app)
+
+    app.cli.add_command(build_apispec_command)
+    app.cli.add_command(import_equipment_command)
+    app.cli.add_command(rebuild_equipment_summary_command)
+
+    admission_controller.configure(app)
+    configure_sqlite(app)
     db.init_app(app)
+    if uses_sqlite(app.config):
+        # The migrations are written for postgres, a SQLite database gets the
+        # tables, indexes and triggers missing from it when the app starts.
+        with app.app_context():
+            db.create_all()
+    vessel_id_cache.configure(
+        app.config["VESSEL_CACHE_SIZE"], app.config["VESSEL_CACHE_TTL"]
+    )
+    response_cache.configure(app.config)
+    status_update_coalescer.configure(
+        app.config["STATUS_UPDATE_WINDOW_MS"] / 1000,
+        app.config["STATUS_UPDATE_MAX_CODES"],
+    )
+    replica_router.configure(app.config)
+    job_runner.configure(app)
+    equipment_index.configure(app)
+    init_instrumentation(app)
+    configure_json(app.config)
 
     return app
 
@@ -0,0 +1,21 @@
+import json
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from apis.utils.apidocs import build_apispec
+
+
+@click.command("build-apispec")
+@click.argument("path", required=False, type=click.Path(dir_okay=False))
+@with_appcontext
+def build_apispec_command(path):
+    """Write the swagger spec of every endpoint to PATH, by default
+    SWAGGER_SPEC_PATH, to be served with SWAGGER_MODE=static."""
+    path = path or current_app.config["SWAGGER_SPEC_PATH"]
+    spec = build_apispec(current_app)
+    with open(path, "w") as file:
+        json.dump(spec, file, indent=2, sort_keys=True)
+
+    click.echo(f"Wrote the spec of {len(spec['paths'])} paths to {path}")
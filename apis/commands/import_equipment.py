@@ -0,0 +1,216 @@
+import csv
+import io
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text
+
+from apis.models.model import db, uses_sqlite
+from apis.services.equipments import (
+    active_equipments_cache_key,
+    insert_new_equipments,
+    list_equipments_cache_key,
+)
+from apis.services.vessels import vesselsService
+from apis.utils.response_cache import response_cache
+from apis.utils.response_message import MESSAGE
+from apis.utils.validators import EQUIPMENT_REQUIRED_FIELDS, validate_equipment
+
+CREATE_STAGING_TABLE = text(
+    """
+    CREATE TEMPORARY TABLE IF NOT EXISTS equipment_import (
+        line BIGINT,
+        vessel_id BIGINT,
+        name VARCHAR(256),
+        code VARCHAR(8),
+        location VARCHAR(256)
+    ) ON COMMIT DELETE ROWS
+    """
+)
+
+COPY_STAGING_TABLE = (
+    "COPY equipment_import (line, vessel_id, name, code, location) "
+    "FROM STDIN WITH (FORMAT csv)"
+)
+
+# Rows whose code is already in the database are left out before the insert
+# so they do not spend sequence values.
+MERGE_STAGING_TABLE = text(
+    """
+    INSERT INTO equipments (vessel_id, name, code, location, active)
+    SELECT vessel_id, name, code, location, true
+    FROM equipment_import
+    WHERE NOT EXISTS (
+        SELECT 1 FROM equipments WHERE equipments.code = equipment_import.code
+    )
+    ON CONFLICT (code) DO NOTHING
+    RETURNING code
+    """
+)
+
+
+def read_chunks(path, file_format, chunk_size):
+    # Imported here since they are slow to import and only used by this
+    # command, not by the workers serving the api.
+    if file_format == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        import pandas as pd
+
+        yield from pd.read_csv(
+            path, chunksize=chunk_size, dtype=str, keep_default_na=False
+        )
+
+
+def merge_staged_rows(staged_rows):
+    """Copy the rows to the staging table and merge them into equipments,
+    returning the inserted codes."""
+    staged = io.StringIO()
+    staged_writer = csv.writer(staged)
+    for code, (line, record) in staged_rows.items():
+        staged_writer.writerow(
+            [line, record["vessel_id"], record["name"], code, record["location"]]
+        )
+    staged.seek(0)
+
+    connection = db.session.connection()
+    connection.execute(CREATE_STAGING_TABLE)
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(COPY_STAGING_TABLE, staged)
+    return {code for code, in connection.execute(MERGE_STAGING_TABLE)}
+
+
+def import_chunk(chunk, first_line, rejects):
+    """Stage and merge the valid rows of a chunk, writing the rejected ones
+    to ``rejects``. Returns the number of inserted rows."""
+    columns = [
+        chunk[field].tolist() if field in chunk.columns else [None] * len(chunk)
+        for field in EQUIPMENT_REQUIRED_FIELDS
+    ]
+
+    rejected_rows = []
+    valid_rows = []
+    chunk_codes = set()
+    for line, values in enumerate(zip(*columns), start=first_line):
+        record = {
+            field: value
+            for field, value in zip(EQUIPMENT_REQUIRED_FIELDS, values)
+            if value is not None
+        }
+        error = validate_equipment(record)
+        if error is None and record["code"] in chunk_codes:
+            error = "REPEATED_CODE"
+        if error is not None:
+            rejected_rows.append((line, record.get("code"), error))
+            continue
+        chunk_codes.add(record["code"])
+        valid_rows.append((line, record))
+
+    vessel_ids = vesselsService.get_vessel_ids(
+        {record["vessel_code"] for _, record in valid_rows}
+    )
+
+    staged_rows = {}
+    for line, record in valid_rows:
+        vessel_id = vessel_ids.get(record["vessel_code"])
+        if vessel_id is None:
+            rejected_rows.append((line, record["code"], "NO_VESSEL"))
+            continue
+        staged_rows[record["code"]] = (line, {**record, "vessel_id": vessel_id})
+
+    if uses_sqlite(current_app.config):
+        inserted_codes = insert_new_equipments(
+            [
+                {
+                    "vessel_id": record["vessel_id"],
+                    "name": record["name"],
+                    "code": code,
+                    "location": record["location"],
+                    "active": True,
+                }
+                for code, (_, record) in staged_rows.items()
+            ]
+        )
+    else:
+        inserted_codes = merge_staged_rows(staged_rows)
+    db.session.commit()
+
+    invalidated_keys = set()
+    for code, (line, record) in staged_rows.items():
+        if code not in inserted_codes:
+            rejected_rows.append((line, code, "REPEATED_CODE"))
+            continue
+        invalidated_keys.add(active_equipments_cache_key(record["vessel_code"]))
+        invalidated_keys.add(list_equipments_cache_key(record["name"]))
+    response_cache.invalidate(invalidated_keys)
+
+    for line, code, error in sorted(rejected_rows):
+        rejects.writerow([line, code, MESSAGE[error]["message"]])
+
+    return len(inserted_codes)
+
+
+@click.command("import-equipment")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(["csv", "parquet"]),
+    help="Format of the file, guessed from its extension by default.",
+)
+@click.option("--chunk-size", default=50000, show_default=True)
+@click.option(
+    "--rejects",
+    "rejects_path",
+    type=click.Path(dir_okay=False, writable=True),
+    help="File for the rejected rows, PATH.rejects.csv by default.",
+)
+@with_appcontext
+def import_equipment_command(path, file_format, chunk_size, rejects_path):
+    """Import equipments from a CSV or Parquet file with the name, code,
+    location and vessel_code columns."""
+    if file_format is None:
+        file_format = "parquet" if path.endswith(".parquet") else "csv"
+    if rejects_path is None:
+        rejects_path = f"{path}.rejects.csv"
+
+    # The memory cache of this process is not the one of the workers, which
+    # keep serving their cached responses until they expire.
+    if current_app.config["RESPONSE_CACHE_BACKEND"] == "memory":
+        click.echo(
+            "Warning: RESPONSE_CACHE_BACKEND is memory, the running workers may "
+            "serve their cached responses for up to "
+            f"{current_app.config['RESPONSE_CACHE_TTL']}s after the import",
+            err=True,
+        )
+
+    start = time.perf_counter()
+    read_rows = 0
+    inserted_rows = 0
+    with open(rejects_path, "w", newline="") as rejects_file:
+        rejects = csv.writer(rejects_file)
+        rejects.writerow(["line", "code", "message"])
+
+        # Line 1 of a CSV file is the header.
+        first_line = 2 if file_format == "csv" else 1
+        for chunk in read_chunks(path, file_format, chunk_size):
+            inserted_rows += import_chunk(chunk, first_line + read_rows, rejects)
+            read_rows += len(chunk)
+            elapsed = time.perf_counter() - start
+            click.echo(
+                f"{read_rows} rows read, {inserted_rows} imported "
+                f"({read_rows / elapsed:.0f} rows/s)"
+            )
+
+    rejected_rows = read_rows - inserted_rows
+    click.echo(
+        f"Imported {inserted_rows} of {read_rows} rows in "
+        f"{time.perf_counter() - start:.1f}s, {rejected_rows} rejected rows "
+        f"written to {rejects_path}"
+    )
@@ -0,0 +1,20 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from apis.models.equipment_summary import LOCK_EQUIPMENTS, REBUILD_SUMMARY
+from apis.models.model import db, uses_sqlite
+
+
+@click.command("rebuild-equipment-summary")
+@with_appcontext
+def rebuild_equipment_summary_command():
+    """Recount the equipment summary from the equipments table, repairing
+    any drift of the counts kept by the triggers."""
+    if not uses_sqlite(current_app.config):
+        db.session.execute(LOCK_EQUIPMENTS)
+    for statement in REBUILD_SUMMARY:
+        result = db.session.execute(statement)
+    db.session.commit()
+
+    click.echo(f"Rebuilt the summary of {result.rowcount} vessel locations")
@@ -1,6 +1,19 @@
 from flask import Blueprint, request
-from apis.services.equipments import equipmentService
+from apis.services.equipments import (
+    ACTIVE_EQUIPMENTS_MAX_LIMIT,
+    ACTIVE_EQUIPMENTS_MAX_VESSELS,
+    SEARCH_DEFAULT_LIMIT,
+    SEARCH_MAX_LIMIT,
+    active_equipments_cache_key,
+    equipmentService,
+    list_equipments_cache_key,
+)
+from apis.services.jobs import jobsService
+from apis.utils.json_response import json_response
+from apis.utils.response_cache import response_cache
 from apis.utils.response_message import MESSAGE
+from apis.utils.streaming import STREAM_MIMETYPES
+from apis.utils.validators import parse_timestamp, validate_equipment
 
 equipments_blueprint = Blueprint("equipments", __name__)
 
@@ -33,24 +46,80 @@ def insert_equipment():
     """
 
     body = request.get_json()
-    required_fields = ["name", "code", "location", "vessel_code"]
 
-    body_keys = body.keys()
-    for key in required_fields:
-        if key not in body_keys:
-            return MESSAGE["MISSING_PARAM"], 400
+    error = validate_equipment(body)
+    if error is not None:
+        return MESSAGE[error], 400
+
+    create_equipment = equipmentService.insert_equipment(body)
+    return create_equipment
+
+
+@equipments_blueprint.route("/insert_equipment_batch", methods=["POST"])
+def insert_equipment_batch():
+    """Insert a list of equipments in a single transaction
+    ---
+    parameters:
+        - name: body
+          in: body
+          required: true
+          example: [{
+            vessel_code: string,
+            code: string,
+            location: string,
+            name: string,
+            }]
+        - name: background
+          in: query
+          type: boolean
+          description: inserts the equipments in a background job, whose progress and rejected equipments are read from /jobs/{job_id}
+          required: false
+    responses:
+      201:
+        description: returns a list with the OK message of each equipment if all of them were inserted
+      202:
+        description: returns ACCEPTED and the job_id of the background job
+      207:
+        description: returns a list with the result message of each equipment if any of them was rejected
+      400:
+        description: returns MISSING_PARAMETER if the list is empty
+      400:
+        description: returns WRONG_FORMAT if the body is not a list
+    """
 
-    if len(body.get("code")) > 8:
+    body = request.get_json()
+
+    if not isinstance(body, list):
         return MESSAGE["WRONG_FORMAT"], 400
 
-    for field in body:
-        if not isinstance(body[field], str):
-            return MESSAGE["WRONG_FORMAT"], 400
-        if not len(body[field]):
-            return MESSAGE["MISSING_PARAM"], 400
+    if not len(body):
+        return MESSAGE["MISSING_PARAM"], 400
 
-    create_equipment = equipmentService.insert_equipment(body)
-    return create_equipment
+    if request.args.get("background", "false").lower() == "true":
+        return jobsService.create_job("insert_equipment_batch", body)
+
+    results = [None] * len(body)
+    valid_indexes = []
+    for index, item in enumerate(body):
+        error = validate_equipment(item)
+        if error is not None:
+            results[index] = MESSAGE[error]
+        else:
+            valid_indexes.append(index)
+
+    inserted = equipmentService.insert_equipment_batch(
+        [body[index] for index in valid_indexes]
+    )
+    for index, result in zip(valid_indexes, inserted):
+        results[index] = result
+
+    report = []
+    for item, result in zip(body, results):
+        code = item.get("code") if isinstance(item, dict) else None
+        report.append({"code": code, **result})
+
+    status = 201 if all(result is MESSAGE["OK"] for result in results) else 207
+    return json_response(report, status)
 
 
 @equipments_blueprint.route("/update_equipment_status", methods=["PUT"])
@@ -62,15 +131,22 @@ def update_equipment_status():
           in: body
           required: true
           example: {code: string}
+        - name: background
+          in: query
+          type: boolean
+          description: updates the equipments in a background job, whose progress and unknown codes are read from /jobs/{job_id}. Each known code is updated even if others are unknown
+          required: false
     responses:
       201:
         description: returns OK if the equipments were correctly updated
+      202:
+        description: returns ACCEPTED and the job_id of the background job
       400:
         description: returns MISSING_PARAMETER if any parameter is not sent
       400:
         description: returns WRONG_FORMAT if any parameter are sent in the wrong format
       409:
-        description: returns NO_CODE if the equipment code is not already in the system
+        description: returns NO_CODE and the codes which are not already in the system, no equipment is updated
     """
 
     body = request.get_json()
@@ -93,34 +169,106 @@ def update_equipment_status():
         if not len(code) or not len(codes):
             return MESSAGE["MISSING_PARAM"], 400
 
+    if request.args.get("background", "false").lower() == "true":
+        return jobsService.create_job(
+            "update_equipment_status", list(dict.fromkeys(codes))
+        )
+
     update_equipment = equipmentService.update_equipment_status(codes)
     return update_equipment
 
 
 @equipments_blueprint.route("/active_equipments", methods=["GET"])
 def active_equipment():
-    """Return the list of active equipments of a vessel
+    """Return the list of active equipments of a vessel, or of several vessels keyed by vessel code
     ---
     parameters:
         - name: vessel_code
           in: query
-          type: string
+          type: array
+          items:
+            type: string
+          collectionFormat: multi
+          description: repeated to get the equipments of up to 100 vessels at once, without pagination, streaming or as_of
           required: true
+        - name: limit
+          in: query
+          type: integer
+          maximum: 10000
+          required: false
+        - name: after
+          in: query
+          type: integer
+          description: id of the last equipment of the previous page
+          required: false
+        - name: stream
+          in: query
+          type: boolean
+          description: streams the equipments as newline delimited json
+          required: false
+        - name: as_of
+          in: query
+          type: string
+          format: date-time
+          description: ISO 8601 time at which the equipments were active, UTC when it has no offset, not supported on SQLite
+          required: false
     responses:
       200:
-        description: returns a json with equipments key and a list of equipments
+        description: returns a list of equipments, with the X-Next-Cursor header when there may be a next page, or for several vessels the equipments of each known vessel and the list of unknown_vessels
+      304:
+        description: returns no content if the If-None-Match header has the ETag of the current list
       400:
         description: returns MISSING_PARAMETER if the vessel_code is not sent
+      400:
+        description: returns WRONG_FORMAT if limit is not between 1 and 10000, after is not a positive integer, as_of is not a valid time or too many vessels are sent
       409:
         description: returns NO_VESSEL if the vessel is not already in the system
+      501:
+        description: returns NOT_SUPPORTED if as_of is sent to an api storing its data in SQLite, which keeps no status history
     """
 
-    query = request.args.get("vessel_code")
+    vessel_codes = request.args.getlist("vessel_code")
 
-    if query is None:
+    if not vessel_codes:
         return MESSAGE["MISSING_PARAM"], 400
 
-    list_equipments = equipmentService.active_equipment(query)
+    if len(vessel_codes) > 1:
+        other_params = set(request.args) - {"vessel_code"}
+        if other_params or len(vessel_codes) > ACTIVE_EQUIPMENTS_MAX_VESSELS:
+            return MESSAGE["WRONG_FORMAT"], 400
+        return equipmentService.active_equipments_by_vessel(vessel_codes)
+
+    query = vessel_codes[0]
+
+    pagination = {}
+    for param in ["limit", "after"]:
+        value = request.args.get(param)
+        if value is None:
+            continue
+        if not value.isdigit():
+            return MESSAGE["WRONG_FORMAT"], 400
+        pagination[param] = int(value)
+
+    if not 0 < pagination.get("limit", 1) <= ACTIVE_EQUIPMENTS_MAX_LIMIT:
+        return MESSAGE["WRONG_FORMAT"], 400
+
+    as_of = request.args.get("as_of")
+    if as_of is not None:
+        as_of = parse_timestamp(as_of)
+        if as_of is None:
+            return MESSAGE["WRONG_FORMAT"], 400
+
+    stream = request.args.get("stream", "false").lower() == "true"
+
+    if not stream and not pagination and as_of is None:
+        return response_cache.respond(
+            active_equipments_cache_key(query),
+            lambda: equipmentService.active_equipment(query),
+        )
+
+    list_equipments = equipmentService.active_equipment(
+        query, stream=stream, as_of=as_of, **pagination
+    )
 
     return list_equipments
 
@@ -137,6 +285,8 @@ def list_equipment_by_name():
     responses:
       200:
         description: returns a json with equipments key, a list of equipments and the vessel_code related
+      304:
+        description: returns no content if the If-None-Match header has the ETag of the current list
       400:
         description: returns MISSING_PARAMETER if the equipment_name is not sent
       409:
@@ -148,6 +298,134 @@ def list_equipment_by_name():
     if query is None:
         return MESSAGE["MISSING_PARAM"], 400
 
-    list_equipments = equipmentService.list_equipment_by_name(query)
+    list_equipments = response_cache.respond(
+        list_equipments_cache_key(query),
+        lambda: equipmentService.list_equipment_by_name(query),
+    )
 
     return list_equipments
+
+
+@equipments_blueprint.route("/summary", methods=["GET"])
+def fleet_summary():
+    """Return the number of active and inactive equipments per vessel and per location
+    ---
+    parameters:
+        - name: vessel_code
+          in: query
+          type: string
+          required: false
+    responses:
+      200:
+        description: returns the fleet totals, the totals of each vessel with its locations and the totals of each location
+      409:
+        description: returns NO_VESSEL if the vessel is not already in the system
+    """
+
+    summary = equipmentService.fleet_summary(request.args.get("vessel_code"))
+    return summary
+
+
+@equipments_blueprint.route("/search", methods=["GET"])
+def search_equipments():
+    """Search equipments by the beginning of their name or by similarity
+    ---
+    parameters:
+        - name: equipment_name
+          in: query
+          type: string
+          required: true
+        - name: mode
+          in: query
+          type: string
+          enum: [icase, prefix, fuzzy]
+          description: icase (default) and prefix match the beginning of the name, with and without case, fuzzy matches similar names when the database is postgres with the pg_trgm extension
+          required: false
+        - name: limit
+          in: query
+          type: integer
+          description: maximum number of equipments, 50 by default and up to 500
+          required: false
+    responses:
+      200:
+        description: returns a list of equipments with the vessel_code, the closest names first
+      400:
+        description: returns MISSING_PARAMETER if the equipment_name is not sent or empty
+      400:
+        description: returns WRONG_FORMAT if the mode is unknown, fuzzy without pg_trgm or on SQLite, or the limit is not between 1 and 500
+      409:
+        description: returns NO_EQUIPMENT_NAME if no equipment matches the name
+    """
+
+    equipment_name = request.args.get("equipment_name", "").strip()
+
+    if not equipment_name:
+        return MESSAGE["MISSING_PARAM"], 400
+
+    mode = request.args.get("mode", "icase")
+    if mode not in equipmentService.search_modes():
+        return MESSAGE["WRONG_FORMAT"], 400
+
+    limit = request.args.get("limit", str(SEARCH_DEFAULT_LIMIT))
+    if not limit.isdigit() or not 0 < int(limit) <= SEARCH_MAX_LIMIT:
+        return MESSAGE["WRONG_FORMAT"], 400
+
+    found_equipments = equipmentService.search_equipments(
+        equipment_name, mode, int(limit)
+    )
+    return found_equipments
+
+
+@equipments_blueprint.route("/export", methods=["GET"])
+def export_equipments():
+    """Stream every equipment with the code of its vessel
+    ---
+    parameters:
+        - name: format
+          in: query
+          type: string
+          enum: [csv, ndjson, arrow]
+          description: format of the export, negotiated with the Accept header when not sent (csv by default)
+          required: false
+        - name: vessel_code
+          in: query
+          type: string
+          required: false
+        - name: active
+          in: query
+          type: boolean
+          required: false
+    produces:
+        - text/csv
+        - application/x-ndjson
+        - application/vnd.apache.arrow.stream
+    responses:
+      200:
+        description: streams the equipments ordered by id
+      400:
+        description: returns WRONG_FORMAT if the format is not available or active is not true or false
+      409:
+        description: returns NO_VESSEL if the vessel is not already in the system
+    """
+
+    file_format = request.args.get("format")
+    if file_format is None:
+        mimetype = request.accept_mimetypes.best_match(
+            list(STREAM_MIMETYPES.values()), default=STREAM_MIMETYPES["csv"]
+        )
+        file_format = next(
+            name for name, value in STREAM_MIMETYPES.items() if value == mimetype
+        )
+    elif file_format not in STREAM_MIMETYPES:
+        return MESSAGE["WRONG_FORMAT"], 400
+
+    active = request.args.get("active")
+    if active is not None:
+        if active.lower() not in ["true", "false"]:
+            return MESSAGE["WRONG_FORMAT"], 400
+        active = active.lower() == "true"
+
+    export = equipmentService.export_equipments(
+        file_format, vessel_code=request.args.get("vessel_code"), active=active
+    )
+    return export
@@ -0,0 +1,23 @@
+from flask import Blueprint
+from apis.services.jobs import jobsService
+
+jobs_blueprint = Blueprint("jobs", __name__)
+
+
+@jobs_blueprint.route("/<int:job_id>", methods=["GET"])
+def get_job(job_id):
+    """Return the status and progress of a background job
+    ---
+    parameters:
+        - name: job_id
+          in: path
+          type: integer
+          required: true
+    responses:
+      200:
+        description: returns the status (queued, running, succeeded or failed), the processed and failed items, the items per second and the first errors of each item of the job
+      404:
+        description: returns NO_JOB if the job does not exist
+    """
+
+    return jobsService.get_job(job_id)
@@ -1,4 +1,11 @@
 from flask import Blueprint
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, TimeoutError
+from sqlalchemy.pool import QueuePool
+
+from apis.models.model import db
+from apis.utils.admission import admission_controller
+from apis.utils.json_response import json_response
 
 healthcheck_blueprint = Blueprint("healthcheck", __name__)
 
@@ -13,3 +20,42 @@ def healthcheck():
         description: OK if the system is alive
     """
     return "OK", 200
+
+
+@healthcheck_blueprint.route("/ready", methods=["GET"])
+def readiness():
+
+    """Checks if the system can serve requests, i.e. the database answers and
+    checkouts are not waiting for its connection pool
+    ---
+    responses:
+      200:
+        description: returns ready, the requests in flight, the shed requests and the state of the connection pool
+      503:
+        description: returns overloaded while the reads are shed, or unavailable if the database does not answer
+    """
+    pool = db.engine.pool
+    if isinstance(pool, QueuePool):
+        pool_stats = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+        }
+    else:
+        # An in-memory SQLite database is the single connection holding it.
+        pool_stats = {"size": 1}
+    report = {
+        "status": "ready",
+        **admission_controller.stats(),
+        "pool": pool_stats,
+    }
+
+    if admission_controller.overloaded():
+        return json_response({**report, "status": "overloaded"}, 503)
+
+    try:
+        db.session.execute(text("SELECT 1"))
+    except (DBAPIError, TimeoutError):
+        return json_response({**report, "status": "unavailable"}, 503)
+
+    return json_response(report)
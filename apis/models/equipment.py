@@ -1,12 +1,134 @@
-from apis.models.model import db
+from sqlalchemy import DDL, event, func, text
+
+from apis.models.model import BigIntegerKey, db
+
+# The trigram index needs the pg_trgm extension, which is created with the
+# table when the database server provides it.
+TRGM_AVAILABLE = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')"
+)
 
 
 class equipment(db.Model):
     __tablename__ = "equipments"
 
-    id = db.Column(db.BigInteger, primary_key=True)
-    vessel_id = db.Column(db.BigInteger, db.ForeignKey("vessels.id"))
-    name = db.Column(db.String(256))
+    id = db.Column(BigIntegerKey, primary_key=True)
+    vessel_id = db.Column(db.BigInteger, db.ForeignKey("vessels.id"), index=True)
+    name = db.Column(db.String(256), index=True)
     code = db.Column(db.String(8), unique=True)
     location = db.Column(db.String(256))
     active = db.Column(db.Boolean)
+
+    __table_args__ = (
+        db.Index(
+            "ix_equipments_active_vessel_id",
+            vessel_id,
+            id,
+            postgresql_where=active,
+            sqlite_where=active,
+        ),
+        db.Index(
+            "ix_equipments_name_pattern",
+            name,
+            id,
+            postgresql_ops={"name": "text_pattern_ops"},
+        ),
+        db.Index(
+            "ix_equipments_lower_name_pattern",
+            func.lower(name).label("lower_name"),
+            id,
+            postgresql_ops={"lower_name": "text_pattern_ops"},
+        ),
+    )
+
+
+def _trgm_available(ddl, target, bind, **kw):
+    return bind.execute(TRGM_AVAILABLE).scalar()
+
+
+event.listen(
+    equipment.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(
+        dialect="postgresql", callable_=_trgm_available
+    ),
+)
+event.listen(
+    equipment.__table__,
+    "after_create",
+    DDL(
+        "CREATE INDEX ix_equipments_name_trgm ON equipments "
+        "USING gist (name gist_trgm_ops)"
+    ).execute_if(dialect="postgresql", callable_=_trgm_available),
+)
+
+# Tells the listeners of EQUIPMENTS_CHANNEL which vessels had equipments
+# changed once the transaction commits, one notification per statement. A
+# statement changing too many vessels for the payload sends "*" instead.
+EQUIPMENTS_CHANNEL = "equipments_changed"
+
+CREATE_NOTIFY_TRIGGERS = DDL(
+    f"""
+    CREATE OR REPLACE FUNCTION equipments_notify() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        vessel_ids text;
+    BEGIN
+        IF TG_OP = 'TRUNCATE' THEN
+            vessel_ids := '*';
+        ELSIF TG_OP = 'INSERT' THEN
+            SELECT string_agg(DISTINCT vessel_id::text, ',') INTO vessel_ids
+            FROM new_equipments;
+        ELSIF TG_OP = 'UPDATE' THEN
+            SELECT string_agg(DISTINCT vessel_id::text, ',') INTO vessel_ids
+            FROM (
+                SELECT vessel_id FROM old_equipments
+                UNION SELECT vessel_id FROM new_equipments
+            ) AS changed;
+        ELSE
+            SELECT string_agg(DISTINCT vessel_id::text, ',') INTO vessel_ids
+            FROM old_equipments;
+        END IF;
+        IF length(vessel_ids) > 7000 THEN
+            vessel_ids := '*';
+        END IF;
+        IF vessel_ids IS NOT NULL THEN
+            PERFORM pg_notify('{EQUIPMENTS_CHANNEL}', vessel_ids);
+        END IF;
+        RETURN NULL;
+    END
+    $$;
+
+    DROP TRIGGER IF EXISTS equipments_notify_insert ON equipments;
+    CREATE TRIGGER equipments_notify_insert AFTER INSERT ON equipments
+        REFERENCING NEW TABLE AS new_equipments
+        FOR EACH STATEMENT EXECUTE FUNCTION equipments_notify();
+
+    DROP TRIGGER IF EXISTS equipments_notify_update ON equipments;
+    CREATE TRIGGER equipments_notify_update AFTER UPDATE ON equipments
+        REFERENCING OLD TABLE AS old_equipments NEW TABLE AS new_equipments
+        FOR EACH STATEMENT EXECUTE FUNCTION equipments_notify();
+
+    DROP TRIGGER IF EXISTS equipments_notify_delete ON equipments;
+    CREATE TRIGGER equipments_notify_delete AFTER DELETE ON equipments
+        REFERENCING OLD TABLE AS old_equipments
+        FOR EACH STATEMENT EXECUTE FUNCTION equipments_notify();
+
+    DROP TRIGGER IF EXISTS equipments_notify_truncate ON equipments;
+    CREATE TRIGGER equipments_notify_truncate AFTER TRUNCATE ON equipments
+        FOR EACH STATEMENT EXECUTE FUNCTION equipments_notify();
+    """
+)
+
+DROP_NOTIFY_TRIGGERS = DDL("DROP FUNCTION IF EXISTS equipments_notify() CASCADE")
+
+event.listen(
+    db.metadata,
+    "after_create",
+    CREATE_NOTIFY_TRIGGERS.execute_if(dialect="postgresql"),
+)
+event.listen(
+    db.metadata,
+    "after_drop",
+    DROP_NOTIFY_TRIGGERS.execute_if(dialect="postgresql"),
+)
@@ -0,0 +1,103 @@
+from sqlalchemy import DDL, event, func
+
+from apis.models.model import BigIntegerKey, db
+
+
+class equipment_status_history(db.Model):
+    __tablename__ = "equipment_status_history"
+
+    id = db.Column(BigIntegerKey, primary_key=True)
+    equipment_id = db.Column(db.BigInteger, nullable=False)
+    vessel_id = db.Column(db.BigInteger, nullable=False)
+    active = db.Column(db.Boolean, nullable=False)
+    changed_at = db.Column(
+        db.DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    transaction_id = db.Column(
+        db.BigInteger, nullable=False, server_default=func.txid_current()
+    )
+
+    __table_args__ = (
+        db.Index(
+            "ix_equipment_status_history_equipment_id_changed_at",
+            equipment_id,
+            changed_at,
+            id,
+            postgresql_include=["active"],
+        ),
+        db.Index(
+            "ix_equipment_status_history_changed_at",
+            changed_at,
+            postgresql_using="brin",
+        ),
+    )
+
+
+# Every equipment inserted and every change of status is appended by
+# statement level triggers, so a list update is recorded with a single
+# insert. The rows of a statement share the transaction id and time.
+CREATE_HISTORY_TRIGGERS = DDL(
+    """
+    CREATE OR REPLACE FUNCTION equipment_status_history_record() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO equipment_status_history (equipment_id, vessel_id, active)
+            SELECT id, vessel_id, coalesce(active, false)
+            FROM new_equipments
+            WHERE vessel_id IS NOT NULL
+            ORDER BY id;
+        ELSE
+            INSERT INTO equipment_status_history (equipment_id, vessel_id, active)
+            SELECT new_equipments.id, new_equipments.vessel_id,
+                coalesce(new_equipments.active, false)
+            FROM new_equipments
+            JOIN old_equipments ON old_equipments.id = new_equipments.id
+            WHERE new_equipments.vessel_id IS NOT NULL
+                AND new_equipments.active IS DISTINCT FROM old_equipments.active
+            ORDER BY new_equipments.id;
+        END IF;
+        RETURN NULL;
+    END
+    $$;
+
+    CREATE OR REPLACE FUNCTION equipment_status_history_append_only()
+    RETURNS trigger LANGUAGE plpgsql AS $$
+    BEGIN
+        RAISE EXCEPTION 'equipment_status_history is append only';
+    END
+    $$;
+
+    DROP TRIGGER IF EXISTS equipment_status_history_insert ON equipments;
+    CREATE TRIGGER equipment_status_history_insert AFTER INSERT ON equipments
+        REFERENCING NEW TABLE AS new_equipments
+        FOR EACH STATEMENT EXECUTE FUNCTION equipment_status_history_record();
+
+    DROP TRIGGER IF EXISTS equipment_status_history_update ON equipments;
+    CREATE TRIGGER equipment_status_history_update AFTER UPDATE ON equipments
+        REFERENCING OLD TABLE AS old_equipments NEW TABLE AS new_equipments
+        FOR EACH STATEMENT EXECUTE FUNCTION equipment_status_history_record();
+
+    DROP TRIGGER IF EXISTS equipment_status_history_append_only
+        ON equipment_status_history;
+    CREATE TRIGGER equipment_status_history_append_only
+        BEFORE UPDATE OR DELETE ON equipment_status_history
+        FOR EACH STATEMENT EXECUTE FUNCTION equipment_status_history_append_only();
+    """
+)
+
+DROP_HISTORY_TRIGGERS = DDL(
+    "DROP FUNCTION IF EXISTS equipment_status_history_record() CASCADE;"
+    "DROP FUNCTION IF EXISTS equipment_status_history_append_only() CASCADE"
+)
+
+event.listen(
+    db.metadata,
+    "after_create",
+    CREATE_HISTORY_TRIGGERS.execute_if(dialect="postgresql"),
+)
+event.listen(
+    db.metadata,
+    "after_drop",
+    DROP_HISTORY_TRIGGERS.execute_if(dialect="postgresql"),
+)
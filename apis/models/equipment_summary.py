@@ -0,0 +1,182 @@
+from sqlalchemy import DDL, event, text
+
+from apis.models.model import BigIntegerKey, db
+
+
+class equipment_summary(db.Model):
+    __tablename__ = "equipment_summary"
+
+    id = db.Column(BigIntegerKey, primary_key=True)
+    vessel_id = db.Column(db.BigInteger, db.ForeignKey("vessels.id"), nullable=False)
+    location = db.Column(db.String(256), nullable=False)
+    active_count = db.Column(db.BigInteger, nullable=False, default=0)
+    inactive_count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index("ix_equipment_summary_vessel_id_location", vessel_id, location),
+    )
+
+
+# The triggers append the changes of each statement as delta rows, summed by
+# the reads, instead of updating a row per vessel and location: concurrent
+# writers to the same vessel and location would otherwise wait for each
+# other's commit on the lock of that row. Statement level triggers apply the
+# changes of a whole statement at once, with the rows taken from the
+# transition tables.
+CREATE_SUMMARY_TRIGGERS = DDL(
+    """
+    CREATE OR REPLACE FUNCTION equipment_summary_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO equipment_summary
+                (vessel_id, location, active_count, inactive_count)
+            SELECT vessel_id, coalesce(location, ''),
+                -count(*) FILTER (WHERE active),
+                -count(*) FILTER (WHERE active IS NOT TRUE)
+            FROM old_equipments
+            WHERE vessel_id IS NOT NULL
+            GROUP BY 1, 2;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO equipment_summary
+                (vessel_id, location, active_count, inactive_count)
+            SELECT vessel_id, coalesce(location, ''),
+                count(*) FILTER (WHERE active),
+                count(*) FILTER (WHERE active IS NOT TRUE)
+            FROM new_equipments
+            WHERE vessel_id IS NOT NULL
+            GROUP BY 1, 2;
+        END IF;
+        RETURN NULL;
+    END
+    $$;
+
+    DROP TRIGGER IF EXISTS equipment_summary_insert ON equipments;
+    CREATE TRIGGER equipment_summary_insert AFTER INSERT ON equipments
+        REFERENCING NEW TABLE AS new_equipments
+        FOR EACH STATEMENT EXECUTE FUNCTION equipment_summary_apply();
+
+    DROP TRIGGER IF EXISTS equipment_summary_update ON equipments;
+    CREATE TRIGGER equipment_summary_update AFTER UPDATE ON equipments
+        REFERENCING OLD TABLE AS old_equipments NEW TABLE AS new_equipments
+        FOR EACH STATEMENT EXECUTE FUNCTION equipment_summary_apply();
+
+    DROP TRIGGER IF EXISTS equipment_summary_delete ON equipments;
+    CREATE TRIGGER equipment_summary_delete AFTER DELETE ON equipments
+        REFERENCING OLD TABLE AS old_equipments
+        FOR EACH STATEMENT EXECUTE FUNCTION equipment_summary_apply();
+    """
+)
+
+DROP_SUMMARY_TRIGGERS = DDL("DROP FUNCTION IF EXISTS equipment_summary_apply() CASCADE")
+
+# SQLite has neither statement level triggers nor transition tables, so each
+# changed row appends its own deltas there. Its writers are serialized anyway.
+CREATE_SQLITE_SUMMARY_TRIGGERS = [
+    DDL(
+        """
+        CREATE TRIGGER IF NOT EXISTS equipment_summary_insert
+        AFTER INSERT ON equipments WHEN new.vessel_id IS NOT NULL
+        BEGIN
+            INSERT INTO equipment_summary
+                (vessel_id, location, active_count, inactive_count)
+            VALUES (new.vessel_id, coalesce(new.location, ''),
+                new.active IS TRUE, new.active IS NOT TRUE);
+        END
+        """
+    ),
+    DDL(
+        """
+        CREATE TRIGGER IF NOT EXISTS equipment_summary_update
+        AFTER UPDATE OF vessel_id, location, active ON equipments
+        WHEN old.vessel_id IS NOT new.vessel_id
+            OR old.location IS NOT new.location
+            OR old.active IS NOT new.active
+        BEGIN
+            INSERT INTO equipment_summary
+                (vessel_id, location, active_count, inactive_count)
+            SELECT old.vessel_id, coalesce(old.location, ''),
+                -(old.active IS TRUE), -(old.active IS NOT TRUE)
+            WHERE old.vessel_id IS NOT NULL;
+            INSERT INTO equipment_summary
+                (vessel_id, location, active_count, inactive_count)
+            SELECT new.vessel_id, coalesce(new.location, ''),
+                new.active IS TRUE, new.active IS NOT TRUE
+            WHERE new.vessel_id IS NOT NULL;
+        END
+        """
+    ),
+    DDL(
+        """
+        CREATE TRIGGER IF NOT EXISTS equipment_summary_delete
+        AFTER DELETE ON equipments WHEN old.vessel_id IS NOT NULL
+        BEGIN
+            INSERT INTO equipment_summary
+                (vessel_id, location, active_count, inactive_count)
+            VALUES (old.vessel_id, coalesce(old.location, ''),
+                -(old.active IS TRUE), -(old.active IS NOT TRUE));
+        END
+        """
+    ),
+]
+
+# Recounts the summary from equipments, blocking the writes meanwhile so no
+# change is lost between the count and the replacement of the summary. On
+# SQLite the delete already makes the other writers wait, without the lock.
+LOCK_EQUIPMENTS = text("LOCK TABLE equipments IN SHARE MODE")
+REBUILD_SUMMARY = [
+    text("DELETE FROM equipment_summary"),
+    text(
+        """
+        INSERT INTO equipment_summary
+            (vessel_id, location, active_count, inactive_count)
+        SELECT vessel_id, coalesce(location, ''),
+            count(*) FILTER (WHERE active),
+            count(*) FILTER (WHERE active IS NOT TRUE)
+        FROM equipments
+        WHERE vessel_id IS NOT NULL
+        GROUP BY 1, 2
+        """
+    ),
+]
+
+# Replaces the delta rows with one row per vessel and location. It only
+# deletes the rows visible when it starts, so the deltas appended meanwhile
+# are kept, and it never waits for the writers nor makes them wait.
+COMPACT_SUMMARY = text(
+    """
+    WITH compacted AS (
+        DELETE FROM equipment_summary
+        RETURNING vessel_id, location, active_count, inactive_count
+    )
+    INSERT INTO equipment_summary
+        (vessel_id, location, active_count, inactive_count)
+    SELECT vessel_id, location, sum(active_count), sum(inactive_count)
+    FROM compacted
+    GROUP BY 1, 2
+    HAVING sum(active_count) <> 0 OR sum(inactive_count) <> 0
+    """
+)
+
+# SQLite does not allow a DELETE in a WITH clause, the deleted rows are
+# summed by compact_equipment_summary instead.
+DELETE_SUMMARY = text(
+    """
+    DELETE FROM equipment_summary
+    RETURNING vessel_id, location, active_count, inactive_count
+    """
+)
+
+event.listen(
+    db.metadata,
+    "after_create",
+    CREATE_SUMMARY_TRIGGERS.execute_if(dialect="postgresql"),
+)
+event.listen(
+    db.metadata,
+    "after_drop",
+    DROP_SUMMARY_TRIGGERS.execute_if(dialect="postgresql"),
+)
+for trigger in CREATE_SQLITE_SUMMARY_TRIGGERS:
+    event.listen(db.metadata, "after_create", trigger.execute_if(dialect="sqlite"))
@@ -0,0 +1,40 @@
+from sqlalchemy import func
+
+from apis.models.model import BigIntegerKey, db
+
+
+class job(db.Model):
+    __tablename__ = "jobs"
+
+    id = db.Column(BigIntegerKey, primary_key=True)
+    kind = db.Column(db.String(64), nullable=False)
+    status = db.Column(db.String(16), nullable=False, server_default="queued")
+    payload = db.Column(db.JSON, nullable=False)
+    total = db.Column(db.BigInteger, nullable=False)
+    processed = db.Column(db.BigInteger, nullable=False, server_default="0")
+    failed = db.Column(db.BigInteger, nullable=False, server_default="0")
+    attempts = db.Column(db.Integer, nullable=False, server_default="0")
+    error = db.Column(db.Text)
+    created_at = db.Column(
+        db.DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    started_at = db.Column(db.DateTime(timezone=True))
+    heartbeat_at = db.Column(db.DateTime(timezone=True))
+    finished_at = db.Column(db.DateTime(timezone=True))
+
+    __table_args__ = (
+        db.Index(
+            "ix_jobs_unfinished",
+            id,
+            postgresql_where=status.in_(["queued", "running"]),
+        ),
+    )
+
+
+class job_error(db.Model):
+    __tablename__ = "job_errors"
+
+    job_id = db.Column(db.BigInteger, db.ForeignKey("jobs.id"), primary_key=True)
+    item = db.Column(db.BigInteger, primary_key=True)
+    code = db.Column(db.String(256))
+    message = db.Column(db.String(64), nullable=False)
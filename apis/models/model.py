@@ -1,3 +1,14 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.engine import make_url
 
 db = SQLAlchemy()
+
+# SQLite only autoincrements an INTEGER PRIMARY KEY, the alias of its 64 bit
+# rowid, which stands in for the bigint keys of postgres.
+BigIntegerKey = db.BigInteger().with_variant(db.Integer(), "sqlite")
+
+
+def uses_sqlite(config):
+    """Whether the app with ``config`` stores its data in SQLite, where the
+    features built on postgres are disabled."""
+    return make_url(config["SQLALCHEMY_DATABASE_URI"]).get_backend_name() == "sqlite"
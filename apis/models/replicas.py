@@ -0,0 +1,151 @@
+import itertools
+import time
+from contextlib import contextmanager
+from threading import Lock, local
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from apis.models.model import db
+
+# A replica which already replayed everything it received has no lag, even
+# if the primary has been idle and the last replay is old.
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class ReplicaRouter:
+    """Runs read only queries on the replicas in round robin, skipping the
+    ones that are down or lagging, and falls back to the primary when no
+    replica is available."""
+
+    def __init__(self):
+        self._engines = []
+        self._health = {}
+        self._counter = itertools.count()
+        self._lock = Lock()
+        self._local = local()
+        self.max_lag = 30
+        self.check_interval = 10
+        self.reads = {}
+
+    def configure(self, config):
+        for engine in self._engines:
+            engine.dispose()
+
+        engine_options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+        # The timed pool of admission control measures the waits of the
+        # primary, which the waits for a replica must not count in.
+        engine_options.pop("poolclass", None)
+        connect_args = dict(engine_options.pop("connect_args", {}))
+        connect_args.setdefault("connect_timeout", config["REPLICA_CONNECT_TIMEOUT"])
+        self._engines = [
+            create_engine(uri, connect_args=connect_args, **engine_options)
+            for uri in config["SQLALCHEMY_REPLICA_URIS"]
+        ]
+        self._health = {}
+        self.max_lag = config["REPLICA_MAX_LAG_SECONDS"]
+        self.check_interval = config["REPLICA_CHECK_INTERVAL"]
+        self.reads = {}
+
+    def run(self, read):
+        """Return ``read(session)`` computed on a replica if possible."""
+        for engine in self._available_engines():
+            connection = self._connect(engine)
+            if connection is None:
+                continue
+            session = Session(bind=connection)
+            try:
+                result = read(session)
+            except DBAPIError as error:
+                if not error.connection_invalidated:
+                    raise
+                self._set_health(engine, False)
+                continue
+            finally:
+                session.close()
+                connection.close()
+            self._count_read(engine.url.render_as_string(hide_password=True))
+            return result
+
+        self._count_read("primary")
+        return read(db.session)
+
+    @contextmanager
+    def session(self):
+        """Provide a session bound to an available replica, or the primary
+        session when there is none."""
+        for engine in self._available_engines():
+            connection = self._connect(engine)
+            if connection is None:
+                continue
+            self._count_read(engine.url.render_as_string(hide_password=True))
+            session = Session(bind=connection)
+            try:
+                yield session
+            finally:
+                session.close()
+                connection.close()
+            return
+
+        self._count_read("primary")
+        yield db.session
+
+    def _connect(self, engine):
+        # The health of a replica is only checked every check_interval, so
+        # one which went down since is found here and skipped.
+        try:
+            return engine.connect()
+        except DBAPIError:
+            self._set_health(engine, False)
+            return None
+
+    @contextmanager
+    def primary(self):
+        """Run the reads of the block, in this thread, on the primary."""
+        previous = getattr(self._local, "primary", False)
+        self._local.primary = True
+        try:
+            yield
+        finally:
+            self._local.primary = previous
+
+    def _available_engines(self):
+        if not self._engines or getattr(self._local, "primary", False):
+            return
+
+        start = next(self._counter)
+        for offset in range(len(self._engines)):
+            engine = self._engines[(start + offset) % len(self._engines)]
+            if self._is_healthy(engine):
+                yield engine
+
+    def _is_healthy(self, engine):
+        healthy, checked_at = self._health.get(engine, (None, 0))
+        if time.monotonic() - checked_at < self.check_interval:
+            return healthy
+
+        try:
+            with engine.connect() as connection:
+                lag = connection.execute(REPLICA_LAG_QUERY).scalar()
+            healthy = lag is not None and lag <= self.max_lag
+        except DBAPIError:
+            healthy = False
+        self._set_health(engine, healthy)
+        return healthy
+
+    def _set_health(self, engine, healthy):
+        with self._lock:
+            self._health[engine] = (healthy, time.monotonic())
+
+    def _count_read(self, target):
+        with self._lock:
+            self.reads[target] = self.reads.get(target, 0) + 1
+
+
+replica_router = ReplicaRouter()
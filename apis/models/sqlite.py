@@ -0,0 +1,66 @@
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from apis.models.model import uses_sqlite
+
+# WAL lets the reads go on while a write commits. With synchronous NORMAL a
+# commit is only synced at the checkpoints of the WAL, so a power loss may
+# lose the last commits but never corrupts the file. The page cache is per
+# connection, the memory map is shared by all of them.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16384",
+    "PRAGMA mmap_size = 268435456",
+)
+
+# The features which need a postgres database.
+POSTGRES_FEATURES = ("EQUIPMENT_INDEX", "SQLALCHEMY_REPLICA_URIS")
+
+
+def in_memory(uri):
+    return make_url(uri).database in (None, "", ":memory:")
+
+
+def configure_sqlite(app):
+    """Set the engine options of a SQLite database, if the app uses one, and
+    refuse the features which need postgres."""
+    if not uses_sqlite(app.config):
+        return
+    for feature in POSTGRES_FEATURES:
+        if app.config[feature]:
+            raise ValueError(f"{feature} needs a postgres database")
+
+    options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+    # The threads share the connections of the pool, each one used by a
+    # single thread at a time, and wait for each other's writes up to the
+    # busy timeout.
+    options["connect_args"] = {
+        **options.get("connect_args", {}),
+        "check_same_thread": False,
+        "timeout": app.config["SQLITE_BUSY_TIMEOUT"],
+    }
+    # An in-memory database only exists in the connection which holds it,
+    # shared by every checkout, so it must be used by a single thread. A
+    # file is opened by each connection of the pool, Flask-SQLAlchemy would
+    # open it for every checkout otherwise.
+    if in_memory(app.config["SQLALCHEMY_DATABASE_URI"]):
+        options["poolclass"] = StaticPool
+    else:
+        options.setdefault("poolclass", QueuePool)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+
+@event.listens_for(Engine, "connect")
+def _set_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
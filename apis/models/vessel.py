@@ -1,8 +1,8 @@
-from apis.models.model import db
+from apis.models.model import BigIntegerKey, db
 
 
 class vessel(db.Model):
     __tablename__ = "vessels"
 
-    id = db.Column(db.BigInteger, primary_key=True)
+    id = db.Column(BigIntegerKey, primary_key=True)
     code = db.Column(db.String(8), unique=True)
@@ -0,0 +1,295 @@
+import bisect
+import logging
+import os
+import select
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from sqlalchemy import text
+
+from apis.models.equipment import EQUIPMENTS_CHANNEL
+from apis.models.model import db
+
+logger = logging.getLogger(__name__)
+
+LOAD_EQUIPMENTS = """
+    SELECT equipments.id, equipments.vessel_id, vessels.code AS vessel_code,
+        equipments.name, equipments.code, equipments.location,
+        coalesce(equipments.active, false) AS active
+    FROM equipments JOIN vessels ON vessels.id = equipments.vessel_id
+"""
+LOAD_ALL = text(LOAD_EQUIPMENTS)
+LOAD_VESSELS = text(LOAD_EQUIPMENTS + "WHERE equipments.vessel_id = ANY(:vessel_ids)")
+
+
+class EquipmentRecord:
+    __slots__ = ("id", "vessel_id", "vessel_code", "name", "code", "location", "active")
+
+    def __init__(self, id, vessel_id, vessel_code, name, code, location, active):
+        self.id = id
+        self.vessel_id = vessel_id
+        self.vessel_code = vessel_code
+        self.name = name
+        self.code = code
+        self.location = location
+        self.active = active
+
+    def as_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "code": self.code,
+            "location": self.location,
+            "active": self.active,
+        }
+
+
+class EquipmentIndex:
+    """Keeps every equipment of the database in the process, by vessel (the
+    active ones) and by name, to answer the reads without a query. It is
+    loaded by a thread of each process, which then listens to the
+    notifications of the equipments triggers and reloads the vessels changed
+    by any process. The single inserts and the status updates of the
+    requests of this process are also applied right away, so they are seen
+    by its next read, the other writes once notified. Until it is loaded,
+    and in a bypassed block, the reads return None and are answered by the
+    database.
+
+    The lists returned by the reads are built once and kept until an
+    equipment of the vessel, or with the name, changes."""
+
+    def __init__(self):
+        self.app = None
+        self.enabled = False
+        self.poll_interval = 1
+        self.ready = threading.Event()
+        self._by_code = {}
+        self._by_vessel = {}
+        self._active_by_vessel = {}
+        self._by_name = {}
+        self._active_lists = {}
+        self._name_lists = {}
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def configure(self, app):
+        self.stop()
+        self.app = app
+        self.enabled = app.config["EQUIPMENT_INDEX"]
+        app.before_request(self.start)
+
+    def start(self):
+        """Start the thread of this process, once, which loads the index and
+        keeps it up to date. Like the job threads, it is started by the
+        first request so a preloaded app forks before it exists."""
+        if self._pid == os.getpid() or not self.enabled:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self._listen, name="equipment-index", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+        self._pid = None
+        self.ready.clear()
+        with self._lock:
+            self._clear()
+
+    def _connect(self):
+        with self.app.app_context():
+            url = db.engine.url
+        connection = psycopg2.connect(
+            **url.translate_connect_args(username="user", database="dbname"),
+            **url.query,
+        )
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {EQUIPMENTS_CHANNEL}")
+        return connection
+
+    def _listen(self):
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                # Listening before loading, so no change committed during
+                # the load is missed.
+                connection = self._connect()
+                self.refresh()
+                self.ready.set()
+                while not self._stopping.is_set():
+                    readable, _, _ = select.select(
+                        [connection], [], [], self.poll_interval
+                    )
+                    if not readable:
+                        continue
+                    connection.poll()
+                    vessel_ids = set()
+                    for notify in connection.notifies:
+                        if notify.payload == "*":
+                            vessel_ids = None
+                            break
+                        vessel_ids.update(map(int, notify.payload.split(",")))
+                    connection.notifies.clear()
+                    self.refresh(vessel_ids)
+            except Exception:
+                # The notifications sent while disconnected are lost, so the
+                # reads go to the database until the index is loaded again.
+                logger.exception("The equipment index lost its connection")
+                self.ready.clear()
+                self._stopping.wait(self.poll_interval)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def refresh(self, vessel_ids=None):
+        """Reload the equipments of the vessels from the database, or every
+        equipment when vessel_ids is None."""
+        if vessel_ids is not None and not vessel_ids:
+            return
+        with self.app.app_context():
+            if vessel_ids is None:
+                rows = db.session.execute(LOAD_ALL).all()
+            else:
+                rows = db.session.execute(
+                    LOAD_VESSELS, {"vessel_ids": sorted(vessel_ids)}
+                ).all()
+            db.session.remove()
+
+        with self._lock:
+            if vessel_ids is None:
+                self._clear()
+            else:
+                for vessel_id in vessel_ids:
+                    for record in list(self._by_vessel.get(vessel_id, {}).values()):
+                        self._remove(record)
+            for row in rows:
+                self._add(EquipmentRecord(*row))
+
+    def _clear(self):
+        self._by_code = {}
+        self._by_vessel = {}
+        self._active_by_vessel = {}
+        self._by_name = {}
+        self._active_lists = {}
+        self._name_lists = {}
+
+    def _changed(self, record):
+        self._active_lists.pop(record.vessel_id, None)
+        self._name_lists.pop(record.name, None)
+
+    def _add(self, record):
+        previous = self._by_code.get(record.code)
+        if previous is not None:
+            self._remove(previous)
+        self._changed(record)
+        self._by_code[record.code] = record
+        self._by_vessel.setdefault(record.vessel_id, {})[record.id] = record
+        self._by_name.setdefault(record.name, {})[record.id] = record
+        if record.active:
+            self._active_by_vessel.setdefault(record.vessel_id, {})[
+                record.id
+            ] = record
+
+    def _remove(self, record):
+        self._changed(record)
+        del self._by_code[record.code]
+        del self._by_vessel[record.vessel_id][record.id]
+        del self._by_name[record.name][record.id]
+        if not self._by_name[record.name]:
+            del self._by_name[record.name]
+        self._active_by_vessel.get(record.vessel_id, {}).pop(record.id, None)
+
+    def add(self, id, vessel_id, vessel_code, name, code, location, active=True):
+        """Apply an equipment inserted and committed by this process."""
+        if not self.ready.is_set():
+            return
+        with self._lock:
+            record = EquipmentRecord(
+                id, vessel_id, vessel_code, name, code, location, active
+            )
+            self._add(record)
+
+    def set_inactive(self, codes):
+        """Apply a change of status committed by this process."""
+        if not self.ready.is_set():
+            return
+        with self._lock:
+            for code in codes:
+                record = self._by_code.get(code)
+                if record is not None:
+                    self._changed(record)
+                    record.active = False
+                    self._active_by_vessel.get(record.vessel_id, {}).pop(
+                        record.id, None
+                    )
+
+    @contextmanager
+    def bypassed(self):
+        """Answer the reads of this thread from the database in the block."""
+        self._local.bypassed = True
+        try:
+            yield
+        finally:
+            self._local.bypassed = False
+
+    def _serves(self):
+        return self.ready.is_set() and not getattr(self._local, "bypassed", False)
+
+    def active_equipments(self, vessel_id, limit=None, after=None):
+        if not self._serves():
+            return None
+        with self._lock:
+            cached = self._active_lists.get(vessel_id)
+            if cached is None:
+                active = self._active_by_vessel.get(vessel_id, {})
+                ids = sorted(active)
+                equipments = [active[equipment_id].as_dict() for equipment_id in ids]
+                cached = (ids, equipments)
+                self._active_lists[vessel_id] = cached
+        ids, equipments = cached
+        start = 0 if after is None else bisect.bisect_right(ids, after)
+        end = None if limit is None else start + limit
+        return equipments[start:end]
+
+    def equipments_by_name(self, name):
+        """Return the equipments with the name grouped by the code of their
+        vessel, the vessels in the order of their first equipment."""
+        if not self._serves():
+            return None
+        with self._lock:
+            cached = self._name_lists.get(name)
+            if cached is None:
+                by_vessel = {}
+                records = self._by_name.get(name, {})
+                for equipment_id in sorted(records):
+                    record = records[equipment_id]
+                    by_vessel.setdefault(record.vessel_code, []).append(
+                        record.as_dict()
+                    )
+                cached = list(by_vessel.items())
+                self._name_lists[name] = cached
+        return cached
+
+    def stats(self):
+        with self._lock:
+            return {
+                "ready": self.ready.is_set(),
+                "equipments": len(self._by_code),
+                "vessels": len(self._by_vessel),
+            }
+
+
+equipment_index = EquipmentIndex()
@@ -1,8 +1,494 @@
-from flask import jsonify
+import json
+
+from flask import current_app
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    any_,
+    bindparam,
+    cast,
+    func,
+    select,
+    text,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from apis.models.equipment import equipment
+from apis.models.equipment_status_history import equipment_status_history
+from apis.models.equipment_summary import (
+    COMPACT_SUMMARY,
+    DELETE_SUMMARY,
+    equipment_summary,
+)
 from apis.models.vessel import vessel
-from apis.models.model import db
+from apis.models.model import db, uses_sqlite
+from apis.models.replicas import replica_router
+from apis.services.equipment_index import equipment_index
+from apis.services.vessels import vesselsService
+from apis.utils.coalescer import Coalescer
+from apis.utils.json_response import json_response
+from apis.utils.response_cache import response_cache
 from apis.utils.response_message import MESSAGE
+from apis.utils.streaming import ndjson_response, stream_response
+
+STREAM_CHUNK_SIZE = 1000
+EXPORT_BATCH_SIZE = 5000
+
+status_update_coalescer = Coalescer()
+
+
+# Resolves the vessel and inserts the equipment in a single round trip. The
+# NOT EXISTS filter avoids spending a sequence value on the usual repeated
+# code, ON CONFLICT covers a concurrent insert of the same code.
+INSERT_EQUIPMENT = text(
+    """
+    WITH target_vessel AS (
+        SELECT id FROM vessels WHERE code = :vessel_code
+    ), inserted_equipment AS (
+        INSERT INTO equipments (vessel_id, name, code, location, active)
+        SELECT id, :name, :code, :location, true FROM target_vessel
+        WHERE NOT EXISTS (SELECT 1 FROM equipments WHERE code = :code)
+        ON CONFLICT (code) DO NOTHING
+        RETURNING id
+    )
+    SELECT
+        (SELECT id FROM inserted_equipment) AS id,
+        (SELECT id FROM target_vessel) AS vessel_id,
+        EXISTS (SELECT 1 FROM equipments WHERE code = :code) AS repeated
+    """
+)
+
+# SQLite does not allow an INSERT in a WITH clause, the vessel and the code
+# are only looked up again when nothing was inserted.
+SQLITE_INSERT_EQUIPMENT = text(
+    """
+    INSERT INTO equipments (vessel_id, name, code, location, active)
+    SELECT id, :name, :code, :location, true FROM vessels
+    WHERE code = :vessel_code
+    ON CONFLICT (code) DO NOTHING
+    RETURNING id, vessel_id, false AS repeated
+    """
+)
+# SQLite returns no rows from an executemany, the rows are sent as a single
+# json array instead.
+SQLITE_INSERT_EQUIPMENTS = text(
+    """
+    INSERT INTO equipments (vessel_id, name, code, location, active)
+    SELECT json_extract(value, '$.vessel_id'), json_extract(value, '$.name'),
+        json_extract(value, '$.code'), json_extract(value, '$.location'),
+        json_extract(value, '$.active')
+    FROM json_each(:equipments)
+    WHERE true
+    ON CONFLICT (code) DO NOTHING
+    RETURNING code
+    """
+)
+SQLITE_EQUIPMENT_NOT_INSERTED = text(
+    """
+    SELECT
+        NULL AS id,
+        (SELECT id FROM vessels WHERE code = :vessel_code) AS vessel_id,
+        EXISTS (SELECT 1 FROM equipments WHERE code = :code) AS repeated
+    """
+)
+
+# The prefix modes walk the text_pattern_ops indexes in their own order, so
+# the closest names come first and the scan stops at the limit. The fuzzy
+# mode walks the trigram index by distance to the searched name, without a
+# second sort key which would need to sort every match before postgres 13.
+SEARCH_EQUIPMENTS = {
+    "prefix": text(
+        """
+        SELECT equipments.id, equipments.name, equipments.code,
+            equipments.location, equipments.active, vessels.code AS vessel_code
+        FROM equipments JOIN vessels ON vessels.id = equipments.vessel_id
+        WHERE equipments.name LIKE :pattern
+        ORDER BY equipments.name USING ~<~, equipments.id
+        LIMIT :limit
+        """
+    ),
+    "icase": text(
+        """
+        SELECT equipments.id, equipments.name, equipments.code,
+            equipments.location, equipments.active, vessels.code AS vessel_code
+        FROM equipments JOIN vessels ON vessels.id = equipments.vessel_id
+        WHERE lower(equipments.name) LIKE lower(:pattern)
+        ORDER BY lower(equipments.name) USING ~<~, equipments.id
+        LIMIT :limit
+        """
+    ),
+    "fuzzy": text(
+        """
+        SELECT equipments.id, equipments.name, equipments.code,
+            equipments.location, equipments.active, vessels.code AS vessel_code,
+            similarity(equipments.name, :name) AS similarity
+        FROM equipments JOIN vessels ON vessels.id = equipments.vessel_id
+        WHERE equipments.name % :name
+        ORDER BY equipments.name <-> :name
+        LIMIT :limit
+        """
+    ),
+}
+# SQLite has no text_pattern_ops, GLOB is the case sensitive match which
+# walks the indexes in the order of the bytes, like ~<~ in postgres.
+SQLITE_SEARCH_EQUIPMENTS = {
+    "prefix": text(
+        """
+        SELECT equipments.id, equipments.name, equipments.code,
+            equipments.location, equipments.active, vessels.code AS vessel_code
+        FROM equipments JOIN vessels ON vessels.id = equipments.vessel_id
+        WHERE equipments.name GLOB :pattern
+        ORDER BY equipments.name, equipments.id
+        LIMIT :limit
+        """
+    ).columns(active=Boolean),
+    "icase": text(
+        """
+        SELECT equipments.id, equipments.name, equipments.code,
+            equipments.location, equipments.active, vessels.code AS vessel_code
+        FROM equipments JOIN vessels ON vessels.id = equipments.vessel_id
+        WHERE lower(equipments.name) GLOB lower(:pattern)
+        ORDER BY lower(equipments.name), equipments.id
+        LIMIT :limit
+        """
+    ).columns(active=Boolean),
+}
+# The fuzzy mode is only offered by the databases with pg_trgm, which the
+# models and the migrations only create when the server provides it.
+TRGM_INSTALLED = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+)
+_trgm_installed = {}
+SEARCH_DEFAULT_LIMIT = 50
+SEARCH_MAX_LIMIT = 500
+
+ACTIVE_EQUIPMENTS_MAX_LIMIT = 10000
+ACTIVE_EQUIPMENTS_MAX_VESSELS = 100
+
+EQUIPMENT_FIELDS = ("id", "name", "code", "location", "active")
+EQUIPMENT_COLUMNS = [getattr(equipment, field) for field in EQUIPMENT_FIELDS]
+
+EXPORT_FIELDS = EQUIPMENT_FIELDS + ("vessel_code",)
+EXPORT_TYPES = ("int64", "string", "string", "string", "bool", "string")
+
+
+def _equipment_dict(row):
+    return dict(zip(EQUIPMENT_FIELDS, row))
+
+
+def _active_equipments_query(
+    session, vessel_id, limit=None, after=None, as_of=None
+):
+    if as_of is None:
+        active_equipments_by_vessel = (
+            session.query(*EQUIPMENT_COLUMNS)
+            .filter_by(active=True, vessel_id=vessel_id)
+            .order_by(equipment.id)
+        )
+    else:
+        # The last status of each equipment of the vessel at that time, found
+        # with one index lookup per equipment whatever the size of the history.
+        status_as_of = (
+            select(equipment_status_history.active)
+            .where(
+                equipment_status_history.equipment_id == equipment.id,
+                equipment_status_history.changed_at <= as_of,
+            )
+            .order_by(
+                equipment_status_history.changed_at.desc(),
+                equipment_status_history.id.desc(),
+            )
+            .limit(1)
+            .lateral()
+        )
+        active_equipments_by_vessel = (
+            session.query(*EQUIPMENT_COLUMNS[:-1], status_as_of.c.active)
+            .join(status_as_of, true())
+            .filter(equipment.vessel_id == vessel_id, status_as_of.c.active)
+            .order_by(equipment.id)
+        )
+    if after is not None:
+        active_equipments_by_vessel = active_equipments_by_vessel.filter(
+            equipment.id > after
+        )
+    if limit is not None:
+        active_equipments_by_vessel = active_equipments_by_vessel.limit(limit)
+
+    return active_equipments_by_vessel
+
+
+def _active_equipments_by_vessels_query(session, vessel_ids):
+    if uses_sqlite(current_app.config):
+        in_vessels = equipment.vessel_id.in_(vessel_ids)
+    else:
+        in_vessels = equipment.vessel_id == any_(
+            bindparam("vessel_ids", vessel_ids, type_=ARRAY(BigInteger))
+        )
+    return (
+        session.query(equipment.vessel_id, *EQUIPMENT_COLUMNS)
+        .filter(equipment.active, in_vessels)
+        .order_by(equipment.vessel_id, equipment.id)
+    )
+
+
+def _fleet_summary_query(session, vessel_id=None):
+    summary = session.query(
+        equipment_summary.vessel_id,
+        equipment_summary.location,
+        cast(func.sum(equipment_summary.active_count), BigInteger).label(
+            "active_count"
+        ),
+        cast(func.sum(equipment_summary.inactive_count), BigInteger).label(
+            "inactive_count"
+        ),
+        func.count().label("deltas"),
+    ).group_by(equipment_summary.vessel_id, equipment_summary.location)
+    if vessel_id is not None:
+        summary = summary.filter(equipment_summary.vessel_id == vessel_id)
+    summary = summary.subquery()
+
+    summary_by_vessel = (
+        session.query(
+            vessel.code,
+            summary.c.location,
+            summary.c.active_count,
+            summary.c.inactive_count,
+            summary.c.deltas,
+        )
+        .outerjoin(summary, summary.c.vessel_id == vessel.id)
+        .order_by(vessel.code, summary.c.location)
+    )
+    if vessel_id is not None:
+        summary_by_vessel = summary_by_vessel.filter(vessel.id == vessel_id)
+
+    return summary_by_vessel
+
+
+def _equipments_by_name(session, equipment_name):
+    """Return the equipments with the name grouped by the code of their
+    vessel, the vessels in the order of their first equipment."""
+    if not uses_sqlite(current_app.config):
+        return _equipments_by_name_query(session, equipment_name).all()
+
+    # SQLite cannot order the rows of an aggregate, they are grouped here.
+    by_vessel = {}
+    rows = (
+        session.query(vessel.code, *EQUIPMENT_COLUMNS)
+        .join(equipment, equipment.vessel_id == vessel.id)
+        .filter(equipment.name == equipment_name)
+        .order_by(equipment.id)
+    )
+    for vessel_code, *row in rows:
+        by_vessel.setdefault(vessel_code, []).append(_equipment_dict(row))
+    return list(by_vessel.items())
+
+
+def _equipments_by_name_query(session, equipment_name):
+    equipments_json = func.json_build_object(
+        "id",
+        equipment.id,
+        "name",
+        equipment.name,
+        "code",
+        equipment.code,
+        "location",
+        equipment.location,
+        "active",
+        equipment.active,
+    )
+    return (
+        session.query(
+            vessel.code,
+            func.json_agg(aggregate_order_by(equipments_json, equipment.id)),
+        )
+        .join(equipment, equipment.vessel_id == vessel.id)
+        .filter(equipment.name == equipment_name)
+        .group_by(vessel.code)
+        .order_by(func.min(equipment.id))
+    )
+
+
+def _like_prefix(value):
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+def _glob_prefix(value):
+    escaped = "".join(f"[{char}]" if char in "*?[" else char for char in value)
+    return escaped + "*"
+
+
+def compact_equipment_summary():
+    """Replace the delta rows of the equipment summary with one per vessel
+    and location, on the primary."""
+    if not uses_sqlite(current_app.config):
+        db.session.execute(COMPACT_SUMMARY)
+        db.session.commit()
+        return
+
+    sums = {}
+    for vessel_id, location, active_count, inactive_count in db.session.execute(
+        DELETE_SUMMARY
+    ).all():
+        counts = sums.setdefault((vessel_id, location), [0, 0])
+        counts[0] += active_count
+        counts[1] += inactive_count
+    compacted = [
+        {
+            "vessel_id": vessel_id,
+            "location": location,
+            "active_count": active_count,
+            "inactive_count": inactive_count,
+        }
+        for (vessel_id, location), (active_count, inactive_count) in sums.items()
+        if active_count or inactive_count
+    ]
+    if compacted:
+        db.session.execute(sqlite_insert(equipment_summary), compacted)
+    db.session.commit()
+
+
+def set_equipments_inactive(code_lists):
+    """Set the equipments of every list of codes to inactive, without
+    committing, and return the result of each list with the cache keys to
+    invalidate once committed. A list with a code that does not exist gets
+    NO_CODE and none of its equipments is updated."""
+    all_codes = {code for codes in code_lists for code in codes}
+    equipments_in_db = {
+        code: (name, vessel_code)
+        for code, name, vessel_code in db.session.query(
+            equipment.code, equipment.name, vessel.code
+        )
+        .outerjoin(vessel, equipment.vessel_id == vessel.id)
+        .filter(equipment.code.in_(all_codes))
+    }
+
+    results = []
+    updated_codes = set()
+    for codes in code_lists:
+        missing_codes = [code for code in codes if code not in equipments_in_db]
+        if missing_codes:
+            results.append(({**MESSAGE["NO_CODE"], "codes": missing_codes}, 409))
+        else:
+            updated_codes.update(codes)
+            results.append((MESSAGE["OK"], 201))
+    if not updated_codes:
+        return results, set()
+
+    db.session.execute(
+        update(equipment)
+        .where(equipment.code.in_(sorted(updated_codes)))
+        .values(active=False)
+        .execution_options(synchronize_session=False)
+    )
+
+    invalidated_keys = set()
+    for code in updated_codes:
+        name, vessel_code = equipments_in_db[code]
+        invalidated_keys.add(active_equipments_cache_key(vessel_code))
+        invalidated_keys.add(list_equipments_cache_key(name))
+
+    return results, invalidated_keys
+
+
+def _update_equipments_status(code_lists):
+    results, invalidated_keys = set_equipments_inactive(code_lists)
+    db.session.commit()
+    equipment_index.set_inactive(
+        code
+        for codes, (message, _) in zip(code_lists, results)
+        if message is MESSAGE["OK"]
+        for code in codes
+    )
+    response_cache.invalidate(invalidated_keys)
+
+    return results
+
+
+def insert_equipments(equipments_data):
+    """Insert the equipments, without committing, and return the result of
+    each one with the cache keys to invalidate once committed."""
+    codes = [item.get("code") for item in equipments_data]
+    vessel_codes = {item.get("vessel_code") for item in equipments_data}
+
+    existing_codes = set()
+    vessel_ids = {}
+    if equipments_data:
+        existing_codes = {
+            code
+            for code, in db.session.query(equipment.code).filter(
+                equipment.code.in_(codes)
+            )
+        }
+        vessel_ids = vesselsService.get_vessel_ids(vessel_codes)
+
+    results = []
+    new_equipments = []
+    for item in equipments_data:
+        code = item.get("code")
+        vessel_id = vessel_ids.get(item.get("vessel_code"))
+
+        if code in existing_codes:
+            results.append(MESSAGE["REPEATED_CODE"])
+        elif vessel_id is None:
+            results.append(MESSAGE["NO_VESSEL"])
+        else:
+            existing_codes.add(code)
+            new_equipments.append(
+                {
+                    "code": code,
+                    "name": item.get("name"),
+                    "location": item.get("location"),
+                    "vessel_id": vessel_id,
+                    "active": True,
+                }
+            )
+            results.append(MESSAGE["OK"])
+
+    # Codes inserted by a concurrent writer after the lookup above are
+    # skipped by the database and reported as repeated.
+    inserted_codes = insert_new_equipments(new_equipments)
+
+    invalidated_keys = set()
+    for index, item in enumerate(equipments_data):
+        if results[index] is not MESSAGE["OK"]:
+            continue
+        if item.get("code") not in inserted_codes:
+            results[index] = MESSAGE["REPEATED_CODE"]
+            continue
+        invalidated_keys.add(active_equipments_cache_key(item.get("vessel_code")))
+        invalidated_keys.add(list_equipments_cache_key(item.get("name")))
+
+    return results, invalidated_keys
+
+
+def insert_new_equipments(new_equipments):
+    """Insert the rows of equipments whose code is not in the database yet,
+    without committing, and return the inserted codes."""
+    if not new_equipments:
+        return set()
+    if uses_sqlite(current_app.config):
+        inserted = db.session.execute(
+            SQLITE_INSERT_EQUIPMENTS, {"equipments": json.dumps(new_equipments)}
+        )
+        return {code for code, in inserted}
+
+    statement = (
+        insert(equipment)
+        .on_conflict_do_nothing(index_elements=["code"])
+        .returning(equipment.code)
+    )
+    return {code for code, in db.session.execute(statement, new_equipments)}
+
+
+def active_equipments_cache_key(vessel_code):
+    return f"active_equipments:{vessel_code}"
+
+
+def list_equipments_cache_key(equipment_name):
+    return f"list_equipments:{equipment_name}"
 
 
 class equipmentService:
@@ -12,97 +498,256 @@ class equipmentService:
         location = equipment_data.get("location")
         vessel_code = equipment_data.get("vessel_code")
 
-        check_code_in_db = equipment.query.filter_by(code=code).first()
-        if check_code_in_db is not None:
-            return MESSAGE["REPEATED_CODE"], 409
+        params = {
+            "name": name,
+            "code": code,
+            "location": location,
+            "vessel_code": vessel_code,
+        }
+        if uses_sqlite(current_app.config):
+            result = db.session.execute(SQLITE_INSERT_EQUIPMENT, params).one_or_none()
+            if result is None:
+                result = db.session.execute(
+                    SQLITE_EQUIPMENT_NOT_INSERTED, params
+                ).one()
+        else:
+            result = db.session.execute(INSERT_EQUIPMENT, params).one()
+        db.session.commit()
 
-        check_vessel_code_in_db = vessel.query.filter_by(code=vessel_code).first()
-        if check_vessel_code_in_db is None:
+        if result.id is None:
+            if result.repeated or result.vessel_id is not None:
+                return MESSAGE["REPEATED_CODE"], 409
             return MESSAGE["NO_VESSEL"], 409
 
-        vessel_id = check_vessel_code_in_db.id
-
-        new_equipment = equipment(
-            code=code, name=name, location=location, vessel_id=vessel_id, active=True
+        equipment_index.add(
+            result.id, result.vessel_id, vessel_code, name, code, location
+        )
+        response_cache.invalidate(
+            [active_equipments_cache_key(vessel_code), list_equipments_cache_key(name)]
         )
-        db.session.add(new_equipment)
-        db.session.commit()
 
         return MESSAGE["OK"], 201
 
-    def update_equipment_status(codes):
-        for code in codes:
-            check_code_in_db = equipment.query.filter_by(code=code).first()
+    def insert_equipment_batch(equipments_data):
+        results, invalidated_keys = insert_equipments(equipments_data)
+        db.session.commit()
+        response_cache.invalidate(invalidated_keys)
 
-            if check_code_in_db is None:
-                return MESSAGE["NO_CODE"], 409
-            else:
-                check_code_in_db.active = False
+        return results
 
-        db.session.commit()
+    def update_equipment_status(codes):
+        codes = list(dict.fromkeys(codes))
+        return status_update_coalescer.submit(
+            codes, _update_equipments_status, size=len(codes)
+        )
 
-        return MESSAGE["OK"], 201
+    def active_equipment(
+        vessel_code, limit=None, after=None, stream=False, as_of=None
+    ):
+        # SQLite keeps no status history.
+        if as_of is not None and uses_sqlite(current_app.config):
+            return MESSAGE["NOT_SUPPORTED"], 501
 
-    def active_equipment(vessel_code):
-        check_vessel_code_in_db = vessel.query.filter_by(code=vessel_code).first()
+        vessel_id = vesselsService.get_vessel_id(vessel_code)
 
-        if check_vessel_code_in_db is None:
+        if vessel_id is None:
             return MESSAGE["NO_VESSEL"], 409
 
-        vessel_id = check_vessel_code_in_db.id
+        if stream:
 
-        active_equipments_by_vessel = equipment.query.filter_by(
-            active=True, vessel_id=vessel_id
-        ).all()
+            def rows():
+                with replica_router.session() as session:
+                    active_equipments_by_vessel = _active_equipments_query(
+                        session, vessel_id, limit, after, as_of
+                    )
+                    for row in active_equipments_by_vessel.yield_per(
+                        STREAM_CHUNK_SIZE
+                    ):
+                        yield _equipment_dict(row)
 
-        list_equipments = []
-        for eq in active_equipments_by_vessel:
-            list_equipments.append(
-                {
-                    "id": eq.id,
-                    "name": eq.name,
-                    "code": eq.code,
-                    "location": eq.location,
-                    "active": eq.active,
-                }
+            return ndjson_response(rows()), 200
+
+        list_equipments = None
+        if as_of is None:
+            list_equipments = equipment_index.active_equipments(
+                vessel_id, limit, after
+            )
+        if list_equipments is None:
+            list_equipments = replica_router.run(
+                lambda session: [
+                    _equipment_dict(row)
+                    for row in _active_equipments_query(
+                        session, vessel_id, limit, after, as_of
+                    )
+                ]
             )
 
-        return jsonify(list_equipments), 200
+        headers = {}
+        if limit is not None and len(list_equipments) == limit:
+            headers["X-Next-Cursor"] = str(list_equipments[-1]["id"])
+
+        return json_response(list_equipments, headers=headers)
+
+    def active_equipments_by_vessel(vessel_codes):
+        vessel_codes = list(dict.fromkeys(vessel_codes))
+        vessel_ids = vesselsService.get_vessel_ids(vessel_codes)
+
+        equipments_by_vessel_id = {
+            vessel_id: equipment_index.active_equipments(vessel_id)
+            for vessel_id in vessel_ids.values()
+        }
+        if None in equipments_by_vessel_id.values():
+            equipments_by_vessel_id = {
+                vessel_id: [] for vessel_id in vessel_ids.values()
+            }
+            rows = replica_router.run(
+                lambda session: _active_equipments_by_vessels_query(
+                    session, sorted(equipments_by_vessel_id)
+                ).all()
+            )
+            for vessel_id, *row in rows:
+                equipments_by_vessel_id[vessel_id].append(_equipment_dict(row))
+
+        return json_response(
+            {
+                "equipments": {
+                    code: equipments_by_vessel_id[vessel_ids[code]]
+                    for code in vessel_codes
+                    if code in vessel_ids
+                },
+                "unknown_vessels": [
+                    code for code in vessel_codes if code not in vessel_ids
+                ],
+            }
+        )
 
     def list_equipment_by_name(equipment_name):
-        check_name_in_db = equipment.query.filter_by(name=equipment_name).first()
+        list_by_name = equipment_index.equipments_by_name(equipment_name)
+        if list_by_name is None:
+            list_by_name = replica_router.run(
+                lambda session: _equipments_by_name(session, equipment_name)
+            )
 
-        if check_name_in_db is None:
+        if not list_by_name:
             return MESSAGE["NO_EQUIPMENT_NAME"], 409
 
-        list_by_name = (
-            db.session.query(equipment, vessel)
-            .join(vessel)
-            .filter(equipment.name == equipment_name)
+        formatted_equipments_list = [
+            {
+                "vessel_code": vessel_code,
+                f"equipments_{equipment_name}": equipments,
+            }
+            for vessel_code, equipments in list_by_name
+        ]
+
+        return json_response(formatted_equipments_list)
+
+    def search_modes():
+        """Return the modes of search_equipments the database supports,
+        checked once per database."""
+        if uses_sqlite(current_app.config):
+            return list(SQLITE_SEARCH_EQUIPMENTS)
+        url = str(db.engine.url)
+        if url not in _trgm_installed:
+            _trgm_installed[url] = db.session.execute(TRGM_INSTALLED).scalar()
+        if _trgm_installed[url]:
+            return list(SEARCH_EQUIPMENTS)
+        return [mode for mode in SEARCH_EQUIPMENTS if mode != "fuzzy"]
+
+    def search_equipments(equipment_name, mode="icase", limit=SEARCH_DEFAULT_LIMIT):
+        params = {"name": equipment_name, "limit": limit}
+        if uses_sqlite(current_app.config):
+            statement = SQLITE_SEARCH_EQUIPMENTS[mode]
+            params["pattern"] = _glob_prefix(equipment_name)
+        else:
+            statement = SEARCH_EQUIPMENTS[mode]
+            if mode != "fuzzy":
+                params["pattern"] = _like_prefix(equipment_name)
+
+        found_equipments = replica_router.run(
+            lambda session: [
+                dict(row._mapping) for row in session.execute(statement, params)
+            ]
         )
 
-        equipments_collection = {}
-        for equip_obj, vessel_obj in list_by_name:
-            equip = {
-                "id": equip_obj.id,
-                "name": equip_obj.name,
-                "code": equip_obj.code,
-                "location": equip_obj.location,
-                "active": equip_obj.active,
-            }
+        if not found_equipments:
+            return MESSAGE["NO_EQUIPMENT_NAME"], 409
+
+        return json_response(found_equipments)
 
-            if equipments_collection.get(vessel_obj.code):
-                equipments_collection[vessel_obj.code].append(equip)
-            else:
-                equipments_collection[vessel_obj.code] = [equip]
+    def fleet_summary(vessel_code=None):
+        vessel_id = None
+        if vessel_code is not None:
+            vessel_id = vesselsService.get_vessel_id(vessel_code)
+            if vessel_id is None:
+                return MESSAGE["NO_VESSEL"], 409
+
+        rows = replica_router.run(
+            lambda session: _fleet_summary_query(session, vessel_id).all()
+        )
 
-        formatted_equipments_list = []
-        for key in equipments_collection:
-            formatted_equipments_list.append(
+        # The reads stay proportional to the vessel locations as long as the
+        # deltas appended since the last compaction are few.
+        extra_deltas = sum(row.deltas - 1 for row in rows if row.deltas)
+        if extra_deltas > current_app.config["SUMMARY_MAX_DELTAS"]:
+            compact_equipment_summary()
+
+        vessels = []
+        locations = {}
+        for code, location, active_count, inactive_count, _ in rows:
+            if not vessels or vessels[-1]["vessel_code"] != code:
+                vessels.append(
+                    {"vessel_code": code, "active": 0, "inactive": 0, "locations": []}
+                )
+            if location is None or active_count + inactive_count == 0:
+                continue
+            vessels[-1]["active"] += active_count
+            vessels[-1]["inactive"] += inactive_count
+            vessels[-1]["locations"].append(
                 {
-                    "vessel_code": key,
-                    f"equipments_{equipment_name}": equipments_collection[key],
+                    "location": location,
+                    "active": active_count,
+                    "inactive": inactive_count,
                 }
             )
+            totals = locations.setdefault(
+                location, {"location": location, "active": 0, "inactive": 0}
+            )
+            totals["active"] += active_count
+            totals["inactive"] += inactive_count
+
+        return json_response(
+            {
+                "active": sum(item["active"] for item in vessels),
+                "inactive": sum(item["inactive"] for item in vessels),
+                "vessels": vessels,
+                "locations": [locations[location] for location in sorted(locations)],
+            }
+        )
+
+    def export_equipments(file_format, vessel_code=None, active=None):
+        export_query = (
+            select(*EQUIPMENT_COLUMNS, vessel.code)
+            .join(vessel, equipment.vessel_id == vessel.id)
+            .order_by(equipment.id)
+        )
+        if vessel_code is not None:
+            vessel_id = vesselsService.get_vessel_id(vessel_code)
+            if vessel_id is None:
+                return MESSAGE["NO_VESSEL"], 409
+            export_query = export_query.where(equipment.vessel_id == vessel_id)
+        if active is not None:
+            export_query = export_query.where(
+                equipment.active if active else ~equipment.active
+            )
+
+        def batches():
+            with replica_router.session() as session:
+                result = session.execute(
+                    export_query.execution_options(stream_results=True)
+                )
+                yield from result.partitions(EXPORT_BATCH_SIZE)
 
-        return jsonify(formatted_equipments_list), 200
+        return (
+            stream_response(file_format, EXPORT_FIELDS, batches(), EXPORT_TYPES),
+            200,
+        )
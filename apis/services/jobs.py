@@ -0,0 +1,330 @@
+import logging
+import os
+import threading
+
+from sqlalchemy import JSON, insert, text
+
+from apis.models.job import job, job_error
+from apis.models.model import db, uses_sqlite
+from apis.services.equipments import insert_equipments, set_equipments_inactive
+from apis.utils.json_response import json_response
+from apis.utils.response_cache import response_cache
+from apis.utils.response_message import MESSAGE
+from apis.utils.validators import validate_equipment
+
+logger = logging.getLogger(__name__)
+
+JOB_ERRORS_LIMIT = 100
+
+# Takes the oldest job which is queued, or running in a worker which stopped
+# sending heartbeats, e.g. after a restart. SKIP LOCKED lets the workers of
+# every process claim jobs concurrently without waiting for each other.
+CLAIM_JOB = text(
+    """
+    UPDATE jobs
+    SET status = 'running', attempts = attempts + 1,
+        started_at = coalesce(started_at, now()), heartbeat_at = now()
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE status = 'queued' OR (
+            status = 'running'
+            AND heartbeat_at < now() - :stale * interval '1 second'
+        )
+        ORDER BY id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, kind, payload, total, processed, attempts
+    """
+)
+
+
+# Only the attempt which claimed the job last can record progress, so a
+# worker which was taken for dead stops at its next chunk.
+RECORD_PROGRESS = text(
+    """
+    UPDATE jobs
+    SET processed = :processed, failed = failed + :failed, heartbeat_at = now()
+    WHERE id = :id AND attempts = :attempts AND status = 'running'
+    """
+)
+
+FINISH_JOB = text(
+    """
+    UPDATE jobs
+    SET status = :status, error = :error, finished_at = now(), heartbeat_at = now()
+    WHERE id = :id AND attempts = :attempts AND status = 'running'
+    """
+)
+
+
+# SQLite has no now() and its CURRENT_TIMESTAMP has no fraction of second,
+# the times are written in the format SQLAlchemy reads. It runs one writer
+# at a time, so the claims need no lock to not take the same job.
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+SQLITE_CLAIM_JOB = text(
+    f"""
+    UPDATE jobs
+    SET status = 'running', attempts = attempts + 1,
+        started_at = coalesce(started_at, {SQLITE_NOW}),
+        heartbeat_at = {SQLITE_NOW}
+    WHERE id = (
+        SELECT id FROM jobs
+        WHERE status = 'queued' OR (
+            status = 'running'
+            AND heartbeat_at < strftime(
+                '%Y-%m-%d %H:%M:%f000', 'now', -:stale || ' seconds'
+            )
+        )
+        ORDER BY id
+        LIMIT 1
+    )
+    RETURNING id, kind, payload, total, processed, attempts
+    """
+).columns(payload=JSON)
+SQLITE_RECORD_PROGRESS = text(RECORD_PROGRESS.text.replace("now()", SQLITE_NOW))
+SQLITE_FINISH_JOB = text(FINISH_JOB.text.replace("now()", SQLITE_NOW))
+
+
+def _insert_equipments_chunk(items):
+    results = [None] * len(items)
+    valid_indexes = []
+    for index, item in enumerate(items):
+        error = validate_equipment(item)
+        if error is not None:
+            results[index] = MESSAGE[error]
+        else:
+            valid_indexes.append(index)
+
+    inserted, invalidated_keys = insert_equipments([items[i] for i in valid_indexes])
+    for index, result in zip(valid_indexes, inserted):
+        results[index] = result
+
+    return results, invalidated_keys
+
+
+def _set_inactive_chunk(codes):
+    results, invalidated_keys = set_equipments_inactive([[code] for code in codes])
+    return [message for message, _ in results], invalidated_keys
+
+
+# Processes a chunk of the items of a job without committing and returns the
+# result of each item with the cache keys to invalidate once committed.
+JOB_KINDS = {
+    "insert_equipment_batch": _insert_equipments_chunk,
+    "update_equipment_status": _set_inactive_chunk,
+}
+
+
+def _item_code(item):
+    code = item.get("code") if isinstance(item, dict) else item
+    return code[:256] if isinstance(code, str) else None
+
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+
+class _LostJob(Exception):
+    pass
+
+
+class JobRunner:
+    """Runs the jobs stored in the jobs table in a pool of threads of each
+    process. The threads claim the queued jobs, and the ones left running by
+    a stopped worker, and process their items in chunks, committing the
+    progress with the changes of each chunk."""
+
+    def __init__(self):
+        self.app = None
+        self.workers = 0
+        self.chunk_size = 1000
+        self.poll_interval = 1
+        self.stale_seconds = 60
+        self._claim_job = CLAIM_JOB
+        self._record_progress = RECORD_PROGRESS
+        self._finish_job = FINISH_JOB
+        self._threads = []
+        self._pid = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def configure(self, app):
+        self.stop()
+        self.app = app
+        self.workers = app.config["JOB_WORKERS"]
+        self.chunk_size = app.config["JOB_CHUNK_SIZE"]
+        self.poll_interval = app.config["JOB_POLL_INTERVAL"]
+        self.stale_seconds = app.config["JOB_STALE_SECONDS"]
+        if uses_sqlite(app.config):
+            self._claim_job = SQLITE_CLAIM_JOB
+            self._record_progress = SQLITE_RECORD_PROGRESS
+            self._finish_job = SQLITE_FINISH_JOB
+        else:
+            self._claim_job = CLAIM_JOB
+            self._record_progress = RECORD_PROGRESS
+            self._finish_job = FINISH_JOB
+        app.before_request(self.start)
+
+    def start(self):
+        """Start the threads of this process, once. They are started by the
+        first request rather than by create_app, so a preloaded app forks
+        before any thread exists."""
+        if self._pid == os.getpid() or not self.workers:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-{n}", daemon=True)
+                for n in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self):
+        """Stop the threads once they finish their current job."""
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._pid = None
+
+    def wake(self):
+        self._wake.set()
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                claimed = self.run_next()
+            except Exception:
+                logger.exception("Could not claim a job")
+                claimed = False
+            if not claimed:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def run_next(self):
+        """Claim and run one job, returning False when there is none."""
+        with self.app.app_context():
+            claimed = db.session.execute(
+                self._claim_job, {"stale": self.stale_seconds}
+            ).one_or_none()
+            db.session.commit()
+            if claimed is None:
+                return False
+
+            try:
+                self._run(claimed)
+                status, error = "succeeded", None
+            except _LostJob:
+                db.session.rollback()
+                return True
+            except Exception as exception:
+                logger.exception("Job %s failed", claimed.id)
+                db.session.rollback()
+                status, error = "failed", repr(exception)
+
+            db.session.execute(
+                self._finish_job,
+                {
+                    "id": claimed.id,
+                    "attempts": claimed.attempts,
+                    "status": status,
+                    "error": error,
+                },
+            )
+            db.session.commit()
+            return True
+
+    def _run(self, claimed):
+        process = JOB_KINDS[claimed.kind]
+        for offset in range(claimed.processed, claimed.total, self.chunk_size):
+            items = claimed.payload[offset : offset + self.chunk_size]
+            results, invalidated_keys = process(items)
+
+            errors = [
+                {
+                    "job_id": claimed.id,
+                    "item": offset + index,
+                    "code": _item_code(items[index]),
+                    "message": result["message"],
+                }
+                for index, result in enumerate(results)
+                if result is not MESSAGE["OK"]
+            ]
+            if errors:
+                db.session.execute(insert(job_error), errors)
+            recorded = db.session.execute(
+                self._record_progress,
+                {
+                    "id": claimed.id,
+                    "attempts": claimed.attempts,
+                    "processed": offset + len(items),
+                    "failed": len(errors),
+                },
+            )
+            if recorded.rowcount != 1:
+                raise _LostJob(claimed.id)
+            db.session.commit()
+            response_cache.invalidate(invalidated_keys)
+
+
+job_runner = JobRunner()
+
+
+class jobsService:
+    def create_job(kind, items):
+        new_job = job(kind=kind, payload=items, total=len(items))
+        db.session.add(new_job)
+        db.session.commit()
+        job_runner.wake()
+
+        return json_response(
+            {**MESSAGE["ACCEPTED"], "job_id": new_job.id},
+            202,
+            headers={"Location": f"/jobs/{new_job.id}"},
+        )
+
+    def get_job(job_id):
+        found = db.session.get(job, job_id)
+        if found is None:
+            return MESSAGE["NO_JOB"], 404
+
+        errors = (
+            db.session.query(job_error.item, job_error.code, job_error.message)
+            .filter(job_error.job_id == job_id)
+            .order_by(job_error.item)
+            .limit(JOB_ERRORS_LIMIT)
+            .all()
+        )
+
+        items_per_second = None
+        last_progress = found.finished_at or found.heartbeat_at
+        if found.started_at is not None and last_progress is not None:
+            elapsed = (last_progress - found.started_at).total_seconds()
+            if elapsed > 0:
+                items_per_second = round(found.processed / elapsed, 1)
+
+        return json_response(
+            {
+                "id": found.id,
+                "kind": found.kind,
+                "status": found.status,
+                "total": found.total,
+                "processed": found.processed,
+                "failed": found.failed,
+                "progress": found.processed / found.total if found.total else 1.0,
+                "items_per_second": items_per_second,
+                "attempts": found.attempts,
+                "error": found.error,
+                "created_at": _isoformat(found.created_at),
+                "started_at": _isoformat(found.started_at),
+                "finished_at": _isoformat(found.finished_at),
+                "errors": [dict(row._mapping) for row in errors],
+            }
+        )
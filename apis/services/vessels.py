@@ -1,7 +1,10 @@
 from apis.models.model import db
 from apis.models.vessel import vessel
+from apis.utils.cache import TTLCache
 from apis.utils.response_message import MESSAGE
 
+vessel_id_cache = TTLCache()
+
 
 class vesselsService:
     def insert_vessel(code):
@@ -13,5 +16,35 @@ class vesselsService:
         new_vessel = vessel(code=code)
         db.session.add(new_vessel)
         db.session.commit()
+        vessel_id_cache.invalidate(code)
 
         return MESSAGE["OK"], 201
+
+    def get_vessel_id(code):
+        vessel_id = vessel_id_cache.get(code)
+        if vessel_id is None:
+            vessel_id = db.session.query(vessel.id).filter_by(code=code).scalar()
+            if vessel_id is not None:
+                vessel_id_cache.set(code, vessel_id)
+
+        return vessel_id
+
+    def get_vessel_ids(codes):
+        vessel_ids = {}
+        missing_codes = []
+        for code in set(codes):
+            vessel_id = vessel_id_cache.get(code)
+            if vessel_id is None:
+                missing_codes.append(code)
+            else:
+                vessel_ids[code] = vessel_id
+
+        if missing_codes:
+            vessels_in_db = db.session.query(vessel.code, vessel.id).filter(
+                vessel.code.in_(missing_codes)
+            )
+            for code, vessel_id in vessels_in_db:
+                vessel_id_cache.set(code, vessel_id)
+                vessel_ids[code] = vessel_id
+
+        return vessel_ids
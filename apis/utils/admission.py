@@ -0,0 +1,139 @@
+import time
+from threading import Lock
+
+from flask import g, request
+from sqlalchemy.pool import QueuePool
+
+from apis.utils.json_response import json_response
+from apis.utils.response_message import MESSAGE
+
+# Reads of these blueprints are shed first, writes and the health endpoints
+# are always admitted.
+LOW_PRIORITY_BLUEPRINTS = ("equipments", "jobs")
+READ_METHODS = ("GET", "HEAD")
+
+# Seconds for the pool wait estimate to halve when no checkout updates it,
+# so shedding stops soon after the pool recovers.
+POOL_WAIT_HALF_LIFE = 1.0
+POOL_WAIT_WEIGHT = 0.2
+
+
+class AdmissionController:
+    """Counts the requests in flight and estimates how long checkouts wait
+    for a database connection, and rejects the low priority reads with 503
+    while either is above its limit."""
+
+    def __init__(self):
+        self.enabled = False
+        self.max_reads = 64
+        self.max_pool_wait = 0.1
+        self.retry_after = 1
+        self.in_flight = 0
+        self.reads_in_flight = 0
+        self.shed = 0
+        self._pool_wait = 0.0
+        self._pool_wait_at = time.monotonic()
+        self._lock = Lock()
+
+    def configure(self, app):
+        self.enabled = app.config["ADMISSION_CONTROL"]
+        self.max_reads = app.config["ADMISSION_MAX_READS"]
+        if not self.max_reads:
+            # Reads beyond the connections of the pool would only wait for it.
+            options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+            self.max_reads = options.get("pool_size", 5) + options.get(
+                "max_overflow", 10
+            )
+        self.max_pool_wait = app.config["ADMISSION_MAX_POOL_WAIT_MS"] / 1000
+        self.retry_after = app.config["ADMISSION_RETRY_AFTER"]
+        self.reset()
+        if not self.enabled:
+            return
+
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+            **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}),
+            "poolclass": TimedQueuePool,
+        }
+        app.before_request(self.admit)
+        app.teardown_request(self.release)
+
+    def reset(self):
+        with self._lock:
+            self.in_flight = 0
+            self.reads_in_flight = 0
+            self.shed = 0
+            self._pool_wait = 0.0
+            self._pool_wait_at = time.monotonic()
+
+    def record_pool_wait(self, wait):
+        now = time.monotonic()
+        with self._lock:
+            current = self._decayed_pool_wait(now)
+            self._pool_wait = current + (wait - current) * POOL_WAIT_WEIGHT
+            self._pool_wait_at = now
+
+    def pool_wait(self):
+        with self._lock:
+            return self._decayed_pool_wait(time.monotonic())
+
+    def overloaded(self):
+        return self.pool_wait() > self.max_pool_wait
+
+    def admit(self):
+        low_priority = (
+            request.method in READ_METHODS
+            and request.blueprint in LOW_PRIORITY_BLUEPRINTS
+        )
+        overloaded = low_priority and self.overloaded()
+        with self._lock:
+            if low_priority and (overloaded or self.reads_in_flight >= self.max_reads):
+                self.shed += 1
+                return json_response(
+                    MESSAGE["OVERLOADED"],
+                    503,
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self.in_flight += 1
+            if low_priority:
+                self.reads_in_flight += 1
+        g._admitted = "read" if low_priority else "write"
+        return None
+
+    def release(self, exception=None):
+        admitted = g.pop("_admitted", None)
+        if admitted is None:
+            return
+        with self._lock:
+            self.in_flight -= 1
+            if admitted == "read":
+                self.reads_in_flight -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "reads_in_flight": self.reads_in_flight,
+                "shed": self.shed,
+                "pool_wait_ms": round(
+                    self._decayed_pool_wait(time.monotonic()) * 1000, 2
+                ),
+            }
+
+    def _decayed_pool_wait(self, now):
+        elapsed = now - self._pool_wait_at
+        return self._pool_wait * 0.5 ** (elapsed / POOL_WAIT_HALF_LIFE)
+
+
+admission_controller = AdmissionController()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool which reports how long each checkout waited for a
+    connection, including the time to open a new one."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            admission_controller.record_pool_wait(time.perf_counter() - started)
@@ -0,0 +1,56 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class TTLCache:
+    """Thread safe mapping bounded by size (least recently used entries are
+    evicted first) whose entries expire ``ttl`` seconds after being set."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def configure(self, maxsize, ttl):
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+        self.clear()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at > time.monotonic():
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._items[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + self.ttl)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._items)}
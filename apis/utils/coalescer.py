@@ -0,0 +1,69 @@
+from threading import Event, Lock
+
+
+class _Batch:
+    def __init__(self):
+        self.items = []
+        self.size = 0
+        self.full = Event()
+        self.done = Event()
+        self.results = None
+        self.error = None
+
+
+class Coalescer:
+    """Merges the calls made by concurrent threads within ``window`` seconds
+    into one call of ``apply(items)``, which returns one result per item.
+
+    The first thread of a batch waits for the window, or until the batch
+    reaches ``max_size``, and applies the whole batch while the others wait
+    for their result. With no window every call is applied on its own."""
+
+    def __init__(self, window=0, max_size=1000):
+        self.window = window
+        self.max_size = max_size
+        self.batches = 0
+        self._pending = None
+        self._lock = Lock()
+
+    def configure(self, window, max_size):
+        with self._lock:
+            self.window = window
+            self.max_size = max_size
+            self.batches = 0
+
+    def submit(self, item, apply, size=1):
+        if not self.window:
+            return apply([item])[0]
+
+        with self._lock:
+            batch = self._pending
+            leader = batch is None
+            if leader:
+                batch = self._pending = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            batch.size += size
+            if batch.size >= self.max_size:
+                self._pending = None
+                batch.full.set()
+
+        if not leader:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return batch.results[index]
+
+        batch.full.wait(self.window)
+        with self._lock:
+            if self._pending is batch:
+                self._pending = None
+            self.batches += 1
+        try:
+            batch.results = apply(batch.items)
+        except Exception as error:
+            batch.error = error
+            raise
+        finally:
+            batch.done.set()
+        return batch.results[index]
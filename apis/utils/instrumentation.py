@@ -0,0 +1,101 @@
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+from flask import g, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_collectors = []
+_collectors_lock = Lock()
+_listening = False
+
+
+def init_instrumentation(app):
+    """Record the statements, database time and serialization time of each
+    request and send them in the Server-Timing header."""
+    if not app.config["SQL_INSTRUMENTATION"]:
+        return
+
+    _listen_engine_events()
+    app.before_request(_start_request)
+    app.after_request(_add_server_timing)
+
+
+@contextmanager
+def count_queries():
+    """Collect the statements executed by any engine inside the block."""
+    statements = []
+    _listen_engine_events()
+    with _collectors_lock:
+        _collectors.append(statements)
+    try:
+        yield statements
+    finally:
+        with _collectors_lock:
+            _collectors.remove(statements)
+
+
+@contextmanager
+def timed(metric):
+    """Add the time spent inside the block to a metric of the current
+    request."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _request_timings()
+        if timings is not None:
+            timings[metric] = timings.get(metric, 0) + time.perf_counter() - start
+
+
+def _listen_engine_events():
+    global _listening
+    with _collectors_lock:
+        if _listening:
+            return
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _listening = True
+
+
+def _request_timings():
+    if has_app_context():
+        return g.get("_request_timings")
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_query_start", []).append(time.perf_counter())
+    for statements in list(_collectors):
+        statements.append(statement)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["_query_start"].pop()
+    timings = _request_timings()
+    if timings is not None:
+        timings["db"] = timings.get("db", 0) + elapsed
+        timings["queries"] = timings.get("queries", 0) + 1
+
+
+def _start_request():
+    g._request_start = time.perf_counter()
+    g._request_timings = {}
+
+
+def _add_server_timing(response):
+    timings = g.get("_request_timings")
+    if timings is None:
+        return response
+
+    total = time.perf_counter() - g._request_start
+    response.headers["Server-Timing"] = ", ".join(
+        [
+            f'db;dur={timings.get("db", 0) * 1000:.2f};'
+            f'desc="{timings.get("queries", 0)} queries"',
+            f'serialize;dur={timings.get("serialize", 0) * 1000:.2f}',
+            f"total;dur={total * 1000:.2f}",
+        ]
+    )
+    return response
@@ -0,0 +1,51 @@
+import json
+
+from flask import Response
+
+from apis.utils.instrumentation import timed
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _stdlib_dumps(data):
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def _orjson_dumps(data):
+    return orjson.dumps(data)
+
+
+dumps = _orjson_dumps if orjson is not None else _stdlib_dumps
+
+
+def configure_json(config):
+    """Select the encoder used by json responses: ``orjson``, ``stdlib``
+    or ``auto`` (orjson when it is installed)."""
+    global dumps
+
+    backend = config["JSON_BACKEND"]
+    if backend == "auto":
+        backend = "orjson" if orjson is not None else "stdlib"
+
+    if backend == "orjson":
+        if orjson is None:
+            raise RuntimeError("JSON_BACKEND is orjson but it is not installed")
+        dumps = _orjson_dumps
+    elif backend == "stdlib":
+        dumps = _stdlib_dumps
+    else:
+        raise ValueError(f"Unknown JSON_BACKEND {backend!r}")
+
+
+class JSONResponse(Response):
+    default_mimetype = "application/json"
+
+
+def json_response(data, status=200, headers=None):
+    with timed("serialize"):
+        body = dumps(data)
+
+    return JSONResponse(body, status=status, headers=headers)
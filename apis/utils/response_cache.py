@@ -0,0 +1,136 @@
+import hashlib
+from threading import Lock
+
+from flask import Response, make_response, request
+
+from apis.models.replicas import replica_router
+from apis.services.equipment_index import equipment_index
+from apis.utils.cache import TTLCache
+
+
+class MemoryBackend:
+    """Keeps versions and bodies in the worker process. Each worker has its
+    own versions, so it is only correct when a single worker serves the
+    application."""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self._versions = {}
+        self._bodies = TTLCache(maxsize, ttl)
+        self._lock = Lock()
+
+    def get_version(self, key):
+        return self._versions.get(key, 0)
+
+    def bump(self, keys):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+    def get_body(self, body_key):
+        return self._bodies.get(body_key)
+
+    def set_body(self, body_key, etag, body):
+        self._bodies.set(body_key, (etag, body))
+
+
+class RedisBackend:
+    """Keeps versions and bodies in redis, shared by every worker."""
+
+    def __init__(self, client, ttl=300, prefix="response_cache"):
+        self._redis = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, ttl=300):
+        import redis
+
+        return cls(redis.Redis.from_url(url), ttl)
+
+    def get_version(self, key):
+        return int(self._redis.get(f"{self.prefix}:version:{key}") or 0)
+
+    def bump(self, keys):
+        pipeline = self._redis.pipeline()
+        for key in keys:
+            pipeline.incr(f"{self.prefix}:version:{key}")
+        pipeline.execute()
+
+    def get_body(self, body_key):
+        cached = self._redis.hmget(f"{self.prefix}:body:{body_key}", "etag", "body")
+        if cached[0] is None:
+            return None
+        return cached[0].decode(), cached[1]
+
+    def set_body(self, body_key, etag, body):
+        name = f"{self.prefix}:body:{body_key}"
+        pipeline = self._redis.pipeline()
+        pipeline.hset(name, mapping={"etag": etag, "body": body})
+        pipeline.expire(name, self.ttl)
+        pipeline.execute()
+
+
+class ResponseCache:
+    """Caches successful read responses under a version per key. Writes bump
+    the versions of the keys they affect, so the next read builds the body
+    again.
+
+    The ETag is a hash of the body, and requests are only answered with a
+    304 while the body is cached. A write that does not bump the versions,
+    e.g. from a process with a memory backend of its own or from psql, is
+    served once the body expires, and only a client with an identical body
+    gets a 304 then."""
+
+    def __init__(self):
+        self.backend = MemoryBackend()
+
+    def configure(self, config):
+        backend = config["RESPONSE_CACHE_BACKEND"]
+        if backend == "memory":
+            self.backend = MemoryBackend(
+                config["RESPONSE_CACHE_SIZE"], config["RESPONSE_CACHE_TTL"]
+            )
+        elif backend == "redis":
+            self.backend = RedisBackend.from_url(
+                config["RESPONSE_CACHE_REDIS_URL"], config["RESPONSE_CACHE_TTL"]
+            )
+        elif backend == "none":
+            self.backend = None
+        else:
+            raise ValueError(f"Unknown RESPONSE_CACHE_BACKEND {backend!r}")
+
+    def invalidate(self, keys):
+        if self.backend is not None and keys:
+            self.backend.bump(keys)
+
+    def respond(self, key, build_response):
+        if self.backend is None:
+            return build_response()
+
+        # The version is read before the database so a write committed while
+        # the response is built can only make the cached body newer.
+        body_key = f"{key}:{self.backend.get_version(key)}"
+        cached = self.backend.get_body(body_key)
+        if cached is None:
+            # A lagging replica, or an equipment index which has not been
+            # notified of the write yet, could return a body older than the
+            # version, which would then be cached under it.
+            with replica_router.primary(), equipment_index.bypassed():
+                response = make_response(build_response())
+            if response.status_code != 200:
+                return response
+            body = response.get_data()
+            etag = hashlib.sha1(body).hexdigest()
+            self.backend.set_body(body_key, etag, body)
+        else:
+            etag, body = cached
+
+        if request.if_none_match.is_strong(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        return response
+
+
+response_cache = ResponseCache()
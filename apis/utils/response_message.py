@@ -7,4 +7,8 @@ MESSAGE = {
     "NO_VESSEL": {"message": "NO_VESSEL"},
     "NO_CODE": {"message": "NO_CODE"},
     "NO_EQUIPMENT_NAME": {"message": "NO_EQUIPMENT_NAME"},
+    "ACCEPTED": {"message": "ACCEPTED"},
+    "NO_JOB": {"message": "NO_JOB"},
+    "OVERLOADED": {"message": "OVERLOADED"},
+    "NOT_SUPPORTED": {"message": "NOT_SUPPORTED"},
 }
@@ -0,0 +1,83 @@
+import csv
+import io
+from importlib.util import find_spec
+
+from flask import Response, stream_with_context
+
+from apis.utils import json_response
+
+STREAM_MIMETYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+# pyarrow is only imported by the first arrow export, it is slow to import.
+if find_spec("pyarrow") is not None:
+    STREAM_MIMETYPES["arrow"] = "application/vnd.apache.arrow.stream"
+
+
+def ndjson_response(rows):
+    def generate():
+        for row in rows:
+            yield json_response.dumps(row) + b"\n"
+
+    return Response(
+        stream_with_context(generate()), mimetype="application/x-ndjson"
+    )
+
+
+def _csv_batches(fields, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _ndjson_batches(fields, batches):
+    dumps = json_response.dumps
+    for batch in batches:
+        yield b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in batch)
+
+
+def _arrow_batches(fields, batches, types):
+    import pyarrow as pa
+
+    types = [pa.type_for_alias(type_) for type_ in types]
+    schema = pa.schema(list(zip(fields, types)))
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            columns = zip(*batch)
+            writer.write_batch(
+                pa.record_batch(
+                    [pa.array(column, type_) for column, type_ in zip(columns, types)],
+                    schema=schema,
+                )
+            )
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    yield sink.getvalue()
+
+
+def stream_response(file_format, fields, batches, types=None):
+    """Stream ``batches`` of rows as csv, ndjson or an arrow ipc stream,
+    encoding one batch at a time. ``types`` are the arrow type names of the
+    fields, e.g. ``int64`` or ``string``, only used by arrow."""
+    if file_format == "csv":
+        chunks = _csv_batches(fields, batches)
+    elif file_format == "ndjson":
+        chunks = _ndjson_batches(fields, batches)
+    elif file_format in STREAM_MIMETYPES:
+        chunks = _arrow_batches(fields, batches, types)
+    else:
+        raise ValueError(f"Unknown stream format {file_format!r}")
+
+    return Response(
+        stream_with_context(chunks), mimetype=STREAM_MIMETYPES[file_format]
+    )
@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+EQUIPMENT_REQUIRED_FIELDS = ["name", "code", "location", "vessel_code"]
+
+
+def validate_equipment(body):
+    if not isinstance(body, dict):
+        return "WRONG_FORMAT"
+
+    body_keys = body.keys()
+    for key in EQUIPMENT_REQUIRED_FIELDS:
+        if key not in body_keys:
+            return "MISSING_PARAM"
+
+    code = body.get("code")
+    if isinstance(code, str) and len(code) > 8:
+        return "WRONG_FORMAT"
+
+    for field in body:
+        if not isinstance(body[field], str):
+            return "WRONG_FORMAT"
+        if not len(body[field]):
+            return "MISSING_PARAM"
+
+    return None
+
+
+def parse_timestamp(value):
+    """Parse an ISO 8601 timestamp, in UTC when it has no offset. Returns
+    None when the value is not a valid timestamp."""
+    try:
+        timestamp = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
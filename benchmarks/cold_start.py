@@ -0,0 +1,91 @@
+"""Measure the time from starting gunicorn with gunicorn.conf.py, like
+start_production.sh, to its first 200 on / with each SWAGGER_MODE, and the
+time of a python process importing wsgi and answering / in process, whose
+target is under a second with SWAGGER_MODE=static:
+python benchmarks/cold_start.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PORT = 5099
+ROUNDS = 5
+
+
+def cold_start(env):
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{PORT}/") as result:
+                    if result.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.01)
+            if server.poll() is not None:
+                raise RuntimeError("The server exited before answering")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def import_start(env):
+    started = time.perf_counter()
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from wsgi import app; "
+            "assert app.test_client().get('/').status_code == 200",
+        ],
+        cwd=ROOT,
+        env=env,
+        check=True,
+    )
+    return time.perf_counter() - started
+
+
+def main():
+    spec_path = os.path.join(tempfile.mkdtemp(), "apispec.json")
+    env = dict(
+        os.environ,
+        FLASK_APP="manage.py",
+        BIND=f"127.0.0.1:{PORT}",
+        SWAGGER_SPEC_PATH=spec_path,
+    )
+    subprocess.run(
+        [sys.executable, "-m", "flask", "build-apispec"], cwd=ROOT, env=env, check=True
+    )
+
+    for mode in ["dynamic", "static", "disabled"]:
+        timings = sorted(
+            cold_start(dict(env, SWAGGER_MODE=mode)) for _ in range(ROUNDS)
+        )
+        print(
+            f"SWAGGER_MODE={mode}: median {timings[ROUNDS // 2] * 1000:.0f}ms, "
+            f"max {timings[-1] * 1000:.0f}ms to the first 200 on /"
+        )
+
+    timings = sorted(
+        import_start(dict(env, SWAGGER_MODE="static")) for _ in range(ROUNDS)
+    )
+    print(
+        f"import wsgi, SWAGGER_MODE=static: median "
+        f"{timings[ROUNDS // 2] * 1000:.0f}ms, max {timings[-1] * 1000:.0f}ms "
+        f"({'under' if timings[ROUNDS // 2] < 1 else 'over'} the 1s target)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare the time of the active_equipments and list_equipments reads
+answered by the database with the same reads answered by the in-process
+equipment index, over 100 vessels of 1000 equipments each.
+
+Creates and drops the tables of the test database, like the tests do:
+python benchmarks/equipment_index.py
+"""
+import os
+import sys
+import time
+
+from sqlalchemy import text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.app import create_app
+from apis.models.model import db
+from apis.services.equipment_index import equipment_index
+from apis.services.equipments import equipmentService
+
+VESSELS = 100
+EQUIPMENTS_PER_VESSEL = 1000
+ROUNDS = 200
+
+
+def read_time(read):
+    read()
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        read()
+    return (time.perf_counter() - start) / ROUNDS
+
+
+def main():
+    app = create_app(test_config=True)
+    app.config["EQUIPMENT_INDEX"] = True
+    equipment_index.configure(app)
+    with app.test_request_context():
+        db.create_all()
+        db.session.execute(
+            text(
+                "INSERT INTO vessels (code) "
+                "SELECT 'MV' || n FROM generate_series(1, :vessels) AS n"
+            ),
+            {"vessels": VESSELS},
+        )
+        db.session.execute(
+            text(
+                "INSERT INTO equipments (vessel_id, name, code, location, active) "
+                "SELECT n % :vessels + 1, 'equipment' || n % 500, to_hex(n), "
+                "'brazil', n % 7 <> 0 "
+                "FROM generate_series(1, :rows) AS n"
+            ),
+            {"vessels": VESSELS, "rows": VESSELS * EQUIPMENTS_PER_VESSEL},
+        )
+        db.session.commit()
+
+        reads = {
+            "active_equipments": lambda: equipmentService.active_equipment("MV1"),
+            "list_equipments": lambda: equipmentService.list_equipment_by_name(
+                "equipment1"
+            ),
+        }
+        try:
+            database = {name: read_time(read) for name, read in reads.items()}
+            started = time.perf_counter()
+            equipment_index.start()
+            equipment_index.ready.wait()
+            load = time.perf_counter() - started
+            index = {name: read_time(read) for name, read in reads.items()}
+        finally:
+            equipment_index.stop()
+            db.session.remove()
+            db.drop_all()
+
+    print(f"{VESSELS * EQUIPMENTS_PER_VESSEL} equipments, loaded in {load:.2f}s")
+    for name in reads:
+        print(
+            f"{name + ':':20} database {database[name] * 1000:8.3f} ms, "
+            f"index {index[name] * 1000:8.3f} ms, "
+            f"{database[name] / index[name]:6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
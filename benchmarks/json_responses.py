@@ -0,0 +1,88 @@
+"""Compare the CPU time spent building a 10k equipments response by
+hydrating ORM objects and calling jsonify (how the read endpoints used to
+work) with the column projection and json_response used now.
+
+Creates and drops the tables of the test database, like the tests do:
+python benchmarks/json_responses.py
+"""
+import os
+import sys
+import time
+
+from flask import jsonify
+from sqlalchemy import text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.app import create_app
+from apis.models.equipment import equipment
+from apis.models.model import db
+from apis.services.equipments import equipmentService
+
+ROWS = 10000
+ROUNDS = 20
+VESSEL_CODE = "BENCH"
+
+
+def orm_jsonify(vessel_id):
+    equipments = equipment.query.filter_by(active=True, vessel_id=vessel_id).all()
+    list_equipments = []
+    for eq in equipments:
+        list_equipments.append(
+            {
+                "id": eq.id,
+                "name": eq.name,
+                "code": eq.code,
+                "location": eq.location,
+                "active": eq.active,
+            }
+        )
+    return jsonify(list_equipments).get_data()
+
+
+def projection_json_response(vessel_id):
+    return equipmentService.active_equipment(VESSEL_CODE).get_data()
+
+
+def cpu_time(build_response, vessel_id):
+    build_response(vessel_id)
+    start = time.process_time()
+    for _ in range(ROUNDS):
+        db.session.remove()
+        build_response(vessel_id)
+    return (time.process_time() - start) / ROUNDS
+
+
+def main():
+    app = create_app(test_config=True)
+    with app.test_request_context():
+        db.create_all()
+        vessel_id = db.session.execute(
+            text("INSERT INTO vessels (code) VALUES (:code) RETURNING id"),
+            {"code": VESSEL_CODE},
+        ).scalar()
+        db.session.execute(
+            text(
+                "INSERT INTO equipments (vessel_id, name, code, location, active) "
+                "SELECT :vessel_id, 'compressor', 'B' || to_hex(n), 'brazil', true "
+                "FROM generate_series(1, :rows) AS n"
+            ),
+            {"vessel_id": vessel_id, "rows": ROWS},
+        )
+        db.session.commit()
+
+        try:
+            before = cpu_time(orm_jsonify, vessel_id)
+            after = cpu_time(projection_json_response, vessel_id)
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+    print(f"{ROWS} rows, CPU time per response")
+    print(f"orm + jsonify:               {before * 1000:8.2f} ms")
+    print(f"projection + json_response:  {after * 1000:8.2f} ms")
+    print(f"speedup:                     {before / after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
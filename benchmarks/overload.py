@@ -0,0 +1,157 @@
+"""Overload /equipment/active_equipments with 10 times the clients that the
+connection pool can serve, with and without admission control, and compare
+the latency of the admitted requests and the share of shed ones.
+
+The server is wsgi.py with a pool of 4 connections and no response cache.
+Creates and drops the tables of the test database, like the tests do:
+python benchmarks/overload.py
+"""
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
+
+from sqlalchemy import text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.app import create_app
+from apis.models.model import db
+from config import TestConfig
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PORT = 5097
+URL = f"http://127.0.0.1:{PORT}/equipment/active_equipments?vessel_code=BENCH"
+ROWS = 2000
+POOL_SIZE = 4
+PROCESSES = 4
+DURATION = 10
+
+SERVER_ENV = {
+    "PORT": str(PORT),
+    "PGDATABASE": TestConfig.pgdb,
+    "RESPONSE_CACHE_BACKEND": "none",
+    "SWAGGER_MODE": "disabled",
+    "JOB_WORKERS": "0",
+    "WEB_WORKERS": "1",
+    "WEB_THREADS": str(POOL_SIZE),
+    "DB_MAX_CONNECTIONS": str(POOL_SIZE + 10),
+    "DB_RESERVED_CONNECTIONS": "10",
+}
+
+
+def request_once():
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(URL, timeout=60) as result:
+            result.read()
+            status = result.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+        retry_after = float(error.headers.get("Retry-After", 0))
+        return status, time.perf_counter() - started, retry_after
+    return status, time.perf_counter() - started, 0
+
+
+def client_process(args):
+    threads, deadline = args
+
+    def loop(_):
+        results = []
+        while time.perf_counter() < deadline:
+            status, latency, retry_after = request_once()
+            results.append((status, latency))
+            time.sleep(retry_after)
+        return results
+
+    with ThreadPoolExecutor(threads) as executor:
+        return [
+            result
+            for thread_results in executor.map(loop, range(threads))
+            for result in thread_results
+        ]
+
+
+def measure(clients):
+    deadline = time.perf_counter() + DURATION
+    with Pool(PROCESSES) as pool:
+        results = [
+            result
+            for process_results in pool.map(
+                client_process, [(clients // PROCESSES, deadline)] * PROCESSES
+            )
+            for result in process_results
+        ]
+    admitted = sorted(latency for status, latency in results if status == 200)
+    shed = sum(1 for status, _ in results if status == 503)
+    failed = len(results) - len(admitted) - shed
+    return admitted, shed, failed
+
+
+def run_server(admission_control, clients):
+    env = dict(os.environ, ADMISSION_CONTROL=admission_control, **SERVER_ENV)
+    server = subprocess.Popen(
+        [sys.executable, "wsgi.py"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                request_once()
+                break
+            except OSError:
+                time.sleep(0.05)
+        return measure(clients)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def report(name, admitted, shed, failed):
+    total = len(admitted) + shed + failed
+    p50 = admitted[len(admitted) // 2] * 1000 if admitted else 0
+    p99 = admitted[int(len(admitted) * 0.99)] * 1000 if admitted else 0
+    print(
+        f"{name:32} {len(admitted) / DURATION:6.0f} ok/s  p50 {p50:7.1f}ms  "
+        f"p99 {p99:7.1f}ms  shed {shed / max(total, 1):4.0%}  errors {failed}"
+    )
+
+
+def main():
+    app = create_app(test_config=True)
+    with app.app_context():
+        db.create_all()
+        vessel_id = db.session.execute(
+            text("INSERT INTO vessels (code) VALUES ('BENCH') RETURNING id")
+        ).scalar()
+        db.session.execute(
+            text(
+                "INSERT INTO equipments (vessel_id, name, code, location, active) "
+                "SELECT :vessel_id, 'compressor', 'B' || to_hex(n), 'brazil', true "
+                "FROM generate_series(1, :rows) AS n"
+            ),
+            {"vessel_id": vessel_id, "rows": ROWS},
+        )
+        db.session.commit()
+
+        try:
+            report(f"{POOL_SIZE} clients", *run_server("false", POOL_SIZE))
+            for admission_control in ["false", "true"]:
+                report(
+                    f"{POOL_SIZE * 10} clients, admission {admission_control}",
+                    *run_server(admission_control, POOL_SIZE * 10),
+                )
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Compare the requests per second of the development server started by
+start.sh (flask run with FLASK_DEBUG=1) with gunicorn and ProductionConfig
+(start_production.sh) on /equipment/active_equipments, with concurrent
+clients and the response cache disabled so every request reads the
+database.
+
+Creates and drops the tables of the test database, like the tests do:
+python benchmarks/serving_throughput.py
+"""
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from multiprocessing import Pool
+
+from sqlalchemy import text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.app import create_app
+from apis.models.model import db
+from config import ProductionConfig, TestConfig
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PORT = 5098
+URL = f"http://127.0.0.1:{PORT}/equipment/active_equipments?vessel_code=BENCH"
+ROWS = 100
+CLIENTS = 8
+DURATION = 10
+
+SERVERS = {
+    "flask run (debug)": (
+        [sys.executable, "-m", "flask", "run", "-p", str(PORT)],
+        {"FLASK_APP": "manage.py", "FLASK_DEBUG": "1"},
+    ),
+    f"gunicorn {ProductionConfig.WEB_WORKERS}x{ProductionConfig.WEB_THREADS}": (
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        {"BIND": f"127.0.0.1:{PORT}", "SWAGGER_MODE": "disabled"},
+    ),
+}
+
+
+def client(deadline):
+    latencies = []
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        with urllib.request.urlopen(URL) as result:
+            result.read()
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def wait_until_ready(server):
+    while True:
+        try:
+            with urllib.request.urlopen(URL):
+                return
+        except OSError:
+            if server.poll() is not None:
+                raise RuntimeError("The server exited before answering")
+            time.sleep(0.05)
+
+
+def measure(command, env):
+    env = dict(
+        os.environ,
+        PGDATABASE=TestConfig.pgdb,
+        RESPONSE_CACHE_BACKEND="none",
+        **env,
+    )
+    server = subprocess.Popen(
+        command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(server)
+        deadline = time.perf_counter() + DURATION
+        with Pool(CLIENTS) as pool:
+            latencies = sorted(
+                latency
+                for result in pool.map(client, [deadline] * CLIENTS)
+                for latency in result
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+    return (
+        len(latencies) / DURATION,
+        latencies[len(latencies) // 2],
+        latencies[int(len(latencies) * 0.99)],
+    )
+
+
+def main():
+    app = create_app(test_config=True)
+    with app.app_context():
+        db.create_all()
+        vessel_id = db.session.execute(
+            text("INSERT INTO vessels (code) VALUES ('BENCH') RETURNING id")
+        ).scalar()
+        db.session.execute(
+            text(
+                "INSERT INTO equipments (vessel_id, name, code, location, active) "
+                "SELECT :vessel_id, 'compressor', 'B' || to_hex(n), 'brazil', true "
+                "FROM generate_series(1, :rows) AS n"
+            ),
+            {"vessel_id": vessel_id, "rows": ROWS},
+        )
+        db.session.commit()
+
+        try:
+            print(
+                f"{CLIENTS} clients, {ROWS} equipments per response, "
+                f"{os.cpu_count()} cpus"
+            )
+            for name, (command, env) in SERVERS.items():
+                throughput, p50, p99 = measure(command, env)
+                print(
+                    f"{name:18} {throughput:8.0f} req/s   "
+                    f"p50 {p50 * 1000:6.1f}ms   p99 {p99 * 1000:6.1f}ms"
+                )
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
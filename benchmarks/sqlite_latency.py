@@ -0,0 +1,103 @@
+"""Compare the latency of the reads of the api on a local SQLite file with
+the same reads on postgres, over 100 vessels of 100 equipments each: a
+single statement looking up a vessel, and the active_equipments and
+list_equipments reads of the services, without the response cache.
+
+The postgres database is the test one, at PGHOST, whose tables are created
+and dropped like the tests do. With a remote postgres every statement also
+waits for the round trip to it:
+python benchmarks/sqlite_latency.py
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import insert, text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import config
+from apis.app import create_app
+from apis.models.equipment import equipment
+from apis.models.model import db
+from apis.models.vessel import vessel
+from apis.services.equipments import equipmentService
+
+VESSELS = 100
+EQUIPMENTS_PER_VESSEL = 100
+ROUNDS = 500
+
+LOOKUP_VESSEL = text("SELECT id FROM vessels WHERE code = :code")
+
+
+def latencies(read):
+    read()
+    times = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        read()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.99)]
+
+
+def measure(uri):
+    config.TestConfig.SQLALCHEMY_DATABASE_URI = uri
+    app = create_app(test_config=True)
+    with app.test_request_context():
+        db.create_all()
+        db.session.execute(
+            insert(vessel), [{"code": f"MV{n}"} for n in range(VESSELS)]
+        )
+        db.session.execute(
+            insert(equipment),
+            [
+                {
+                    "vessel_id": n % VESSELS + 1,
+                    "name": f"equipment{n % 500}",
+                    "code": f"{n:08X}",
+                    "location": "brazil",
+                    "active": n % 7 != 0,
+                }
+                for n in range(VESSELS * EQUIPMENTS_PER_VESSEL)
+            ],
+        )
+        db.session.commit()
+
+        reads = {
+            "vessel lookup": lambda: db.session.execute(
+                LOOKUP_VESSEL, {"code": "MV1"}
+            ).scalar(),
+            "active_equipments": lambda: equipmentService.active_equipment("MV1"),
+            "list_equipments": lambda: equipmentService.list_equipment_by_name(
+                "equipment1"
+            ),
+        }
+        try:
+            return {name: latencies(read) for name, read in reads.items()}
+        finally:
+            db.session.remove()
+            db.drop_all()
+            db.engine.dispose()
+
+
+def main():
+    postgres_uri = config.TestConfig.SQLALCHEMY_DATABASE_URI
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite = measure(f"sqlite:///{os.path.join(directory, 'vessels.db')}")
+    postgres = measure(postgres_uri)
+
+    for name in sqlite:
+        print(
+            f"{name + ':':20} sqlite p50 {sqlite[name][0] * 1000:7.3f} ms "
+            f"p99 {sqlite[name][1] * 1000:7.3f} ms, "
+            f"postgres p50 {postgres[name][0] * 1000:7.3f} ms "
+            f"p99 {postgres[name][1] * 1000:7.3f} ms, "
+            f"{postgres[name][0] / sqlite[name][0]:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
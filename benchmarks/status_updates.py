@@ -0,0 +1,88 @@
+"""Compare 500 concurrent single code PUT /equipment/update_equipment_status
+requests applied one transaction each with the same requests coalesced by
+STATUS_UPDATE_WINDOW_MS into group commits.
+
+Creates and drops the tables of the test database, like the tests do:
+python benchmarks/status_updates.py
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from sqlalchemy import text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.app import create_app
+from apis.models.model import db
+from apis.services.equipments import status_update_coalescer
+
+REQUESTS = 500
+WINDOWS_MS = [0, 2, 5, 10]
+
+
+def reset_equipments(app):
+    with app.app_context():
+        db.session.execute(text("UPDATE equipments SET active = true"))
+        db.session.commit()
+
+
+def run_updates(app, window_ms):
+    status_update_coalescer.configure(window_ms / 1000, 1000)
+    barrier = Barrier(REQUESTS)
+
+    def update(n):
+        client = app.test_client()
+        barrier.wait()
+        started = time.perf_counter()
+        result = client.put(
+            "/equipment/update_equipment_status", json={"code": f"S{n:07d}"}
+        )
+        assert result.status_code == 201, result.get_json()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(REQUESTS) as executor:
+        latencies = sorted(executor.map(update, range(REQUESTS)))
+    elapsed = time.perf_counter() - started
+    return elapsed, latencies, status_update_coalescer.batches
+
+
+def main():
+    app = create_app(test_config=True)
+    app.config["SQL_INSTRUMENTATION"] = False
+    with app.app_context():
+        db.create_all()
+        db.session.execute(
+            text(
+                "INSERT INTO vessels (code) VALUES ('BENCH');"
+                "INSERT INTO equipments (vessel_id, name, code, location, active) "
+                "SELECT (SELECT id FROM vessels), 'compressor', "
+                "'S' || lpad(n::text, 7, '0'), 'brazil', true "
+                "FROM generate_series(0, :rows - 1) AS n"
+            ),
+            {"rows": REQUESTS},
+        )
+        db.session.commit()
+
+    try:
+        print(f"{REQUESTS} concurrent single code updates")
+        for window_ms in WINDOWS_MS:
+            reset_equipments(app)
+            elapsed, latencies, batches = run_updates(app, window_ms)
+            print(
+                f"window {window_ms:>2}ms: {REQUESTS / elapsed:7.0f} updates/s  "
+                f"p50 {latencies[REQUESTS // 2] * 1000:7.1f}ms  "
+                f"p99 {latencies[int(REQUESTS * 0.99)] * 1000:7.1f}ms  "
+                f"{batches or REQUESTS} transactions"
+            )
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Measure how much the equipment summary triggers slow down concurrent
+writers which all change the same vessel and location: 64 connections
+which each insert equipments (commissioning) or change the status of one
+(shutdowns) in a transaction of their own, with the summary triggers and
+with them dropped. The writers use psycopg2 directly, so the time is the
+one of the database rather than of the Python threads.
+
+Creates and drops the tables of the test database, like the tests do:
+python benchmarks/summary_contention.py
+"""
+import os
+import sys
+import time
+from threading import Barrier, Thread
+
+import psycopg2
+from sqlalchemy import text
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.app import create_app
+from apis.models.model import db
+
+WRITERS = 64
+TRANSACTIONS = 100
+
+DROP_SUMMARY_TRIGGERS = text(
+    "DROP TRIGGER equipment_summary_insert ON equipments;"
+    "DROP TRIGGER equipment_summary_update ON equipments;"
+    "DROP TRIGGER equipment_summary_delete ON equipments"
+)
+
+INSERT = """
+    INSERT INTO equipments (vessel_id, name, code, location, active)
+    VALUES ((SELECT id FROM vessels), 'compressor', %s, 'brazil', true)
+"""
+UPDATE = "UPDATE equipments SET active = NOT active WHERE code = %s"
+
+
+def transactions_per_second(connect_args, statement, code):
+    barrier = Barrier(WRITERS + 1)
+
+    def write(writer):
+        connection = psycopg2.connect(**connect_args)
+        with connection.cursor() as cursor:
+            barrier.wait()
+            for n in range(TRANSACTIONS):
+                cursor.execute(statement, (code(writer, n),))
+                connection.commit()
+        connection.close()
+
+    threads = [Thread(target=write, args=(writer,)) for writer in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return WRITERS * TRANSACTIONS / (time.perf_counter() - started)
+
+
+def main():
+    app = create_app(test_config=True)
+    with app.app_context():
+        connect_args = db.engine.url.translate_connect_args(
+            username="user", database="dbname"
+        )
+        db.create_all()
+        db.session.execute(text("INSERT INTO vessels (code) VALUES ('BENCH')"))
+        db.session.commit()
+
+    try:
+        for variant, triggers in enumerate(["with", "without"]):
+            if triggers == "without":
+                with app.app_context():
+                    db.session.execute(DROP_SUMMARY_TRIGGERS)
+                    db.session.commit()
+            inserts = transactions_per_second(
+                connect_args, INSERT, lambda writer, n: f"{variant}{writer:02d}{n:05d}"
+            )
+            # Each writer changes the status of its first equipment back and
+            # forth.
+            updates = transactions_per_second(
+                connect_args, UPDATE, lambda writer, n: f"{variant}{writer:02d}00000"
+            )
+            print(
+                f"{WRITERS} writers {triggers} the summary triggers: "
+                f"{inserts:6.0f} inserts/s, {updates:6.0f} status updates/s"
+            )
+    finally:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,23 @@ import os
 basedir = os.path.abspath(os.path.dirname(__file__))
 
 
+def pool_options(
+    workers, threads, max_connections, reserved_connections, unpooled=0
+):
+    """Size the connection pool of each worker so all the workers together
+    stay under the max_connections of postgres, leaving
+    reserved_connections for migrations, psql and other clients. unpooled
+    is the number of connections each worker opens outside of its pool."""
+    per_worker = (max_connections - reserved_connections) // workers - unpooled
+    if per_worker < 1:
+        raise ValueError(
+            f"{workers} workers cannot share {max_connections} connections "
+            f"with {reserved_connections} reserved"
+        )
+    pool_size = min(threads, per_worker)
+    return {"pool_size": pool_size, "max_overflow": per_worker - pool_size}
+
+
 class RunConfig(object):
     DEBUG = True
     pguser = os.environ.get("PGUSER", "postgres")
@@ -10,16 +27,90 @@ class RunConfig(object):
     pghost = os.environ.get("PGHOST", "db")
     pgport = os.environ.get("PGPORT", "5432")
     pgdb = os.environ.get("PGDATABASE", "vessels_db")
-    SQLALCHEMY_DATABASE_URI = f"postgresql://{pguser}:{pgpass}@{pghost}:{pgport}/{pgdb}"
+    # A SQLite database is used instead of postgres with e.g.
+    # DATABASE_URI=sqlite:////data/vessels.db, or sqlite:// in memory.
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        "DATABASE_URI", f"postgresql://{pguser}:{pgpass}@{pghost}:{pgport}/{pgdb}"
+    )
+    SQLITE_BUSY_TIMEOUT = float(os.environ.get("SQLITE_BUSY_TIMEOUT", "5"))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    JSON_BACKEND = os.environ.get("JSON_BACKEND", "auto")
+    SQL_INSTRUMENTATION = os.environ.get("SQL_INSTRUMENTATION", "false") == "true"
+    SQLALCHEMY_REPLICA_URIS = [
+        uri for uri in os.environ.get("REPLICA_DATABASE_URIS", "").split(",") if uri
+    ]
+    REPLICA_MAX_LAG_SECONDS = float(os.environ.get("REPLICA_MAX_LAG_SECONDS", "30"))
+    REPLICA_CHECK_INTERVAL = float(os.environ.get("REPLICA_CHECK_INTERVAL", "10"))
+    REPLICA_CONNECT_TIMEOUT = int(os.environ.get("REPLICA_CONNECT_TIMEOUT", "2"))
+    VESSEL_CACHE_SIZE = int(os.environ.get("VESSEL_CACHE_SIZE", "1024"))
+    VESSEL_CACHE_TTL = int(os.environ.get("VESSEL_CACHE_TTL", "300"))
+    RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_REDIS_URL = os.environ.get("RESPONSE_CACHE_REDIS_URL")
+    RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "1024"))
+    RESPONSE_CACHE_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "300"))
+    STATUS_UPDATE_WINDOW_MS = float(os.environ.get("STATUS_UPDATE_WINDOW_MS", "0"))
+    STATUS_UPDATE_MAX_CODES = int(os.environ.get("STATUS_UPDATE_MAX_CODES", "1000"))
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+    JOB_CHUNK_SIZE = int(os.environ.get("JOB_CHUNK_SIZE", "1000"))
+    JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1"))
+    JOB_STALE_SECONDS = int(os.environ.get("JOB_STALE_SECONDS", "60"))
+    SUMMARY_MAX_DELTAS = int(os.environ.get("SUMMARY_MAX_DELTAS", "1000"))
+    EQUIPMENT_INDEX = os.environ.get("EQUIPMENT_INDEX", "false") == "true"
+    ADMISSION_CONTROL = os.environ.get("ADMISSION_CONTROL", "true") == "true"
+    ADMISSION_MAX_READS = int(os.environ.get("ADMISSION_MAX_READS", "0"))
+    ADMISSION_MAX_POOL_WAIT_MS = float(
+        os.environ.get("ADMISSION_MAX_POOL_WAIT_MS", "100")
+    )
+    ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", "1"))
+    SWAGGER_MODE = os.environ.get("SWAGGER_MODE", "dynamic")
+    SWAGGER_SPEC_PATH = os.environ.get(
+        "SWAGGER_SPEC_PATH", os.path.join(basedir, "apispec.json")
+    )
 
 
-class TestConfig(object):
-    DEBUG = True
-    pguser = os.environ.get("PGUSER", "postgres")
-    pgpass = os.environ.get("PGPASSWORD", "postgres")
-    pghost = os.environ.get("PGHOST", "db")
-    pgport = os.environ.get("PGPORT", "5432")
+class TestConfig(RunConfig):
     pgdb = os.environ.get("PGDATABASETEST", "vessels_db_test")
-    SQLALCHEMY_DATABASE_URI = f"postgresql://{pguser}:{pgpass}@{pghost}:{pgport}/{pgdb}"
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        "TEST_DATABASE_URI",
+        f"postgresql://{RunConfig.pguser}:{RunConfig.pgpass}"
+        f"@{RunConfig.pghost}:{RunConfig.pgport}/{pgdb}",
+    )
+    SQL_INSTRUMENTATION = os.environ.get("SQL_INSTRUMENTATION", "true") == "true"
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "0"))
+
+
+class ProductionConfig(RunConfig):
+    DEBUG = False
+    SWAGGER_MODE = os.environ.get("SWAGGER_MODE", "static")
+    # The memory backend is only correct with a single worker.
+    RESPONSE_CACHE_BACKEND = os.environ.get(
+        "RESPONSE_CACHE_BACKEND",
+        "redis" if RunConfig.RESPONSE_CACHE_REDIS_URL else "none",
+    )
+    WEB_THREADS = int(os.environ.get("WEB_THREADS", "4"))
+    DB_MAX_CONNECTIONS = int(os.environ.get("DB_MAX_CONNECTIONS", "100"))
+    DB_RESERVED_CONNECTIONS = int(os.environ.get("DB_RESERVED_CONNECTIONS", "10"))
+    # The thread of the equipment index refreshes with a connection of the
+    # pool and listens with one of its own.
+    INDEX_CONNECTIONS = 1 if RunConfig.EQUIPMENT_INDEX else 0
+    # By default no more workers than can each have a connection per thread.
+    WEB_WORKERS = int(
+        os.environ.get(
+            "WEB_WORKERS",
+            max(
+                1,
+                min(
+                    (os.cpu_count() or 1) * 2 + 1,
+                    (DB_MAX_CONNECTIONS - DB_RESERVED_CONNECTIONS)
+                    // (WEB_THREADS + RunConfig.JOB_WORKERS + 2 * INDEX_CONNECTIONS),
+                ),
+            ),
+        )
+    )
+    # The pool sizes are added by create_app from the settings above, so a
+    # wrong combination only stops the production app, not the import.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": True,
+    }
@@ -0,0 +1,17 @@
+import os
+
+from config import ProductionConfig
+
+# The pools of ProductionConfig are sized from the same number of workers
+# and threads, so every worker together stays under max_connections.
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = ProductionConfig.WEB_WORKERS
+threads = ProductionConfig.WEB_THREADS
+worker_class = "gthread"
+# The app is imported once and forked. create_app opens no database
+# connection, so the workers do not share any.
+preload_app = True
+timeout = int(os.environ.get("WEB_TIMEOUT", "30"))
+graceful_timeout = timeout
+keepalive = 5
+accesslog = "-"
@@ -0,0 +1,112 @@
+"""add equipment summary
+
+Revision ID: 34531792c18d
+Revises: ad4725a747aa
+Create Date: 2026-10-18 13:05:41.220917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '34531792c18d'
+down_revision = 'ad4725a747aa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('equipment_summary',
+    sa.Column('vessel_id', sa.BigInteger(), nullable=False),
+    sa.Column('location', sa.String(length=256), nullable=False),
+    sa.Column('active_count', sa.BigInteger(), nullable=False),
+    sa.Column('inactive_count', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['vessel_id'], ['vessels.id'], ),
+    sa.PrimaryKeyConstraint('vessel_id', 'location')
+    )
+
+    # Blocks the writes until the triggers and the first count are committed
+    # together, so no change is counted twice or missed.
+    op.execute("LOCK TABLE equipments IN SHARE MODE")
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION equipment_summary_apply() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                INSERT INTO equipment_summary AS summary
+                    (vessel_id, location, active_count, inactive_count)
+                SELECT vessel_id, coalesce(location, ''),
+                    -count(*) FILTER (WHERE active),
+                    -count(*) FILTER (WHERE active IS NOT TRUE)
+                FROM old_equipments
+                WHERE vessel_id IS NOT NULL
+                GROUP BY 1, 2
+                ORDER BY 1, 2
+                ON CONFLICT (vessel_id, location) DO UPDATE SET
+                    active_count = summary.active_count + excluded.active_count,
+                    inactive_count = summary.inactive_count + excluded.inactive_count;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                INSERT INTO equipment_summary AS summary
+                    (vessel_id, location, active_count, inactive_count)
+                SELECT vessel_id, coalesce(location, ''),
+                    count(*) FILTER (WHERE active),
+                    count(*) FILTER (WHERE active IS NOT TRUE)
+                FROM new_equipments
+                WHERE vessel_id IS NOT NULL
+                GROUP BY 1, 2
+                ORDER BY 1, 2
+                ON CONFLICT (vessel_id, location) DO UPDATE SET
+                    active_count = summary.active_count + excluded.active_count,
+                    inactive_count = summary.inactive_count + excluded.inactive_count;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER equipment_summary_insert AFTER INSERT ON equipments
+            REFERENCING NEW TABLE AS new_equipments
+            FOR EACH STATEMENT EXECUTE FUNCTION equipment_summary_apply()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER equipment_summary_update AFTER UPDATE ON equipments
+            REFERENCING OLD TABLE AS old_equipments NEW TABLE AS new_equipments
+            FOR EACH STATEMENT EXECUTE FUNCTION equipment_summary_apply()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER equipment_summary_delete AFTER DELETE ON equipments
+            REFERENCING OLD TABLE AS old_equipments
+            FOR EACH STATEMENT EXECUTE FUNCTION equipment_summary_apply()
+        """
+    )
+
+    op.execute(
+        """
+        INSERT INTO equipment_summary
+            (vessel_id, location, active_count, inactive_count)
+        SELECT vessel_id, coalesce(location, ''),
+            count(*) FILTER (WHERE active),
+            count(*) FILTER (WHERE active IS NOT TRUE)
+        FROM equipments
+        WHERE vessel_id IS NOT NULL
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER equipment_summary_delete ON equipments")
+    op.execute("DROP TRIGGER equipment_summary_update ON equipments")
+    op.execute("DROP TRIGGER equipment_summary_insert ON equipments")
+    op.execute("DROP FUNCTION equipment_summary_apply()")
+    op.drop_table('equipment_summary')
@@ -0,0 +1,120 @@
+"""append equipment summary deltas
+
+Revision ID: 3f7a2c9e4d61
+Revises: 9c3e52d1a7b8
+Create Date: 2026-10-18 23:40:12.504113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f7a2c9e4d61'
+down_revision = '9c3e52d1a7b8'
+branch_labels = None
+depends_on = None
+
+
+APPEND_DELTAS = """
+    CREATE OR REPLACE FUNCTION equipment_summary_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO equipment_summary
+                (vessel_id, location, active_count, inactive_count)
+            SELECT vessel_id, coalesce(location, ''),
+                -count(*) FILTER (WHERE active),
+                -count(*) FILTER (WHERE active IS NOT TRUE)
+            FROM old_equipments
+            WHERE vessel_id IS NOT NULL
+            GROUP BY 1, 2;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO equipment_summary
+                (vessel_id, location, active_count, inactive_count)
+            SELECT vessel_id, coalesce(location, ''),
+                count(*) FILTER (WHERE active),
+                count(*) FILTER (WHERE active IS NOT TRUE)
+            FROM new_equipments
+            WHERE vessel_id IS NOT NULL
+            GROUP BY 1, 2;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+"""
+
+UPSERT_COUNTS = """
+    CREATE OR REPLACE FUNCTION equipment_summary_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            INSERT INTO equipment_summary AS summary
+                (vessel_id, location, active_count, inactive_count)
+            SELECT vessel_id, coalesce(location, ''),
+                -count(*) FILTER (WHERE active),
+                -count(*) FILTER (WHERE active IS NOT TRUE)
+            FROM old_equipments
+            WHERE vessel_id IS NOT NULL
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+            ON CONFLICT (vessel_id, location) DO UPDATE SET
+                active_count = summary.active_count + excluded.active_count,
+                inactive_count = summary.inactive_count + excluded.inactive_count;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO equipment_summary AS summary
+                (vessel_id, location, active_count, inactive_count)
+            SELECT vessel_id, coalesce(location, ''),
+                count(*) FILTER (WHERE active),
+                count(*) FILTER (WHERE active IS NOT TRUE)
+            FROM new_equipments
+            WHERE vessel_id IS NOT NULL
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+            ON CONFLICT (vessel_id, location) DO UPDATE SET
+                active_count = summary.active_count + excluded.active_count,
+                inactive_count = summary.inactive_count + excluded.inactive_count;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+"""
+
+
+def upgrade():
+    # The existing rows, one per vessel and location, are the first deltas.
+    op.drop_constraint('equipment_summary_pkey', 'equipment_summary', type_='primary')
+    op.execute("ALTER TABLE equipment_summary ADD COLUMN id BIGSERIAL PRIMARY KEY")
+    op.create_index(
+        'ix_equipment_summary_vessel_id_location',
+        'equipment_summary',
+        ['vessel_id', 'location'],
+    )
+    op.execute(APPEND_DELTAS)
+
+
+def downgrade():
+    # Blocks the writes until the deltas are summed and the triggers upsert
+    # again, so no change is lost.
+    op.execute("LOCK TABLE equipments IN SHARE MODE")
+    op.execute(UPSERT_COUNTS)
+    op.execute(
+        """
+        WITH compacted AS (
+            DELETE FROM equipment_summary
+            RETURNING vessel_id, location, active_count, inactive_count
+        )
+        INSERT INTO equipment_summary
+            (vessel_id, location, active_count, inactive_count)
+        SELECT vessel_id, location, sum(active_count), sum(inactive_count)
+        FROM compacted
+        GROUP BY 1, 2
+        """
+    )
+    op.drop_index('ix_equipment_summary_vessel_id_location', 'equipment_summary')
+    op.drop_column('equipment_summary', 'id')
+    op.create_primary_key(
+        'equipment_summary_pkey', 'equipment_summary', ['vessel_id', 'location']
+    )
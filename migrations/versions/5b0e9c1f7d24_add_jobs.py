@@ -0,0 +1,56 @@
+"""add jobs
+
+Revision ID: 5b0e9c1f7d24
+Revises: cd75e7177f3a
+Create Date: 2026-10-18 17:42:19.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b0e9c1f7d24'
+down_revision = 'cd75e7177f3a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('jobs',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('kind', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=16), server_default='queued', nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('total', sa.BigInteger(), nullable=False),
+    sa.Column('processed', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('failed', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        "ix_jobs_unfinished",
+        "jobs",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+    op.create_table('job_errors',
+    sa.Column('job_id', sa.BigInteger(), nullable=False),
+    sa.Column('item', sa.BigInteger(), nullable=False),
+    sa.Column('code', sa.String(length=256), nullable=True),
+    sa.Column('message', sa.String(length=64), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('job_id', 'item')
+    )
+
+
+def downgrade():
+    op.drop_table('job_errors')
+    op.drop_index("ix_jobs_unfinished", table_name="jobs")
+    op.drop_table('jobs')
@@ -0,0 +1,87 @@
+"""add equipments notify triggers
+
+Revision ID: 9c3e52d1a7b8
+Revises: 5b0e9c1f7d24
+Create Date: 2026-10-18 21:12:36.118024
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e52d1a7b8'
+down_revision = '5b0e9c1f7d24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION equipments_notify() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            vessel_ids text;
+        BEGIN
+            IF TG_OP = 'TRUNCATE' THEN
+                vessel_ids := '*';
+            ELSIF TG_OP = 'INSERT' THEN
+                SELECT string_agg(DISTINCT vessel_id::text, ',') INTO vessel_ids
+                FROM new_equipments;
+            ELSIF TG_OP = 'UPDATE' THEN
+                SELECT string_agg(DISTINCT vessel_id::text, ',') INTO vessel_ids
+                FROM (
+                    SELECT vessel_id FROM old_equipments
+                    UNION SELECT vessel_id FROM new_equipments
+                ) AS changed;
+            ELSE
+                SELECT string_agg(DISTINCT vessel_id::text, ',') INTO vessel_ids
+                FROM old_equipments;
+            END IF;
+            IF length(vessel_ids) > 7000 THEN
+                vessel_ids := '*';
+            END IF;
+            IF vessel_ids IS NOT NULL THEN
+                PERFORM pg_notify('equipments_changed', vessel_ids);
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER equipments_notify_insert AFTER INSERT ON equipments
+            REFERENCING NEW TABLE AS new_equipments
+            FOR EACH STATEMENT EXECUTE FUNCTION equipments_notify()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER equipments_notify_update AFTER UPDATE ON equipments
+            REFERENCING OLD TABLE AS old_equipments NEW TABLE AS new_equipments
+            FOR EACH STATEMENT EXECUTE FUNCTION equipments_notify()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER equipments_notify_delete AFTER DELETE ON equipments
+            REFERENCING OLD TABLE AS old_equipments
+            FOR EACH STATEMENT EXECUTE FUNCTION equipments_notify()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER equipments_notify_truncate AFTER TRUNCATE ON equipments
+            FOR EACH STATEMENT EXECUTE FUNCTION equipments_notify()
+        """
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER equipments_notify_truncate ON equipments")
+    op.execute("DROP TRIGGER equipments_notify_delete ON equipments")
+    op.execute("DROP TRIGGER equipments_notify_update ON equipments")
+    op.execute("DROP TRIGGER equipments_notify_insert ON equipments")
+    op.execute("DROP FUNCTION equipments_notify()")
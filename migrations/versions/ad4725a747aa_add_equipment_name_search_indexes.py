@@ -0,0 +1,62 @@
+"""add equipment name search indexes
+
+Revision ID: ad4725a747aa
+Revises: e6f1df4ea0f1
+Create Date: 2026-10-18 11:42:13.508112
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ad4725a747aa'
+down_revision = 'e6f1df4ea0f1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Like the models, the trigram index is only created when the server
+    # provides pg_trgm, the search then offers no fuzzy mode.
+    trgm = op.get_bind().execute(
+        sa.text(
+            "SELECT EXISTS "
+            "(SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm')"
+        )
+    ).scalar()
+    if trgm:
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_equipments_name_pattern",
+            "equipments",
+            ["name", "id"],
+            unique=False,
+            postgresql_ops={"name": "text_pattern_ops"},
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_equipments_lower_name_pattern",
+            "equipments",
+            [sa.text("lower(name) text_pattern_ops"), "id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        if trgm:
+            op.create_index(
+                "ix_equipments_name_trgm",
+                "equipments",
+                ["name"],
+                unique=False,
+                postgresql_using="gist",
+                postgresql_ops={"name": "gist_trgm_ops"},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_equipments_name_trgm")
+    op.drop_index("ix_equipments_lower_name_pattern", table_name="equipments")
+    op.drop_index("ix_equipments_name_pattern", table_name="equipments")
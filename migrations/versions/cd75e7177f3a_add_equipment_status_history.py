@@ -0,0 +1,127 @@
+"""add equipment status history
+
+Revision ID: cd75e7177f3a
+Revises: 34531792c18d
+Create Date: 2026-10-18 14:21:07.684412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cd75e7177f3a'
+down_revision = '34531792c18d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('equipment_status_history',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('equipment_id', sa.BigInteger(), nullable=False),
+    sa.Column('vessel_id', sa.BigInteger(), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=False),
+    sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('transaction_id', sa.BigInteger(), server_default=sa.text('txid_current()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        "ix_equipment_status_history_equipment_id_changed_at",
+        "equipment_status_history",
+        ["equipment_id", "changed_at", "id"],
+        unique=False,
+        postgresql_include=["active"],
+    )
+    op.create_index(
+        "ix_equipment_status_history_changed_at",
+        "equipment_status_history",
+        ["changed_at"],
+        unique=False,
+        postgresql_using="brin",
+    )
+
+    # Blocks the writes until the triggers and the current status of every
+    # equipment are committed together.
+    op.execute("LOCK TABLE equipments IN SHARE MODE")
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION equipment_status_history_record()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO equipment_status_history
+                    (equipment_id, vessel_id, active)
+                SELECT id, vessel_id, coalesce(active, false)
+                FROM new_equipments
+                WHERE vessel_id IS NOT NULL
+                ORDER BY id;
+            ELSE
+                INSERT INTO equipment_status_history
+                    (equipment_id, vessel_id, active)
+                SELECT new_equipments.id, new_equipments.vessel_id,
+                    coalesce(new_equipments.active, false)
+                FROM new_equipments
+                JOIN old_equipments ON old_equipments.id = new_equipments.id
+                WHERE new_equipments.vessel_id IS NOT NULL
+                    AND new_equipments.active IS DISTINCT FROM old_equipments.active
+                ORDER BY new_equipments.id;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION equipment_status_history_append_only()
+        RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            RAISE EXCEPTION 'equipment_status_history is append only';
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER equipment_status_history_insert AFTER INSERT ON equipments
+            REFERENCING NEW TABLE AS new_equipments
+            FOR EACH STATEMENT EXECUTE FUNCTION equipment_status_history_record()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER equipment_status_history_update AFTER UPDATE ON equipments
+            REFERENCING OLD TABLE AS old_equipments NEW TABLE AS new_equipments
+            FOR EACH STATEMENT EXECUTE FUNCTION equipment_status_history_record()
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER equipment_status_history_append_only
+            BEFORE UPDATE OR DELETE ON equipment_status_history
+            FOR EACH STATEMENT
+            EXECUTE FUNCTION equipment_status_history_append_only()
+        """
+    )
+
+    # The earlier changes are unknown, so the history starts with the status
+    # each equipment has when the migration runs.
+    op.execute(
+        """
+        INSERT INTO equipment_status_history (equipment_id, vessel_id, active)
+        SELECT id, vessel_id, coalesce(active, false)
+        FROM equipments
+        WHERE vessel_id IS NOT NULL
+        ORDER BY id
+        """
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER equipment_status_history_update ON equipments")
+    op.execute("DROP TRIGGER equipment_status_history_insert ON equipments")
+    op.drop_table('equipment_status_history')
+    op.execute("DROP FUNCTION equipment_status_history_append_only()")
+    op.execute("DROP FUNCTION equipment_status_history_record()")
@@ -0,0 +1,50 @@
+"""add equipment indexes
+
+Revision ID: e6f1df4ea0f1
+Revises: ef921147cdb2
+Create Date: 2026-10-18 07:00:59.720401
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f1df4ea0f1'
+down_revision = 'ef921147cdb2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently so the equipments table stays writable meanwhile,
+    # which requires running outside of the migration transaction.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_equipments_active_vessel_id",
+            "equipments",
+            ["vessel_id", "id"],
+            unique=False,
+            postgresql_where=sa.text("active"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f("ix_equipments_name"),
+            "equipments",
+            ["name"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            op.f("ix_equipments_vessel_id"),
+            "equipments",
+            ["vessel_id"],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    op.drop_index(op.f("ix_equipments_vessel_id"), table_name="equipments")
+    op.drop_index(op.f("ix_equipments_name"), table_name="equipments")
+    op.drop_index("ix_equipments_active_vessel_id", table_name="equipments")
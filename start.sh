@@ -26,10 +26,6 @@ fi
 export FLASK_APP="manage.py"
 export FLASK_DEBUG=1
 
-echo db init
-flask db init
-echo db migrate
-flask db migrate
 echo db upgrade
 flask db upgrade
 
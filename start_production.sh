@@ -0,0 +1,15 @@
+#!/usr/bin/env bash
+# Lean entry point for production containers: the dependencies and the
+# swagger spec are built into the image, so a restart only waits for the
+# database, applies the committed migrations and serves the api with
+# gunicorn, see gunicorn.conf.py.
+
+while ! pg_isready -q -h $PGHOST -p $PGPORT -U $PGUSER
+do
+  echo "$(date) - waiting for database to start"
+  sleep 2
+done
+
+FLASK_APP="manage.py" flask db upgrade
+
+exec gunicorn -c gunicorn.conf.py wsgi:app
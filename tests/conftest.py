@@ -0,0 +1,271 @@
+import pytest
+from contextlib import contextmanager
+
+import glob
+import hashlib
+import inspect
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+ROOT = os.path.join(os.path.dirname(__file__), "../")
+TEST_DATABASE = os.environ.get("PGDATABASETEST", "vessels_db_test")
+
+# Each pytest-xdist worker runs against a database of its own, created on
+# its first run, so the workers never see each other's rows or locks.
+if os.environ.get("PYTEST_XDIST_WORKER"):
+    os.environ["PGDATABASETEST"] = "{}_{}".format(
+        TEST_DATABASE, os.environ["PYTEST_XDIST_WORKER"]
+    )
+    if os.environ.get("TEST_DATABASE_URI", "").startswith("sqlite:///"):
+        root, extension = os.path.splitext(os.environ["TEST_DATABASE_URI"])
+        os.environ["TEST_DATABASE_URI"] = "{}_{}{}".format(
+            root, os.environ["PYTEST_XDIST_WORKER"], extension
+        )
+
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+
+import config
+from apis.app import create_app
+from apis.models.model import db
+from apis.services.vessels import vessel_id_cache
+from apis.utils.instrumentation import count_queries
+from apis.utils.response_cache import response_cache
+from config import TestConfig
+
+SQLITE = make_url(TestConfig.SQLALCHEMY_DATABASE_URI).get_backend_name() == "sqlite"
+
+# Stand in for the BEGIN and COMMIT of the requests run inside the
+# transaction of a test, which are not counted either.
+SAVEPOINT_STATEMENTS = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "commits: the test commits for real, e.g. from other threads or "
+        "connections, and the tables are truncated after it",
+    )
+    config.addinivalue_line(
+        "markers",
+        "postgresql: the test covers a feature which needs postgres, it is "
+        "skipped when TEST_DATABASE_URI is a SQLite database",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if not SQLITE:
+        return
+    skip = pytest.mark.skip(reason="needs postgres")
+    for item in items:
+        if item.get_closest_marker("postgresql"):
+            item.add_marker(skip)
+
+
+@contextmanager
+def maintenance_connection(uri):
+    engine = create_engine(
+        make_url(uri).set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+    try:
+        with engine.connect() as connection:
+            yield connection
+    finally:
+        engine.dispose()
+
+
+def database_exists(connection, name):
+    return connection.execute(
+        text("SELECT 1 FROM pg_database WHERE datname = :name"), {"name": name}
+    ).scalar()
+
+
+def create_database(uri):
+    name = make_url(uri).database
+    with maintenance_connection(uri) as connection:
+        if not database_exists(connection, name):
+            connection.execute(text(f'CREATE DATABASE "{name}"'))
+
+
+def create_app_on(uri):
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(config.TestConfig, "SQLALCHEMY_DATABASE_URI", uri)
+        return create_app(test_config=True)
+
+
+def models_digest(load):
+    digest = hashlib.sha1(inspect.getsource(load).encode())
+    for path in sorted(glob.glob(os.path.join(ROOT, "apis/models/*.py"))):
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:12]
+
+
+def truncate_tables():
+    db.session.remove()
+    if SQLITE:
+        # The rowids start again from 1 once a table is empty. The summary
+        # comes after the equipments, whose triggers append to it.
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+    else:
+        tables = ", ".join(table.name for table in db.metadata.sorted_tables)
+        db.session.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+    db.session.commit()
+
+
+def begin_sqlite_transaction(connection):
+    connection.connection.execute("BEGIN")
+
+
+@contextmanager
+def rolled_back(app):
+    """Bind db.session to a connection whose transaction is rolled back at
+    the end of the block. The sessions commit and roll back a SAVEPOINT,
+    which is started again each time it ends."""
+    with app.app_context():
+        connection = db.engine.connect()
+    if SQLITE:
+        # pysqlite only begins a transaction before a write, a SAVEPOINT
+        # outside of one would commit when released, so it is begun here.
+        connection.connection.isolation_level = None
+        event.listen(connection, "begin", begin_sqlite_transaction)
+    transaction = connection.begin()
+    savepoint = connection.begin_nested()
+
+    def restart_savepoint(session, session_transaction):
+        nonlocal savepoint
+        if session.bind is connection and not savepoint.is_active:
+            savepoint = connection.begin_nested()
+
+    session = db.session
+    db.session = db.create_scoped_session({"bind": connection, "binds": {}})
+    event.listen(SignallingSession, "after_transaction_end", restart_savepoint)
+    try:
+        yield
+    finally:
+        event.remove(SignallingSession, "after_transaction_end", restart_savepoint)
+        db.session.remove()
+        db.session = session
+        transaction.rollback()
+        if SQLITE:
+            connection.connection.isolation_level = ""
+        connection.close()
+
+
+@pytest.fixture(scope="session")
+def database():
+    """Create the database of this worker if needed and its tables, once."""
+    if not SQLITE:
+        create_database(TestConfig.SQLALCHEMY_DATABASE_URI)
+    app = create_app(test_config=True)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    yield
+
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture(scope="module")
+def app(database):
+    return create_app(test_config=True)
+
+
+@pytest.fixture(scope="session")
+def loaded_database(database):
+    """Return an app on a database filled by ``load(app)`` which is kept
+    between runs until the models or the loader change, so a large dataset
+    is only loaded once. The tests using it must not commit."""
+
+    def get(name, load):
+        uri = make_url(TestConfig.SQLALCHEMY_DATABASE_URI)
+        prefix = f"{TEST_DATABASE}_{name}_"
+        database_name = prefix + models_digest(load)
+        with maintenance_connection(str(uri)) as connection:
+            # Only one worker builds it, the others wait for it.
+            connection.execute(
+                text("SELECT pg_advisory_lock(hashtext(:name))"), {"name": prefix}
+            )
+            try:
+                if not database_exists(connection, database_name):
+                    stale = connection.execute(
+                        text(
+                            "SELECT datname FROM pg_database "
+                            "WHERE starts_with(datname, :prefix)"
+                        ),
+                        {"prefix": prefix},
+                    ).scalars()
+                    for stale_name in list(stale):
+                        connection.execute(text(f'DROP DATABASE "{stale_name}"'))
+                    building = database_name + "_building"
+                    connection.execute(text(f'CREATE DATABASE "{building}"'))
+                    app = create_app_on(str(uri.set(database=building)))
+                    with app.app_context():
+                        db.create_all()
+                        load(app)
+                        db.session.remove()
+                        db.engine.dispose()
+                    connection.execute(
+                        text(
+                            f'ALTER DATABASE "{building}" '
+                            f'RENAME TO "{database_name}"'
+                        )
+                    )
+            finally:
+                connection.execute(
+                    text("SELECT pg_advisory_unlock(hashtext(:name))"),
+                    {"name": prefix},
+                )
+        return create_app_on(str(uri.set(database=database_name)))
+
+    return get
+
+
+@pytest.fixture(autouse=True)
+def isolated_database(request):
+    """Run each test which uses the database in a transaction rolled back
+    after it, or truncate the tables after the ones marked with commits."""
+    if "database" not in request.fixturenames:
+        yield
+        return
+
+    app = request.getfixturevalue("app")
+    vessel_id_cache.clear()
+    response_cache.configure(app.config)
+    if request.node.get_closest_marker("commits"):
+        try:
+            yield
+        finally:
+            with app.app_context():
+                truncate_tables()
+    else:
+        with rolled_back(app):
+            yield
+
+
+@pytest.fixture
+def max_queries():
+    """Fail the test when the block runs more statements than allowed, e.g.
+    ``with max_queries(2): client.get(...)``."""
+
+    @contextmanager
+    def assert_max_queries(maximum):
+        with count_queries() as statements:
+            yield statements
+        statements[:] = [
+            statement
+            for statement in statements
+            if not statement.startswith(SAVEPOINT_STATEMENTS)
+        ]
+        assert len(statements) <= maximum, "\n\n".join(
+            statement[:200] for statement in statements
+        )
+
+    return assert_max_queries
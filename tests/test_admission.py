@@ -0,0 +1,105 @@
+import pytest
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.models.model import db
+from apis.utils.admission import TimedQueuePool, admission_controller
+
+
+@pytest.fixture(autouse=True)
+def equipments(app):
+    admission_controller.reset()
+    client = app.test_client()
+    client.post("/vessel/insert_vessel", json={"code": "MV102"})
+    client.post(
+        "/equipment/insert_equipment",
+        json={
+            "name": "compressor",
+            "code": "5310B9D7",
+            "location": "brazil",
+            "vessel_code": "MV102",
+        },
+    )
+
+    yield
+
+    admission_controller.reset()
+
+
+def active_equipments(app):
+    return app.test_client().get(
+        "/equipment/active_equipments", query_string={"vessel_code": "MV102"}
+    )
+
+
+def test_ready(app):
+    result = app.test_client().get("/ready")
+
+    assert result.status_code == 200
+    report = result.get_json()
+    assert report["status"] == "ready"
+    assert report["in_flight"] == 1
+    # The connection of the transaction of the test.
+    assert report["pool"]["checked_out"] == 1
+
+
+def test_pool_is_timed(app):
+    with app.app_context():
+        assert isinstance(db.engine.pool, TimedQueuePool)
+
+
+def test_max_reads_defaults_to_the_pool(app):
+    assert admission_controller.max_reads == 15
+
+
+def test_reads_are_admitted(app):
+    result = active_equipments(app)
+
+    assert result.status_code == 200
+    assert admission_controller.stats()["reads_in_flight"] == 0
+    assert admission_controller.stats()["in_flight"] == 0
+
+
+def test_reads_above_the_limit_are_shed(app):
+    admission_controller.reads_in_flight = admission_controller.max_reads
+    try:
+        result = active_equipments(app)
+        write = app.test_client().put(
+            "/equipment/update_equipment_status", json={"code": "5310B9D7"}
+        )
+        ready = app.test_client().get("/ready")
+    finally:
+        admission_controller.reads_in_flight = 0
+
+    assert result.status_code == 503
+    assert result.get_json() == {"message": "OVERLOADED"}
+    assert result.headers["Retry-After"] == "1"
+    assert write.status_code == 201
+    assert ready.status_code == 200
+    assert admission_controller.stats()["shed"] == 1
+
+
+def test_reads_are_shed_while_the_pool_is_slow(app):
+    admission_controller.record_pool_wait(5)
+
+    result = active_equipments(app)
+    ready = app.test_client().get("/ready")
+
+    assert result.status_code == 503
+    assert ready.status_code == 503
+    assert ready.get_json()["status"] == "overloaded"
+    assert ready.get_json()["pool_wait_ms"] > 100
+
+    admission_controller.reset()
+    assert active_equipments(app).status_code == 200
+
+
+def test_pool_wait_decays(app):
+    admission_controller.record_pool_wait(1)
+    admission_controller._pool_wait_at -= 10
+
+    assert admission_controller.pool_wait() < 0.001
+    assert not admission_controller.overloaded()
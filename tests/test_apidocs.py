@@ -0,0 +1,115 @@
+import json
+import subprocess
+
+import pytest
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import config
+from apis.app import create_app
+
+ROOT = os.path.join(os.path.dirname(__file__), "../")
+
+
+@pytest.fixture(scope="module")
+def app():
+    app = create_app(test_config=True)
+
+    yield app
+
+
+@pytest.fixture
+def spec_path(app, tmp_path):
+    path = tmp_path / "apispec.json"
+    result = app.test_cli_runner().invoke(args=["build-apispec", str(path)])
+    assert result.exit_code == 0, result.output
+
+    return path
+
+
+def create_app_with(monkeypatch, **settings):
+    for name, value in settings.items():
+        monkeypatch.setattr(config.TestConfig, name, value)
+    return create_app(test_config=True)
+
+
+def test_dynamic_apispec(app):
+    result = app.test_client().get("/apispec_1.json")
+
+    assert result.status_code == 200
+    assert "/equipment/active_equipments" in result.get_json()["paths"]
+    assert app.test_client().get("/apidocs/").status_code == 200
+
+
+def test_build_apispec(app, spec_path):
+    with open(spec_path) as file:
+        spec = json.load(file)
+
+    assert spec == app.test_client().get("/apispec_1.json").get_json()
+
+
+def test_static_apispec(app, spec_path, monkeypatch):
+    static_app = create_app_with(
+        monkeypatch, SWAGGER_MODE="static", SWAGGER_SPEC_PATH=str(spec_path)
+    )
+    with open(spec_path) as file:
+        spec = json.load(file)
+    spec["info"]["title"] = "Built spec"
+    with open(spec_path, "w") as file:
+        json.dump(spec, file)
+
+    result = static_app.test_client().get("/apispec_1.json")
+
+    assert result.status_code == 200
+    assert result.get_json()["info"]["title"] != "Built spec"
+    assert result.get_json() == app.test_client().get("/apispec_1.json").get_json()
+    assert static_app.test_client().get("/apidocs/").status_code == 200
+
+
+def test_static_apispec_is_not_parsed_from_the_views(spec_path, monkeypatch):
+    with open(spec_path) as file:
+        spec = json.load(file)
+    del spec["paths"]["/vessel/insert_vessel"]
+    with open(spec_path, "w") as file:
+        json.dump(spec, file)
+
+    static_app = create_app_with(
+        monkeypatch, SWAGGER_MODE="static", SWAGGER_SPEC_PATH=str(spec_path)
+    )
+    paths = static_app.test_client().get("/apispec_1.json").get_json()["paths"]
+
+    assert "/vessel/insert_vessel" not in paths
+    assert "/equipment/active_equipments" in paths
+
+
+def test_disabled_apidocs(monkeypatch):
+    disabled_app = create_app_with(monkeypatch, SWAGGER_MODE="disabled")
+
+    assert disabled_app.test_client().get("/apispec_1.json").status_code == 404
+    assert disabled_app.test_client().get("/apidocs/").status_code == 404
+    assert disabled_app.test_client().get("/").status_code == 200
+
+
+def test_unknown_apidocs_mode(monkeypatch):
+    with pytest.raises(ValueError, match="SWAGGER_MODE"):
+        create_app_with(monkeypatch, SWAGGER_MODE="yes")
+
+
+def test_wsgi_app_starts_with_the_built_spec(spec_path):
+    # The time to the first response is measured by benchmarks/cold_start.py.
+    env = dict(os.environ, SWAGGER_MODE="static", SWAGGER_SPEC_PATH=str(spec_path))
+    subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "from wsgi import app; client = app.test_client(); "
+            "assert client.get('/').status_code == 200; "
+            "assert client.get('/apispec_1.json').status_code == 200",
+        ],
+        cwd=ROOT,
+        env=env,
+        check=True,
+    )
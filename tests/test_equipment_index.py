@@ -0,0 +1,157 @@
+import time
+
+import pytest
+from sqlalchemy import text
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.models.model import db
+from apis.services.equipment_index import equipment_index
+from apis.utils.response_cache import response_cache
+
+# The index is loaded and refreshed by its own thread and connections, which
+# only see committed rows.
+pytestmark = [pytest.mark.commits, pytest.mark.postgresql]
+
+
+@pytest.fixture(scope="module")
+def app(app):
+    app.config["RESPONSE_CACHE_BACKEND"] = "none"
+    app.config["EQUIPMENT_INDEX"] = True
+    equipment_index.configure(app)
+
+    yield app
+
+    equipment_index.stop()
+    equipment_index.enabled = False
+
+
+@pytest.fixture(autouse=True)
+def equipments(app):
+    # Waits for the truncation of the previous test to reach the index.
+    equipment_index.start()
+    assert equipment_index.ready.wait(5)
+    wait_until(lambda: equipment_index.stats()["equipments"] == 0)
+
+    client = app.test_client()
+    for vessel_code in ["MV102", "MV101"]:
+        client.post("/vessel/insert_vessel", json={"code": vessel_code})
+    client.post(
+        "/equipment/insert_equipment_batch",
+        json=[
+            equipment_item("5310B9D7", "compressor"),
+            equipment_item("5310B9D8", "pump"),
+            equipment_item("5310B9D9", "compressor", "MV101"),
+        ],
+    )
+    wait_until(lambda: equipment_index.stats()["equipments"] == 3)
+
+
+def equipment_item(code, name, vessel_code="MV102"):
+    return {
+        "name": name,
+        "code": code,
+        "location": "brazil",
+        "vessel_code": vessel_code,
+    }
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def active_codes(app, **params):
+    result = app.test_client().get(
+        "/equipment/active_equipments",
+        query_string={"vessel_code": "MV102", **params},
+    )
+    assert result.status_code == 200
+    return [item["code"] for item in result.get_json()]
+
+
+def test_reads_are_served_from_the_index(app, max_queries):
+    client = app.test_client()
+    active_codes(app)
+    client.get("/equipment/list_equipments?equipment_name=compressor")
+
+    with max_queries(0):
+        assert active_codes(app) == ["5310B9D7", "5310B9D8"]
+        assert active_codes(app, limit=1) == ["5310B9D7"]
+        result = client.get("/equipment/list_equipments?equipment_name=compressor")
+
+    compressors = [
+        (item["vessel_code"], item["equipments_compressor"])
+        for item in result.get_json()
+    ]
+    assert [vessel_code for vessel_code, _ in compressors] == ["MV102", "MV101"]
+    equipment = compressors[0][1][0]
+    assert list(equipment) == ["id", "name", "code", "location", "active"]
+    assert equipment["code"] == "5310B9D7"
+    assert equipment["active"] is True
+    assert compressors[1][1][0]["code"] == "5310B9D9"
+
+
+def test_several_vessels_are_served_from_the_index(app, max_queries):
+    url = "/equipment/active_equipments?vessel_code=MV101&vessel_code=MV102"
+    app.test_client().get(url)
+
+    with max_queries(0):
+        result = app.test_client().get(url)
+
+    assert {
+        vessel_code: [item["code"] for item in equipments]
+        for vessel_code, equipments in result.get_json()["equipments"].items()
+    } == {"MV101": ["5310B9D9"], "MV102": ["5310B9D7", "5310B9D8"]}
+
+
+def test_writes_of_the_process_are_applied_right_away(app):
+    client = app.test_client()
+
+    client.post(
+        "/equipment/insert_equipment", json=equipment_item("5310B9DA", "valve")
+    )
+    assert active_codes(app) == ["5310B9D7", "5310B9D8", "5310B9DA"]
+
+    client.put("/equipment/update_equipment_status", json={"code": ["5310B9D7"]})
+    assert active_codes(app) == ["5310B9D8", "5310B9DA"]
+
+
+def test_changes_of_other_processes_are_notified(app):
+    with app.app_context():
+        db.session.execute(
+            text("UPDATE equipments SET active = false WHERE code = '5310B9D8'")
+        )
+        db.session.commit()
+
+    wait_until(lambda: active_codes(app) == ["5310B9D7"])
+
+
+def test_reads_use_the_database_until_the_index_is_loaded(
+    app, max_queries, monkeypatch
+):
+    equipment_index.stop()
+    monkeypatch.setattr(equipment_index, "enabled", False)
+    active_codes(app)
+
+    with max_queries(1):
+        assert active_codes(app) == ["5310B9D7", "5310B9D8"]
+
+
+def test_cached_responses_are_built_from_the_database(app, monkeypatch):
+    monkeypatch.setitem(app.config, "RESPONSE_CACHE_BACKEND", "memory")
+    response_cache.configure(app.config)
+    # The index is not notified of the batch insert.
+    monkeypatch.setattr(equipment_index, "refresh", lambda vessel_ids=None: None)
+
+    app.test_client().post(
+        "/equipment/insert_equipment_batch",
+        json=[equipment_item("5310B9DA", "valve")],
+    )
+
+    assert active_codes(app) == ["5310B9D7", "5310B9D8", "5310B9DA"]
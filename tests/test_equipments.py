@@ -1,60 +1,96 @@
 import pytest
-from flask_migrate import Migrate
-
-# from sqlalchemy import func, or_
 
+import json
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
 
-from apis.app import create_app
 from apis.models.model import db
 from apis.models.vessel import vessel
 from apis.models.equipment import equipment
+from apis.services.equipments import active_equipments_cache_key
+from apis.services.vessels import vessel_id_cache
+from apis.utils.response_cache import RedisBackend, ResponseCache, response_cache
 
 
-@pytest.fixture(scope="module")
-def app():
-    app = create_app(test_config=True)
-
+@pytest.fixture(autouse=True)
+def vessel_ids(app):
     with app.app_context():
-        db.create_all()
-        Migrate(app, db)
-        vessel_obj1 = vessel(code="MV102")
-        vessel_obj2 = vessel(code="MV101")
-        db.session.add(vessel_obj1)
-        db.session.add(vessel_obj2)
+        db.session.add(vessel(code="MV102"))
+        db.session.add(vessel(code="MV101"))
         db.session.commit()
-
-    yield app
-
-    with app.app_context():
-        db.session.remove()
-        db.drop_all()
+        return dict(db.session.query(vessel.code, vessel.id).all())
+
+
+@pytest.fixture
+def paged_equipments(app):
+    insert_batch(
+        app,
+        [
+            {
+                "vessel_code": "MV101",
+                "code": "A1000003",
+                "location": "brazil",
+                "name": "pump",
+            },
+            *[
+                {
+                    "vessel_code": "MV101",
+                    "code": f"B100000{index}",
+                    "location": "norway",
+                    "name": "valve",
+                }
+                for index in range(3)
+            ],
+        ],
+    )
 
 
-def test_insert_clean_db(app):
-    result = app.test_client().post(
+def insert_equipment(
+    app, code, vessel_code="MV102", location="brazil", name="compressor"
+):
+    return app.test_client().post(
         "/equipment/insert_equipment",
         json={
-            "vessel_code": "MV102",
-            "code": "5310B9D7",
-            "location": "brazil",
-            "name": "compressor",
+            "vessel_code": vessel_code,
+            "code": code,
+            "location": location,
+            "name": name,
         },
     )
-    assert result.get_json().get("message") == "OK"
+
+
+def insert_batch(app, equipments):
+    result = app.test_client().post(
+        "/equipment/insert_equipment_batch", json=equipments
+    )
     assert result.status_code == 201
+
+
+def all_equipments(app):
+    with app.app_context():
+        return db.session.query(equipment).order_by(equipment.id).all()
+
+
+def equipment_ids(app):
     with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 1
-        assert query_results[0][0].vessel_id == 1
-        assert query_results[0][0].code == "5310B9D7"
-        assert query_results[0][0].location == "brazil"
-        assert query_results[0][0].active
-        assert query_results[0][0].name == "compressor"
+        return dict(db.session.query(equipment.code, equipment.id).all())
+
+
+def test_insert_clean_db(app, vessel_ids):
+    result = insert_equipment(app, "5310B9D7")
+
+    assert result.get_json().get("message") == "OK"
+    assert result.status_code == 201
+    query_results = all_equipments(app)
+    assert len(query_results) == 1
+    assert query_results[0].vessel_id == vessel_ids["MV102"]
+    assert query_results[0].code == "5310B9D7"
+    assert query_results[0].location == "brazil"
+    assert query_results[0].active
+    assert query_results[0].name == "compressor"
 
 
 def test_insert_without_vessel_code(app):
@@ -64,10 +100,7 @@ def test_insert_without_vessel_code(app):
     )
     assert result.get_json().get("message") == "MISSING_PARAMETER"
     assert result.status_code == 400
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 1
+    assert len(all_equipments(app)) == 0
 
 
 def test_insert_without_code(app):
@@ -81,10 +114,7 @@ def test_insert_without_code(app):
     )
     assert result.get_json().get("message") == "MISSING_PARAMETER"
     assert result.status_code == 400
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 1
+    assert len(all_equipments(app)) == 0
 
 
 def test_insert_without_location(app):
@@ -98,10 +128,7 @@ def test_insert_without_location(app):
     )
     assert result.get_json().get("message") == "MISSING_PARAMETER"
     assert result.status_code == 400
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 1
+    assert len(all_equipments(app)) == 0
 
 
 def test_insert_without_name(app):
@@ -115,28 +142,15 @@ def test_insert_without_name(app):
     )
     assert result.get_json().get("message") == "MISSING_PARAMETER"
     assert result.status_code == 400
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 1
+    assert len(all_equipments(app)) == 0
 
 
 def test_insert_with_empty_value(app):
-    result = app.test_client().post(
-        "/equipment/insert_equipment",
-        json={
-            "vessel_code": "MV102",
-            "code": "",
-            "location": "brazil",
-            "name": "compressor",
-        },
-    )
+    result = insert_equipment(app, "")
+
     assert result.get_json().get("message") == "MISSING_PARAMETER"
     assert result.status_code == 400
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 1
+    assert len(all_equipments(app)) == 0
 
 
 def test_insert_with_wrong_format(app):
@@ -162,72 +176,44 @@ def test_insert_with_wrong_format(app):
         )
         assert result.get_json().get("message") == "WRONG_FORMAT"
         assert result.status_code == 400
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 1
+    assert len(all_equipments(app)) == 0
 
 
 def test_insert_with_existent_code(app):
-    result = app.test_client().post(
-        "/equipment/insert_equipment",
-        json={
-            "vessel_code": "MV102",
-            "code": "5310B9D7",
-            "location": "brazil",
-            "name": "compressor",
-        },
-    )
+    insert_equipment(app, "5310B9D7")
+
+    result = insert_equipment(app, "5310B9D7")
+
     assert result.get_json().get("message") == "REPEATED_CODE"
     assert result.status_code == 409
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 1
+    assert len(all_equipments(app)) == 1
 
 
 def test_insert_if_vessel_does_not_exist(app):
-    result = app.test_client().post(
-        "/equipment/insert_equipment",
-        json={
-            "vessel_code": "ZD123",
-            "code": "5HJN7N",
-            "location": "brazil",
-            "name": "compressor",
-        },
-    )
+    result = insert_equipment(app, "5HJN7N", vessel_code="ZD123")
+
     assert result.get_json().get("message") == "NO_VESSEL"
     assert result.status_code == 409
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 1
+    assert len(all_equipments(app)) == 0
 
 
 def test_update_status_one_item(app):
+    insert_equipment(app, "5310B9D7")
+
     result = app.test_client().put(
         "/equipment/update_equipment_status",
         json={"code": "5310B9D7"},
     )
     assert result.get_json().get("message") == "OK"
     assert result.status_code == 201
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 1
-        assert query_results[0][0].active is False
+    query_results = all_equipments(app)
+    assert len(query_results) == 1
+    assert query_results[0].active is False
 
 
 def test_update_status_list(app):
-    app.test_client().post(
-        "/equipment/insert_equipment",
-        json={
-            "vessel_code": "MV101",
-            "code": "531dfddf",
-            "location": "china",
-            "name": "compressor",
-        },
-    )
+    insert_equipment(app, "5310B9D7")
+    insert_equipment(app, "531dfddf", vessel_code="MV101", location="china")
 
     result = app.test_client().put(
         "/equipment/update_equipment_status",
@@ -235,28 +221,26 @@ def test_update_status_list(app):
     )
     assert result.get_json().get("message") == "OK"
     assert result.status_code == 201
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 2
-        assert query_results[0][0].active is False
-        assert query_results[1][0].active is False
+    query_results = all_equipments(app)
+    assert len(query_results) == 2
+    assert query_results[0].active is False
+    assert query_results[1].active is False
 
 
 def test_update_if_code_is_not_sent(app):
+    insert_equipment(app, "5310B9D7")
+
     result = app.test_client().put(
         "/equipment/update_equipment_status",
         json={"wrong": "5310B9D7"},
     )
     assert result.get_json().get("message") == "MISSING_PARAMETER"
     assert result.status_code == 400
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 2
+    assert [eq.active for eq in all_equipments(app)] == [True]
 
 
 def test_update_if_parameter_is_empty(app):
+    insert_equipment(app, "5310B9D7")
     scenarios = [
         {"code": ""},
         {"code": []},
@@ -271,13 +255,11 @@ def test_update_if_parameter_is_empty(app):
         assert result.get_json().get("message") == "MISSING_PARAMETER"
         assert result.status_code == 400
 
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 2
+    assert [eq.active for eq in all_equipments(app)] == [True]
 
 
 def test_update_if_format_is_wrong(app):
+    insert_equipment(app, "5310B9D7")
     scenarios = [
         {"code": 123},
         {"code": [123, {}, []]},
@@ -292,13 +274,11 @@ def test_update_if_format_is_wrong(app):
         assert result.get_json().get("message") == "WRONG_FORMAT"
         assert result.status_code == 400
 
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 2
+    assert [eq.active for eq in all_equipments(app)] == [True]
 
 
 def test_update_if_equipment_does_not_exist(app):
+    insert_equipment(app, "5310B9D7")
     scenarios = [
         {"code": "985F4RE"},
         {"code": ["5310B9D7", "985F4RE"]},
@@ -312,10 +292,7 @@ def test_update_if_equipment_does_not_exist(app):
         assert result.get_json().get("message") == "NO_CODE"
         assert result.status_code == 409
 
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 2
+    assert [eq.active for eq in all_equipments(app)] == [True]
 
 
 def test_get_active_equipments_by_vessel(app):
@@ -325,15 +302,8 @@ def test_get_active_equipments_by_vessel(app):
     assert empty_result.get_json() == []
     assert empty_result.status_code == 200
 
-    app.test_client().post(
-        "/equipment/insert_equipment",
-        json={
-            "vessel_code": "MV102",
-            "code": "531df345",
-            "location": "china",
-            "name": "compressor",
-        },
-    )
+    insert_equipment(app, "5310B9D7", vessel_code="MV101")
+    insert_equipment(app, "531df345", location="china")
 
     result = app.test_client().get(
         "/equipment/active_equipments?vessel_code=MV102")
@@ -341,16 +311,12 @@ def test_get_active_equipments_by_vessel(app):
         {
             "active": True,
             "code": "531df345",
-            "id": 3,
+            "id": equipment_ids(app)["531df345"],
             "location": "china",
             "name": "compressor",
         }
     ]
     assert result.status_code == 200
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 3
 
 
 def test_get_active_equipments_without_query_parameter(app):
@@ -363,24 +329,25 @@ def test_get_active_equipments_without_query_parameter(app):
         assert result.get_json().get("message") == "MISSING_PARAMETER"
         assert result.status_code == 400
 
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 3
-
 
 def test_get_active_equipments_if_vessel_does_not_exist(app):
     result = app.test_client().get(
         "/equipment/active_equipments?vessel_code=MV103")
     assert result.get_json().get("message") == "NO_VESSEL"
     assert result.status_code == 409
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 3
 
 
 def test_get_equipments_by_name(app):
+    insert_equipment(app, "5310B9D7")
+    insert_equipment(app, "531dfddf", vessel_code="MV101", location="china")
+    insert_equipment(app, "531df345", location="china")
+    insert_equipment(app, "531df346", name="pump")
+    app.test_client().put(
+        "/equipment/update_equipment_status",
+        json={"code": ["5310B9D7", "531dfddf"]},
+    )
+    ids = equipment_ids(app)
+
     result = app.test_client().get(
         "/equipment/list_equipments?equipment_name=compressor"
     )
@@ -390,14 +357,14 @@ def test_get_equipments_by_name(app):
                 {
                     "active": False,
                     "code": "5310B9D7",
-                    "id": 1,
+                    "id": ids["5310B9D7"],
                     "location": "brazil",
                     "name": "compressor",
                 },
                 {
                     "active": True,
                     "code": "531df345",
-                    "id": 3,
+                    "id": ids["531df345"],
                     "location": "china",
                     "name": "compressor",
                 },
@@ -409,7 +376,7 @@ def test_get_equipments_by_name(app):
                 {
                     "active": False,
                     "code": "531dfddf",
-                    "id": 2,
+                    "id": ids["531dfddf"],
                     "location": "china",
                     "name": "compressor",
                 }
@@ -418,10 +385,6 @@ def test_get_equipments_by_name(app):
         },
     ]
     assert result.status_code == 200
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 3
 
 
 def test_get_equipments_by_name_without_query_parameter(app):
@@ -434,18 +397,410 @@ def test_get_equipments_by_name_without_query_parameter(app):
         assert result.get_json().get("message") == "MISSING_PARAMETER"
         assert result.status_code == 400
 
-    with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 3
-
 
 def test_get_equipments_by_name_if_does_not_exist(app):
+    insert_equipment(app, "5310B9D7")
+
     result = app.test_client().get(
         "/equipment/list_equipments?equipment_name=motor")
     assert result.get_json().get("message") == "NO_EQUIPMENT_NAME"
     assert result.status_code == 409
+
+
+def test_insert_batch(app, vessel_ids):
+    result = app.test_client().post(
+        "/equipment/insert_equipment_batch",
+        json=[
+            {
+                "vessel_code": "MV101",
+                "code": "A1000001",
+                "location": "brazil",
+                "name": "pump",
+            },
+            {
+                "vessel_code": "MV102",
+                "code": "A1000002",
+                "location": "china",
+                "name": "pump",
+            },
+        ],
+    )
+    assert result.get_json() == [
+        {"code": "A1000001", "message": "OK"},
+        {"code": "A1000002", "message": "OK"},
+    ]
+    assert result.status_code == 201
+    query_results = all_equipments(app)
+    assert [eq.code for eq in query_results] == ["A1000001", "A1000002"]
+    assert [eq.vessel_id for eq in query_results] == [
+        vessel_ids["MV101"],
+        vessel_ids["MV102"],
+    ]
+    assert all(eq.active for eq in query_results)
+
+
+def test_insert_batch_reports_each_item(app, vessel_ids):
+    insert_equipment(app, "5310B9D7")
+
+    result = app.test_client().post(
+        "/equipment/insert_equipment_batch",
+        json=[
+            {
+                "vessel_code": "MV101",
+                "code": "A1000003",
+                "location": "brazil",
+                "name": "pump",
+            },
+            {
+                "vessel_code": "MV101",
+                "code": "5310B9D7",
+                "location": "brazil",
+                "name": "pump",
+            },
+            {
+                "vessel_code": "MV102",
+                "code": "A1000003",
+                "location": "brazil",
+                "name": "pump",
+            },
+            {
+                "vessel_code": "ZD123",
+                "code": "A1000004",
+                "location": "brazil",
+                "name": "pump",
+            },
+            {"vessel_code": "MV101", "code": "A1000005", "name": "pump"},
+            {
+                "vessel_code": "MV101",
+                "code": "A1000005JVF",
+                "location": "brazil",
+                "name": "pump",
+            },
+            "A1000006",
+        ],
+    )
+    assert result.get_json() == [
+        {"code": "A1000003", "message": "OK"},
+        {"code": "5310B9D7", "message": "REPEATED_CODE"},
+        {"code": "A1000003", "message": "REPEATED_CODE"},
+        {"code": "A1000004", "message": "NO_VESSEL"},
+        {"code": "A1000005", "message": "MISSING_PARAMETER"},
+        {"code": "A1000005JVF", "message": "WRONG_FORMAT"},
+        {"code": None, "message": "WRONG_FORMAT"},
+    ]
+    assert result.status_code == 207
+    with app.app_context():
+        inserted = db.session.query(equipment).filter_by(code="A1000003").one()
+        assert inserted.vessel_id == vessel_ids["MV101"]
+    assert len(all_equipments(app)) == 2
+
+
+def test_insert_batch_with_wrong_body(app):
+    scenarios = [
+        ({"code": "A1000007"}, "WRONG_FORMAT"),
+        ([], "MISSING_PARAMETER"),
+    ]
+
+    for scenario, message in scenarios:
+        result = app.test_client().post(
+            "/equipment/insert_equipment_batch", json=scenario
+        )
+        assert result.get_json().get("message") == message
+        assert result.status_code == 400
+
+    assert len(all_equipments(app)) == 0
+
+
+def test_update_reports_every_missing_code(app):
+    insert_equipment(app, "A1000001", vessel_code="MV101", name="pump")
+
+    result = app.test_client().put(
+        "/equipment/update_equipment_status",
+        json={"code": ["985F4RE", "A1000001", "985F4RF", "985F4RE"]},
+    )
+    assert result.get_json() == {
+        "message": "NO_CODE",
+        "codes": ["985F4RE", "985F4RF"],
+    }
+    assert result.status_code == 409
+    with app.app_context():
+        not_updated = db.session.query(equipment).filter_by(code="A1000001").one()
+        assert not_updated.active is True
+
+
+def test_update_status_list_with_repeated_codes(app):
+    insert_equipment(app, "A1000001", vessel_code="MV101", name="pump")
+    insert_equipment(app, "A1000002", location="china", name="pump")
+
+    result = app.test_client().put(
+        "/equipment/update_equipment_status",
+        json={"code": ["A1000001", "A1000002", "A1000001"]},
+    )
+    assert result.get_json().get("message") == "OK"
+    assert result.status_code == 201
+    assert [eq.active for eq in all_equipments(app)] == [False, False]
+
+
+def test_get_active_equipments_by_page(app, paged_equipments):
+    insert_equipment(app, "A1000001", vessel_code="MV101", name="pump")
+    app.test_client().put(
+        "/equipment/update_equipment_status", json={"code": "A1000001"}
+    )
+
+    codes = []
+    after = None
+    for expected_page in [["A1000003", "B1000000"], ["B1000001", "B1000002"], []]:
+        url = "/equipment/active_equipments?vessel_code=MV101&limit=2"
+        if after is not None:
+            url += f"&after={after}"
+        result = app.test_client().get(url)
+        assert result.status_code == 200
+        page = [eq["code"] for eq in result.get_json()]
+        assert page == expected_page
+        codes.extend(page)
+        after = result.headers.get("X-Next-Cursor")
+        if page:
+            assert after == str(result.get_json()[-1]["id"])
+
+    assert after is None
+    assert len(codes) == 4
+
+
+def test_get_active_equipments_with_wrong_pagination(app):
+    scenarios = [
+        "/equipment/active_equipments?vessel_code=MV101&limit=0",
+        "/equipment/active_equipments?vessel_code=MV101&limit=-1",
+        "/equipment/active_equipments?vessel_code=MV101&limit=10001",
+        "/equipment/active_equipments?vessel_code=MV101&after=abc",
+    ]
+    for scenario in scenarios:
+        result = app.test_client().get(scenario)
+        assert result.get_json().get("message") == "WRONG_FORMAT"
+        assert result.status_code == 400
+
+
+def test_get_active_equipments_streamed(app, paged_equipments):
+    result = app.test_client().get(
+        "/equipment/active_equipments?vessel_code=MV101&stream=true"
+    )
+    assert result.status_code == 200
+    assert result.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in result.get_data(as_text=True).splitlines()]
+    assert [eq["code"] for eq in lines] == [
+        "A1000003",
+        "B1000000",
+        "B1000001",
+        "B1000002",
+    ]
+    assert all(eq["active"] for eq in lines)
+
+    result = app.test_client().get(
+        "/equipment/active_equipments?vessel_code=MV103&stream=true"
+    )
+    assert result.get_json().get("message") == "NO_VESSEL"
+    assert result.status_code == 409
+
+
+def test_get_equipments_by_name_grouped_by_vessel(app):
+    insert_equipment(app, "A1000001", vessel_code="MV101", name="pump")
+    insert_equipment(app, "A1000002", location="china", name="pump")
+    insert_equipment(app, "A1000003", vessel_code="MV101", name="pump")
+    insert_equipment(app, "5310B9D7")
+
+    result = app.test_client().get("/equipment/list_equipments?equipment_name=pump")
+    assert result.status_code == 200
+    assert [
+        (group["vessel_code"], [eq["code"] for eq in group["equipments_pump"]])
+        for group in result.get_json()
+    ] == [("MV101", ["A1000001", "A1000003"]), ("MV102", ["A1000002"])]
+
+
+def test_get_active_equipments_resolves_vessel_from_cache(app):
+    vessel_id_cache.clear()
+
+    for _ in range(3):
+        result = app.test_client().get(
+            "/equipment/active_equipments?vessel_code=MV101&limit=10"
+        )
+        assert result.status_code == 200
+
+    assert vessel_id_cache.stats() == {"hits": 2, "misses": 1, "size": 1}
+
+
+def test_get_active_equipments_of_several_vessels(
+    app, max_queries, paged_equipments
+):
+    insert_equipment(app, "5310B9D7")
+    app.test_client().put(
+        "/equipment/update_equipment_status", json={"code": ["B1000001"]}
+    )
+    vessel_id_cache.clear()
+
+    with max_queries(2):
+        result = app.test_client().get(
+            "/equipment/active_equipments",
+            query_string=[
+                ("vessel_code", "MV101"),
+                ("vessel_code", "MV999"),
+                ("vessel_code", "MV102"),
+                ("vessel_code", "MV101"),
+            ],
+        )
+
+    assert result.status_code == 200
+    report = result.get_json()
+    assert list(report["equipments"]) == ["MV101", "MV102"]
+    assert [item["code"] for item in report["equipments"]["MV101"]] == [
+        "A1000003",
+        "B1000000",
+        "B1000002",
+    ]
+    assert report["equipments"]["MV102"] == [
+        {
+            "id": equipment_ids(app)["5310B9D7"],
+            "name": "compressor",
+            "code": "5310B9D7",
+            "location": "brazil",
+            "active": True,
+        }
+    ]
+    assert report["unknown_vessels"] == ["MV999"]
+
+
+def test_get_active_equipments_of_several_vessels_with_wrong_params(app):
+    scenarios = [
+        "vessel_code=MV101&vessel_code=MV102&limit=10",
+        "vessel_code=MV101&vessel_code=MV102&stream=true",
+        "&".join(["vessel_code=MV101"] * 101),
+    ]
+    for scenario in scenarios:
+        result = app.test_client().get(f"/equipment/active_equipments?{scenario}")
+        assert result.get_json().get("message") == "WRONG_FORMAT"
+        assert result.status_code == 400
+
+
+def test_get_active_equipments_not_modified(app, max_queries, paged_equipments):
+    url = "/equipment/active_equipments?vessel_code=MV101"
+    result = app.test_client().get(url)
+    etag = result.headers["ETag"]
+    assert result.status_code == 200
+
+    with max_queries(0):
+        result = app.test_client().get(url, headers={"If-None-Match": etag})
+    assert result.status_code == 304
+    assert result.headers["ETag"] == etag
+
+    with max_queries(0):
+        result = app.test_client().get(url)
+    assert result.status_code == 200
+    assert result.headers["ETag"] == etag
+
+    insert_equipment(
+        app, "C1000001", vessel_code="MV101", location="china", name="valve"
+    )
+    result = app.test_client().get(url, headers={"If-None-Match": etag})
+    assert result.status_code == 200
+    assert result.headers["ETag"] != etag
+    assert result.get_json()[-1]["code"] == "C1000001"
+
+
+def test_get_equipments_by_name_not_modified(app, paged_equipments):
+    insert_equipment(
+        app, "C1000001", vessel_code="MV101", location="china", name="valve"
+    )
+    url = "/equipment/list_equipments?equipment_name=valve"
+    result = app.test_client().get(url)
+    etag = result.headers["ETag"]
+
+    result = app.test_client().get(url, headers={"If-None-Match": etag})
+    assert result.status_code == 304
+
+    app.test_client().put(
+        "/equipment/update_equipment_status", json={"code": "C1000001"}
+    )
+    result = app.test_client().get(url, headers={"If-None-Match": etag})
+    assert result.status_code == 200
+    assert result.headers["ETag"] != etag
+    equipments = result.get_json()[0]["equipments_valve"]
+    assert equipments[-1] == {**equipments[-1], "code": "C1000001", "active": False}
+
+    result = app.test_client().get(
+        "/equipment/list_equipments?equipment_name=motor",
+        headers={"If-None-Match": "*"},
+    )
+    assert result.status_code == 409
+    assert "ETag" not in result.headers
+
+
+def insert_without_invalidation(app, code, vessel_id):
+    with app.app_context():
+        db.session.add(
+            equipment(
+                vessel_id=vessel_id,
+                code=code,
+                location="brazil",
+                name="compressor",
+                active=True,
+            )
+        )
+        db.session.commit()
+
+
+def test_response_cache_shared_backend(app, vessel_ids):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeRedis()
+    worker_cache = ResponseCache()
+    worker_cache.backend = RedisBackend(client)
+    local_backend = response_cache.backend
+    response_cache.backend = RedisBackend(client)
+
+    try:
+        key = active_equipments_cache_key("MV102")
+        url = "/equipment/active_equipments?vessel_code=MV102"
+        etag = app.test_client().get(url).headers["ETag"]
+        assert f'"{worker_cache.backend.get_body(f"{key}:0")[0]}"' == etag
+
+        insert_without_invalidation(app, "5310B9D7", vessel_ids["MV102"])
+        worker_cache.invalidate([key])
+        result = app.test_client().get(url, headers={"If-None-Match": etag})
+        assert result.status_code == 200
+        assert result.headers["ETag"] != etag
+    finally:
+        response_cache.backend = local_backend
+
+
+def test_response_cache_catches_up_when_the_body_expires(app, vessel_ids):
+    url = "/equipment/active_equipments?vessel_code=MV102"
+    etag = app.test_client().get(url).headers["ETag"]
+
+    # e.g. the import command run with a memory cache of its own, or psql.
+    insert_without_invalidation(app, "5310B9D7", vessel_ids["MV102"])
+    result = app.test_client().get(url, headers={"If-None-Match": etag})
+    assert result.status_code == 304
+
+    response_cache.backend._bodies.clear()
+    result = app.test_client().get(url, headers={"If-None-Match": etag})
+    assert result.status_code == 200
+    assert result.headers["ETag"] != etag
+    assert [item["code"] for item in result.get_json()] == ["5310B9D7"]
+
+    result = app.test_client().get(
+        url, headers={"If-None-Match": result.headers["ETag"]}
+    )
+    assert result.status_code == 304
+
+
+@pytest.mark.commits
+def test_insert_concurrently(app):
+    def insert(code):
+        result = insert_equipment(app, code, name="turbine")
+        return result.status_code, result.get_json().get("message")
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        same_code = list(executor.map(insert, ["D1000000"] * 16))
+        distinct_codes = list(executor.map(insert, [f"D10000{i:02d}" for i in range(1, 17)]))
+
+    assert sorted(same_code) == [(201, "OK")] + [(409, "REPEATED_CODE")] * 15
+    assert distinct_codes == [(201, "OK")] * 16
     with app.app_context():
-        query = db.session.query(equipment)
-        query_results = db.session.execute(query).all()
-        assert len(query_results) == 3
+        assert db.session.query(equipment).filter_by(name="turbine").count() == 17
@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+
+import pytest
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.models.equipment import equipment
+from apis.models.model import db
+from apis.services import equipments
+
+EQUIPMENTS = [
+    ("compressor", "5310B9D7", "brazil", "MV102"),
+    ("pump", "5310B9D8", "chile", "MV103"),
+    ("valve", "5310B9D9", "brazil", "MV102"),
+]
+
+
+@pytest.fixture(autouse=True)
+def ids(app):
+    client = app.test_client()
+    client.post("/vessel/insert_vessel", json={"code": "MV102"})
+    client.post("/vessel/insert_vessel", json={"code": "MV103"})
+    for name, code, location, vessel_code in EQUIPMENTS:
+        client.post(
+            "/equipment/insert_equipment",
+            json={
+                "name": name,
+                "code": code,
+                "location": location,
+                "vessel_code": vessel_code,
+            },
+        )
+    client.put("/equipment/update_equipment_status", json={"code": "5310B9D9"})
+
+    with app.app_context():
+        return [str(id) for id, in db.session.query(equipment.id).order_by(equipment.id)]
+
+
+def test_export_csv(app, ids, monkeypatch):
+    monkeypatch.setattr(equipments, "EXPORT_BATCH_SIZE", 2)
+
+    result = app.test_client().get("/equipment/export")
+
+    assert result.status_code == 200
+    assert result.is_streamed
+    assert result.mimetype == "text/csv"
+    assert list(csv.reader(io.StringIO(result.get_data(as_text=True)))) == [
+        ["id", "name", "code", "location", "active", "vessel_code"],
+        [ids[0], "compressor", "5310B9D7", "brazil", "True", "MV102"],
+        [ids[1], "pump", "5310B9D8", "chile", "True", "MV103"],
+        [ids[2], "valve", "5310B9D9", "brazil", "False", "MV102"],
+    ]
+
+
+def test_export_ndjson_with_filters(app, ids):
+    result = app.test_client().get(
+        "/equipment/export",
+        query_string={"vessel_code": "MV102", "active": "true"},
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert result.status_code == 200
+    assert result.mimetype == "application/x-ndjson"
+    assert [json.loads(line) for line in result.get_data().splitlines()] == [
+        {
+            "id": int(ids[0]),
+            "name": "compressor",
+            "code": "5310B9D7",
+            "location": "brazil",
+            "active": True,
+            "vessel_code": "MV102",
+        }
+    ]
+
+    result = app.test_client().get("/equipment/export?format=ndjson&active=false")
+    assert [json.loads(line)["code"] for line in result.get_data().splitlines()] == [
+        "5310B9D9"
+    ]
+
+
+def test_export_arrow(app, monkeypatch):
+    pa = pytest.importorskip("pyarrow")
+    monkeypatch.setattr(equipments, "EXPORT_BATCH_SIZE", 2)
+
+    result = app.test_client().get("/equipment/export?format=arrow")
+
+    assert result.status_code == 200
+    assert result.mimetype == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(result.get_data()).read_all()
+    assert table.column_names == [
+        "id",
+        "name",
+        "code",
+        "location",
+        "active",
+        "vessel_code",
+    ]
+    assert table.column("code").to_pylist() == ["5310B9D7", "5310B9D8", "5310B9D9"]
+    assert table.column("active").to_pylist() == [True, True, False]
+
+
+def test_export_empty(app):
+    result = app.test_client().get(
+        "/equipment/export?format=csv&vessel_code=MV103&active=false"
+    )
+
+    assert result.status_code == 200
+    assert result.get_data(as_text=True).splitlines() == [
+        "id,name,code,location,active,vessel_code"
+    ]
+
+
+def test_export_wrong_parameters(app):
+    scenarios = [
+        ("/equipment/export?format=xml", 400, "WRONG_FORMAT"),
+        ("/equipment/export?active=yes", 400, "WRONG_FORMAT"),
+        ("/equipment/export?vessel_code=MV999", 409, "NO_VESSEL"),
+    ]
+
+    for url, status, message in scenarios:
+        result = app.test_client().get(url)
+        assert result.status_code == status
+        assert result.get_json().get("message") == message
@@ -1,29 +1,8 @@
-import pytest
-from flask_migrate import Migrate
-
 import sys
 import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
 
-from apis.app import create_app
-from apis.models.model import db
-
-
-@pytest.fixture(scope="module")
-def app():
-    app = create_app(test_config=True)
-
-    with app.app_context():
-        db.create_all()
-        Migrate(app, db)
-
-    yield app
-
-    with app.app_context():
-        db.session.remove()
-        db.drop_all()
-
 
 def test_heath_check(app):
     result = app.test_client().get("/")
@@ -0,0 +1,161 @@
+import pytest
+from sqlalchemy import func, text
+from sqlalchemy.exc import InternalError
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.models.equipment import equipment
+from apis.models.equipment_status_history import equipment_status_history
+from apis.models.model import db
+
+# The history is stamped with now() and txid_current(), which would be the
+# same for every change inside the transaction of a rolled back test.
+pytestmark = [pytest.mark.commits, pytest.mark.postgresql]
+
+
+@pytest.fixture(autouse=True)
+def vessels(app):
+    app.test_client().post("/vessel/insert_vessel", json={"code": "MV102"})
+
+
+@pytest.fixture
+def inserted(app):
+    insert_equipments(app, ["5310B9D7", "5310B9D8", "5310B9D9"])
+
+
+def insert_equipments(app, codes):
+    app.test_client().post(
+        "/equipment/insert_equipment_batch",
+        json=[
+            {
+                "name": "compressor",
+                "code": code,
+                "location": "brazil",
+                "vessel_code": "MV102",
+            }
+            for code in codes
+        ],
+    )
+
+
+def update_status(app, codes):
+    app.test_client().put("/equipment/update_equipment_status", json={"code": codes})
+
+
+def equipment_ids(app):
+    with app.app_context():
+        return [id for id, in db.session.query(equipment.id).order_by(equipment.id)]
+
+
+def database_now(app):
+    with app.app_context():
+        return db.session.execute(text("SELECT clock_timestamp()")).scalar()
+
+
+def history(app):
+    with app.app_context():
+        return (
+            db.session.query(
+                equipment_status_history.equipment_id,
+                equipment_status_history.active,
+                equipment_status_history.transaction_id,
+            )
+            .order_by(equipment_status_history.id)
+            .all()
+        )
+
+
+def active_codes(app, as_of):
+    result = app.test_client().get(
+        "/equipment/active_equipments",
+        query_string={"vessel_code": "MV102", "as_of": as_of.isoformat()},
+    )
+    assert result.status_code == 200
+    return [item["code"] for item in result.get_json()]
+
+
+def test_history_records_inserts(app):
+    insert_equipments(app, ["5310B9D7", "5310B9D8", "5310B9D9"])
+
+    recorded = history(app)
+    assert [(row.equipment_id, row.active) for row in recorded] == [
+        (equipment_id, True) for equipment_id in equipment_ids(app)
+    ]
+    assert len({row.transaction_id for row in recorded}) == 1
+
+
+def test_history_records_status_changes(app, inserted):
+    update_status(app, ["5310B9D7", "5310B9D8"])
+    update_status(app, ["5310B9D7"])
+
+    recorded = history(app)[3:]
+    assert [(row.equipment_id, row.active) for row in recorded] == [
+        (equipment_id, False) for equipment_id in equipment_ids(app)[:2]
+    ]
+    assert recorded[0].transaction_id == recorded[1].transaction_id
+
+
+def test_active_equipments_as_of(app, inserted):
+    update_status(app, ["5310B9D7", "5310B9D8"])
+    before_insert = database_now(app)
+    app.test_client().post(
+        "/equipment/insert_equipment",
+        json={
+            "name": "pump",
+            "code": "5310B9DA",
+            "location": "brazil",
+            "vessel_code": "MV102",
+        },
+    )
+    before_update = database_now(app)
+    update_status(app, ["5310B9D9"])
+    after_update = database_now(app)
+
+    assert active_codes(app, before_insert) == ["5310B9D9"]
+    assert active_codes(app, before_update) == ["5310B9D9", "5310B9DA"]
+    assert active_codes(app, after_update) == ["5310B9DA"]
+
+    with app.app_context():
+        first_change = db.session.query(
+            func.min(equipment_status_history.changed_at)
+        ).scalar()
+    assert active_codes(app, first_change.replace(year=2000)) == []
+
+
+def test_active_equipments_as_of_with_pagination(app, inserted):
+    insert_equipments(app, ["5310B9DA"])
+    update_status(app, ["5310B9D7", "5310B9D8", "5310B9D9"])
+
+    result = app.test_client().get(
+        "/equipment/active_equipments",
+        query_string={
+            "vessel_code": "MV102",
+            "as_of": database_now(app).isoformat(),
+            "limit": 1,
+        },
+    )
+
+    assert [item["code"] for item in result.get_json()] == ["5310B9DA"]
+    assert result.headers["X-Next-Cursor"] == str(equipment_ids(app)[-1])
+
+
+def test_active_equipments_as_of_with_wrong_format(app):
+    for as_of in ["yesterday", "2026-13-01T00:00:00", ""]:
+        result = app.test_client().get(
+            "/equipment/active_equipments",
+            query_string={"vessel_code": "MV102", "as_of": as_of},
+        )
+        assert result.status_code == 400
+        assert result.get_json().get("message") == "WRONG_FORMAT"
+
+
+def test_history_is_append_only(app, inserted):
+    with app.app_context():
+        with pytest.raises(InternalError, match="append only"):
+            db.session.execute(text("DELETE FROM equipment_status_history"))
+        db.session.rollback()
+
+    assert len(history(app)) == 3
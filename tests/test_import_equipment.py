@@ -0,0 +1,143 @@
+import csv
+
+import pytest
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.models.equipment import equipment
+from apis.models.model import db
+
+FIELDS = ["name", "code", "location", "vessel_code"]
+
+
+@pytest.fixture(autouse=True)
+def equipments(app):
+    client = app.test_client()
+    client.post("/vessel/insert_vessel", json={"code": "MV102"})
+    client.post("/vessel/insert_vessel", json={"code": "MV103"})
+    client.post(
+        "/equipment/insert_equipment",
+        json={
+            "name": "compressor",
+            "code": "5310B9D7",
+            "location": "brazil",
+            "vessel_code": "MV102",
+        },
+    )
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        writer.writerows(rows)
+
+
+def read_rejects(path):
+    with open(path, newline="") as file:
+        return [
+            (int(row["line"]), row["code"], row["message"])
+            for row in csv.DictReader(file)
+        ]
+
+
+def test_import_csv(app, tmp_path):
+    source = tmp_path / "equipments.csv"
+    rejects = tmp_path / "rejects.csv"
+    write_csv(
+        source,
+        [
+            ["pump", "A0000001", "brazil", "MV102"],
+            ["pump", "A0000002", "chile", "MV103"],
+            ["compressor", "5310B9D7", "brazil", "MV102"],
+            ["pump", "A0000001", "peru", "MV103"],
+            ["pump", "A0000003", "brazil", "MV999"],
+            ["pump", "A00000040", "brazil", "MV102"],
+            ["", "A0000005", "brazil", "MV102"],
+            ["valve", "A0000006", "brazil", "MV103"],
+        ],
+    )
+
+    result = app.test_cli_runner().invoke(
+        args=[
+            "import-equipment",
+            str(source),
+            "--chunk-size",
+            "3",
+            "--rejects",
+            str(rejects),
+        ]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Imported 3 of 8 rows" in result.output
+    assert "rows/s" in result.output
+    assert read_rejects(rejects) == [
+        (4, "5310B9D7", "REPEATED_CODE"),
+        (5, "A0000001", "REPEATED_CODE"),
+        (6, "A0000003", "NO_VESSEL"),
+        (7, "A00000040", "WRONG_FORMAT"),
+        (8, "A0000005", "MISSING_PARAMETER"),
+    ]
+    with app.app_context():
+        imported = (
+            db.session.query(equipment.code, equipment.location, equipment.active)
+            .filter(equipment.code.like("A%"))
+            .order_by(equipment.code)
+            .all()
+        )
+        assert imported == [
+            ("A0000001", "brazil", True),
+            ("A0000002", "chile", True),
+            ("A0000006", "brazil", True),
+        ]
+
+
+def test_import_invalidates_cached_responses(app, tmp_path):
+    client = app.test_client()
+    before = client.get("/equipment/active_equipments?vessel_code=MV103")
+    assert before.get_json() == []
+
+    source = tmp_path / "equipments.csv"
+    write_csv(source, [["valve", "A0000007", "brazil", "MV103"]])
+    result = app.test_cli_runner().invoke(args=["import-equipment", str(source)])
+    assert result.exit_code == 0, result.output
+    assert os.path.exists(f"{source}.rejects.csv")
+    assert "RESPONSE_CACHE_BACKEND is memory" in result.output
+
+    after = client.get(
+        "/equipment/active_equipments?vessel_code=MV103",
+        headers={"If-None-Match": before.headers["ETag"]},
+    )
+    assert after.status_code == 200
+    assert [item["code"] for item in after.get_json()] == ["A0000007"]
+
+
+def test_import_parquet(app, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    source = tmp_path / "equipments.parquet"
+    rejects = tmp_path / "rejects.csv"
+    pq.write_table(
+        pa.table(
+            {
+                "name": ["engine", "engine"],
+                "code": ["B0000001", "5310B9D7"],
+                "location": ["brazil", "brazil"],
+                "vessel_code": ["MV102", "MV102"],
+            }
+        ),
+        source,
+    )
+
+    result = app.test_cli_runner().invoke(
+        args=["import-equipment", str(source), "--rejects", str(rejects)]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Imported 1 of 2 rows" in result.output
+    assert read_rejects(rejects) == [(2, "5310B9D7", "REPEATED_CODE")]
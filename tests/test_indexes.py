@@ -0,0 +1,162 @@
+import pytest
+from sqlalchemy import event, text
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.models.model import db
+from apis.models.equipment import equipment
+from apis.models.equipment_status_history import equipment_status_history
+
+# The plans are the ones of postgres.
+pytestmark = pytest.mark.postgresql
+
+ROWS = 1000000
+LOADED_INDEXES = [
+    *equipment.__table__.indexes,
+    *equipment_status_history.__table__.indexes,
+]
+
+
+def load(app):
+    # Loading the rows before building the indexes is much faster.
+    for index in LOADED_INDEXES:
+        index.drop(db.engine)
+    db.session.execute(
+        text(
+            "INSERT INTO vessels (code) "
+            "SELECT 'MV' || n FROM generate_series(1, 1000) AS n"
+        )
+    )
+    db.session.execute(
+        text(
+            "INSERT INTO equipments (vessel_id, name, code, location, active) "
+            "SELECT n % 1000 + 1, 'equipment' || n % 1000, to_hex(n), "
+            "'brazil', n % 2 = 0 "
+            "FROM generate_series(1, :rows) AS n"
+        ),
+        {"rows": ROWS},
+    )
+    db.session.commit()
+    for index in LOADED_INDEXES:
+        index.create(db.engine)
+    db.session.execute(text("ANALYZE vessels, equipments, equipment_status_history"))
+    db.session.commit()
+
+
+@pytest.fixture(scope="module")
+def app(loaded_database):
+    return loaded_database("indexes", load)
+
+
+def explain_equipments_queries(app, send_request):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "equipments" in statement:
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            result = send_request(app.test_client())
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        plans = []
+        with engine.connect() as connection:
+            for statement, parameters in statements:
+                plan = connection.exec_driver_sql("EXPLAIN " + statement, parameters)
+                plans.append("\n".join(plan.scalars()))
+
+    assert result.status_code in [200, 201]
+    assert len(plans)
+    return plans
+
+
+def assert_index_scans(plans):
+    for plan in plans:
+        assert "Seq Scan on equipments" not in plan
+        assert "Index" in plan
+
+
+def test_active_equipments_uses_index(app):
+    plans = explain_equipments_queries(
+        app,
+        lambda client: client.get("/equipment/active_equipments?vessel_code=MV7"),
+    )
+    assert_index_scans(plans)
+    assert "ix_equipments_active_vessel_id" in plans[0]
+
+
+def test_list_equipments_uses_index(app):
+    plans = explain_equipments_queries(
+        app,
+        lambda client: client.get(
+            "/equipment/list_equipments?equipment_name=equipment7"
+        ),
+    )
+    assert_index_scans(plans)
+    assert "ix_equipments_name" in plans[0]
+
+
+def test_update_equipment_status_uses_index(app):
+    plans = explain_equipments_queries(
+        app,
+        lambda client: client.put(
+            "/equipment/update_equipment_status",
+            json={"code": ["a", "1f4", f"{ROWS:x}"]},
+        ),
+    )
+    assert_index_scans(plans)
+
+
+def test_insert_equipment_uses_index(app):
+    plans = explain_equipments_queries(
+        app,
+        lambda client: client.post(
+            "/equipment/insert_equipment",
+            json={
+                "vessel_code": "MV7",
+                "code": "A1000001",
+                "location": "brazil",
+                "name": "compressor",
+            },
+        ),
+    )
+    assert_index_scans(plans)
+
+
+def test_search_equipments_uses_index(app):
+    scenarios = [
+        ("prefix", "equipment7", "ix_equipments_name_pattern"),
+        ("icase", "Equipment7", "ix_equipments_lower_name_pattern"),
+    ]
+
+    for mode, equipment_name, index in scenarios:
+        plans = explain_equipments_queries(
+            app,
+            lambda client: client.get(
+                "/equipment/search",
+                query_string={"equipment_name": equipment_name, "mode": mode},
+            ),
+        )
+        assert_index_scans(plans)
+        assert index in plans[0]
+        assert "Sort" not in plans[0]
+
+
+def test_active_equipments_as_of_uses_index(app):
+    plans = explain_equipments_queries(
+        app,
+        lambda client: client.get(
+            "/equipment/active_equipments",
+            query_string={"vessel_code": "MV7", "as_of": "2100-01-01T00:00:00Z"},
+        ),
+    )
+    assert_index_scans(plans)
+    assert "Seq Scan on equipment_status_history" not in plans[0]
+    assert "ix_equipment_status_history_equipment_id_changed_at" in plans[0]
@@ -0,0 +1,102 @@
+import pytest
+
+import re
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.app import create_app
+from apis.models.model import db
+from apis.models.vessel import vessel
+
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="(\d+) queries", serialize;dur=[\d.]+, total;dur=[\d.]+'
+)
+
+
+# The statements of the savepoints of a rolled back test would be counted in
+# the Server-Timing header.
+pytestmark = pytest.mark.commits
+
+
+@pytest.fixture(autouse=True)
+def vessels(app):
+    with app.app_context():
+        db.session.add(vessel(code="MV102"))
+        db.session.commit()
+
+
+def equipments(count):
+    return [
+        {
+            "vessel_code": "MV102",
+            "code": f"A{index:07d}",
+            "location": "brazil",
+            "name": "compressor",
+        }
+        for index in range(count)
+    ]
+
+
+def server_timing_queries(result):
+    match = SERVER_TIMING.fullmatch(result.headers["Server-Timing"])
+    assert match is not None
+    return int(match.group(1))
+
+
+def test_insert_equipment_queries(app, max_queries):
+    with max_queries(1):
+        result = app.test_client().post(
+            "/equipment/insert_equipment",
+            json={
+                "vessel_code": "MV102",
+                "code": "5310B9D7",
+                "location": "brazil",
+                "name": "compressor",
+            },
+        )
+    assert result.status_code == 201
+    assert server_timing_queries(result) == 1
+
+
+def test_insert_equipment_batch_queries(app, max_queries):
+    with max_queries(3):
+        result = app.test_client().post(
+            "/equipment/insert_equipment_batch", json=equipments(500)
+        )
+    assert result.status_code == 201
+
+
+def test_update_equipment_status_queries(app, max_queries):
+    app.test_client().post("/equipment/insert_equipment_batch", json=equipments(500))
+    codes = [f"A{index:07d}" for index in range(500)]
+    with max_queries(2):
+        result = app.test_client().put(
+            "/equipment/update_equipment_status", json={"code": codes}
+        )
+    assert result.status_code == 201
+
+
+def test_read_queries(app, max_queries):
+    app.test_client().post("/equipment/insert_equipment_batch", json=equipments(20))
+    scenarios = [
+        "/equipment/active_equipments?vessel_code=MV102",
+        "/equipment/active_equipments?vessel_code=MV102&limit=10",
+        "/equipment/list_equipments?equipment_name=compressor",
+    ]
+    for scenario in scenarios:
+        with max_queries(1):
+            result = app.test_client().get(scenario)
+        assert result.status_code == 200
+        assert server_timing_queries(result) <= 1
+
+
+def test_server_timing_only_when_enabled(app):
+    result = app.test_client().get("/")
+    assert server_timing_queries(result) == 0
+
+    app = create_app()
+    assert app.config["SQL_INSTRUMENTATION"] is False
+    result = app.test_client().get("/")
+    assert "Server-Timing" not in result.headers
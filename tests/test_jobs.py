@@ -0,0 +1,210 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.models.job import job
+from apis.models.model import db
+from apis.services.jobs import job_runner
+
+# The jobs run in their own threads and transactions.
+pytestmark = pytest.mark.commits
+
+
+@pytest.fixture(autouse=True)
+def equipments(app):
+    job_runner.chunk_size = 2
+    client = app.test_client()
+    client.post("/vessel/insert_vessel", json={"code": "MV102"})
+    client.post(
+        "/equipment/insert_equipment",
+        json={
+            "name": "compressor",
+            "code": "5310B9D7",
+            "location": "brazil",
+            "vessel_code": "MV102",
+        },
+    )
+
+    yield
+
+    job_runner.chunk_size = app.config["JOB_CHUNK_SIZE"]
+
+
+def equipment_item(code, vessel_code="MV102"):
+    return {
+        "name": "pump",
+        "code": code,
+        "location": "brazil",
+        "vessel_code": vessel_code,
+    }
+
+
+def active_codes(app):
+    result = app.test_client().get(
+        "/equipment/active_equipments", query_string={"vessel_code": "MV102"}
+    )
+    return [item["code"] for item in result.get_json()]
+
+
+def queue_insert(app):
+    return app.test_client().post(
+        "/equipment/insert_equipment_batch?background=true",
+        json=[
+            equipment_item("5310B9D8"),
+            equipment_item("5310B9D7"),
+            equipment_item("5310B9D9", "MV999"),
+            {"name": "pump", "code": "5310B9DA"},
+            equipment_item("5310B9DB"),
+        ],
+    )
+
+
+def test_background_insert_is_queued(app):
+    result = queue_insert(app)
+
+    assert result.status_code == 202
+    assert result.get_json() == {"message": "ACCEPTED", "job_id": 1}
+    assert result.headers["Location"].endswith("/jobs/1")
+
+    job = app.test_client().get("/jobs/1").get_json()
+    assert job["status"] == "queued"
+    assert (job["total"], job["processed"], job["progress"]) == (5, 0, 0)
+
+
+def test_background_insert_runs_in_chunks(app):
+    queue_insert(app)
+    assert active_codes(app) == ["5310B9D7"]
+
+    assert job_runner.run_next()
+
+    job = app.test_client().get("/jobs/1").get_json()
+    assert job["status"] == "succeeded"
+    assert (job["total"], job["processed"], job["failed"]) == (5, 5, 3)
+    assert job["progress"] == 1
+    assert job["items_per_second"] > 0
+    assert job["errors"] == [
+        {"item": 1, "code": "5310B9D7", "message": "REPEATED_CODE"},
+        {"item": 2, "code": "5310B9D9", "message": "NO_VESSEL"},
+        {"item": 3, "code": "5310B9DA", "message": "MISSING_PARAMETER"},
+    ]
+    assert active_codes(app) == ["5310B9D7", "5310B9D8", "5310B9DB"]
+    assert not job_runner.run_next()
+
+
+def test_background_status_update(app):
+    app.test_client().post(
+        "/equipment/insert_equipment_batch",
+        json=[equipment_item("5310B9D8"), equipment_item("5310B9DB")],
+    )
+
+    result = app.test_client().put(
+        "/equipment/update_equipment_status?background=true",
+        json={"code": ["5310B9D7", "XXXXXXX1", "5310B9D8", "5310B9D7"]},
+    )
+    assert result.status_code == 202
+    job_id = result.get_json()["job_id"]
+
+    assert job_runner.run_next()
+
+    job = app.test_client().get(f"/jobs/{job_id}").get_json()
+    assert job["kind"] == "update_equipment_status"
+    assert (job["status"], job["total"], job["failed"]) == ("succeeded", 3, 1)
+    assert job["errors"] == [{"item": 1, "code": "XXXXXXX1", "message": "NO_CODE"}]
+    assert active_codes(app) == ["5310B9DB"]
+
+
+def test_job_left_running_by_a_stopped_worker_is_resumed(app):
+    job_id = (
+        app.test_client()
+        .post(
+            "/equipment/insert_equipment_batch?background=true",
+            json=[equipment_item(f"5310C00{n}") for n in range(5)],
+        )
+        .get_json()["job_id"]
+    )
+    now = datetime.now(timezone.utc)
+    with app.app_context():
+        db.session.query(job).filter_by(id=job_id).update(
+            {
+                "status": "running",
+                "attempts": 1,
+                "processed": 2,
+                "started_at": now,
+                "heartbeat_at": now,
+            }
+        )
+        db.session.commit()
+
+    assert not job_runner.run_next()
+
+    with app.app_context():
+        db.session.query(job).filter_by(id=job_id).update(
+            {"heartbeat_at": now - timedelta(minutes=2)}
+        )
+        db.session.commit()
+
+    assert job_runner.run_next()
+
+    resumed = app.test_client().get(f"/jobs/{job_id}").get_json()
+    assert resumed["status"] == "succeeded"
+    assert (resumed["processed"], resumed["attempts"]) == (5, 2)
+    assert active_codes(app)[-3:] == ["5310C002", "5310C003", "5310C004"]
+    assert "5310C001" not in active_codes(app)
+
+
+def test_failed_job(app):
+    with app.app_context():
+        job_id = db.session.execute(
+            text(
+                "INSERT INTO jobs (kind, payload, total) "
+                "VALUES ('unknown', '[1]', 1) RETURNING id"
+            )
+        ).scalar()
+        db.session.commit()
+
+    assert job_runner.run_next()
+
+    job = app.test_client().get(f"/jobs/{job_id}").get_json()
+    assert job["status"] == "failed"
+    assert "unknown" in job["error"]
+    assert job["finished_at"] is not None
+
+
+def test_job_threads(app):
+    app.test_client().post(
+        "/equipment/insert_equipment", json=equipment_item("5310B9DB")
+    )
+    job_runner.workers = 1
+    try:
+        result = app.test_client().put(
+            "/equipment/update_equipment_status?background=true",
+            json={"code": "5310B9DB"},
+        )
+        job_id = result.get_json()["job_id"]
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            job = app.test_client().get(f"/jobs/{job_id}").get_json()
+            if job["status"] == "succeeded":
+                break
+            time.sleep(0.05)
+    finally:
+        job_runner.stop()
+        job_runner.workers = 0
+
+    assert job["status"] == "succeeded"
+    assert "5310B9DB" not in active_codes(app)
+
+
+def test_job_does_not_exist(app):
+    result = app.test_client().get("/jobs/999")
+
+    assert result.status_code == 404
+    assert result.get_json().get("message") == "NO_JOB"
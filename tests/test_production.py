@@ -0,0 +1,129 @@
+import runpy
+import subprocess
+
+import pytest
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import config
+from apis.app import create_app
+from apis.models.model import db
+
+ROOT = os.path.join(os.path.dirname(__file__), "../")
+
+
+@pytest.fixture(scope="module")
+def app():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(config.ProductionConfig, "SWAGGER_MODE", "disabled")
+        app = create_app(production_conf=True)
+
+    yield app
+
+
+def test_production_config(app):
+    assert not app.debug
+    assert app.config["RESPONSE_CACHE_BACKEND"] in ("redis", "none")
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"]["pool_pre_ping"]
+    assert app.test_client().get("/").status_code == 200
+
+
+def test_production_pool(app):
+    options = app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    with app.app_context():
+        pool = db.engine.pool
+
+    assert pool.size() == options["pool_size"]
+    assert pool._max_overflow == options["max_overflow"]
+    assert pool._recycle == options["pool_recycle"]
+
+
+@pytest.mark.parametrize(
+    "workers, threads", [(1, 1), (1, 4), (3, 4), (9, 8), (30, 2), (90, 1)]
+)
+def test_pool_options_stay_under_max_connections(workers, threads):
+    options = config.pool_options(workers, threads, 100, 10)
+
+    assert 1 <= options["pool_size"] <= threads
+    assert workers * (options["pool_size"] + options["max_overflow"]) <= 90
+
+
+def test_pool_options_with_too_many_workers():
+    with pytest.raises(ValueError, match="91 workers"):
+        config.pool_options(91, 1, 100, 10)
+
+
+def production_settings(code, **environ):
+    # Imported in another process, where the number of cpus is faked.
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import os; os.cpu_count = lambda: 64; import config; " + code,
+        ],
+        cwd=ROOT,
+        env={
+            **{
+                name: value
+                for name, value in os.environ.items()
+                if name
+                not in ("WEB_WORKERS", "WEB_THREADS", "JOB_WORKERS", "EQUIPMENT_INDEX")
+            },
+            **environ,
+        },
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode == 0, result.stderr
+    return result.stdout.split()
+
+
+def test_default_workers_fit_in_max_connections():
+    workers = production_settings("print(config.ProductionConfig.WEB_WORKERS)")
+
+    assert workers == ["15"]
+
+
+def test_equipment_index_connections_fit_in_max_connections():
+    workers, pool_size, max_overflow = map(
+        int,
+        production_settings(
+            "from apis.app import create_app; "
+            "config.ProductionConfig.SWAGGER_MODE = 'disabled'; "
+            "app = create_app(production_conf=True); "
+            "options = app.config['SQLALCHEMY_ENGINE_OPTIONS']; "
+            "print(app.config['WEB_WORKERS'], options['pool_size'], "
+            "options['max_overflow'])",
+            EQUIPMENT_INDEX="true",
+        ),
+    )
+
+    # The web threads, the job threads and the refreshes of the index each
+    # get a pooled connection, and the index listens with one more.
+    assert pool_size == 4 + 2 + 1
+    assert workers == 11
+    assert workers * (pool_size + max_overflow + 1) <= 90
+
+
+def test_pool_options_leave_room_for_unpooled_connections():
+    options = config.pool_options(15, 7, 100, 10, unpooled=1)
+
+    assert options == {"pool_size": 5, "max_overflow": 0}
+
+
+def test_too_many_workers_stop_the_production_app(monkeypatch):
+    monkeypatch.setattr(config.ProductionConfig, "WEB_WORKERS", 91)
+
+    with pytest.raises(ValueError, match="91 workers"):
+        create_app(production_conf=True)
+
+
+def test_gunicorn_uses_the_pool_sizing():
+    settings = runpy.run_path(os.path.join(ROOT, "gunicorn.conf.py"))
+
+    assert settings["workers"] == config.ProductionConfig.WEB_WORKERS
+    assert settings["threads"] == config.ProductionConfig.WEB_THREADS
@@ -0,0 +1,146 @@
+import pytest
+from sqlalchemy import text
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.models.equipment import equipment
+from apis.models.model import db
+
+EQUIPMENTS = [
+    ("Compressor", "5310B9D7", "MV102"),
+    ("compressor", "5310B9D8", "MV101"),
+    ("compressor valve", "5310B9D9", "MV102"),
+    ("pump", "5310B9DA", "MV101"),
+    ("100%_pump", "5310B9DB", "MV101"),
+    ("100 pump", "5310B9DC", "MV101"),
+]
+
+
+@pytest.fixture(autouse=True)
+def equipments(app):
+    client = app.test_client()
+    client.post("/vessel/insert_vessel", json={"code": "MV101"})
+    client.post("/vessel/insert_vessel", json={"code": "MV102"})
+    for name, code, vessel_code in EQUIPMENTS:
+        client.post(
+            "/equipment/insert_equipment",
+            json={
+                "name": name,
+                "code": code,
+                "location": "brazil",
+                "vessel_code": vessel_code,
+            },
+        )
+
+
+def trgm_installed(app):
+    with app.app_context():
+        return db.session.execute(
+            text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+        ).scalar()
+
+
+@pytest.fixture(scope="module")
+def trgm(app):
+    if not trgm_installed(app):
+        pytest.skip("pg_trgm is not available in the test database")
+
+
+@pytest.fixture(scope="module")
+def no_trgm(app):
+    if trgm_installed(app):
+        pytest.skip("pg_trgm is installed in the test database")
+
+
+def search(app, **params):
+    return app.test_client().get("/equipment/search", query_string=params)
+
+
+def test_search_case_insensitive_prefix(app):
+    result = search(app, equipment_name=" COMPRES ")
+
+    assert result.status_code == 200
+    assert [item["code"] for item in result.get_json()] == [
+        "5310B9D7",
+        "5310B9D8",
+        "5310B9D9",
+    ]
+    with app.app_context():
+        compressor_id = (
+            db.session.query(equipment.id).filter_by(code="5310B9D7").scalar()
+        )
+    assert result.get_json()[0] == {
+        "id": compressor_id,
+        "name": "Compressor",
+        "code": "5310B9D7",
+        "location": "brazil",
+        "active": True,
+        "vessel_code": "MV102",
+    }
+
+
+def test_search_prefix(app):
+    result = search(app, equipment_name="compres", mode="prefix")
+
+    assert result.status_code == 200
+    assert [item["name"] for item in result.get_json()] == [
+        "compressor",
+        "compressor valve",
+    ]
+
+
+def test_search_prefix_escapes_wildcards(app):
+    result = search(app, equipment_name="100%_", mode="prefix")
+
+    assert [item["name"] for item in result.get_json()] == ["100%_pump"]
+
+
+def test_search_limit(app):
+    result = search(app, equipment_name="compressor", limit=2)
+
+    assert [item["code"] for item in result.get_json()] == ["5310B9D7", "5310B9D8"]
+
+
+@pytest.mark.postgresql
+def test_search_fuzzy(app, trgm):
+    result = search(app, equipment_name="compresor", mode="fuzzy")
+
+    assert result.status_code == 200
+    found = result.get_json()
+    assert {item["name"] for item in found[:2]} == {"compressor", "Compressor"}
+    assert found[0]["similarity"] >= found[-1]["similarity"]
+    assert "pump" not in [item["name"] for item in found]
+
+
+@pytest.mark.postgresql
+def test_search_fuzzy_without_pg_trgm(app, no_trgm):
+    result = search(app, equipment_name="compresor", mode="fuzzy")
+
+    assert result.status_code == 400
+    assert result.get_json().get("message") == "WRONG_FORMAT"
+
+
+def test_search_without_results(app):
+    result = search(app, equipment_name="anchor")
+
+    assert result.status_code == 409
+    assert result.get_json().get("message") == "NO_EQUIPMENT_NAME"
+
+
+def test_search_with_wrong_parameters(app):
+    scenarios = [
+        ({}, "MISSING_PARAMETER"),
+        ({"equipment_name": "  "}, "MISSING_PARAMETER"),
+        ({"equipment_name": "pump", "mode": "regex"}, "WRONG_FORMAT"),
+        ({"equipment_name": "pump", "limit": "0"}, "WRONG_FORMAT"),
+        ({"equipment_name": "pump", "limit": "501"}, "WRONG_FORMAT"),
+        ({"equipment_name": "pump", "limit": "ten"}, "WRONG_FORMAT"),
+    ]
+
+    for params, message in scenarios:
+        result = search(app, **params)
+        assert result.status_code == 400
+        assert result.get_json().get("message") == message
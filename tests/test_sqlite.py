@@ -0,0 +1,169 @@
+import pytest
+from sqlalchemy import text
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+import config
+from apis.app import create_app
+from apis.models.equipment_summary import equipment_summary
+from apis.models.model import db
+from apis.services.equipments import compact_equipment_summary
+from apis.services.vessels import vessel_id_cache
+
+
+def equipment_item(code, name="compressor", vessel_code="MV102"):
+    return {
+        "name": name,
+        "code": code,
+        "location": "brazil",
+        "vessel_code": vessel_code,
+    }
+
+
+def create_app_with(monkeypatch, uri, **settings):
+    monkeypatch.setattr(config.TestConfig, "SQLALCHEMY_DATABASE_URI", uri)
+    for name, value in settings.items():
+        monkeypatch.setattr(config.TestConfig, name, value)
+    vessel_id_cache.clear()
+    return create_app(test_config=True)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = create_app_with(monkeypatch, f"sqlite:///{tmp_path / 'vessels.db'}")
+    client = app.test_client()
+    client.post("/vessel/insert_vessel", json={"code": "MV102"})
+    client.post(
+        "/equipment/insert_equipment_batch",
+        json=[equipment_item("5310B9D7"), equipment_item("5310B9D8")],
+    )
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    vessel_id_cache.clear()
+
+
+def pragma(app, name):
+    with app.app_context():
+        return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_pragmas(app):
+    assert pragma(app, "journal_mode") == "wal"
+    assert pragma(app, "synchronous") == 1
+    assert pragma(app, "foreign_keys") == 1
+    assert pragma(app, "busy_timeout") == 5000
+
+
+def test_ids_are_the_rowids(app):
+    app.test_client().post(
+        "/equipment/insert_equipment", json=equipment_item("5310B9D9")
+    )
+
+    result = app.test_client().get("/equipment/active_equipments?vessel_code=MV102")
+
+    assert [item["id"] for item in result.get_json()] == [1, 2, 3]
+    with app.app_context():
+        schema = db.session.execute(
+            text("SELECT sql FROM sqlite_master WHERE name = 'equipments'")
+        ).scalar()
+    assert "id INTEGER NOT NULL" in schema
+
+
+def test_inserts_report_repeated_codes_and_unknown_vessels(app):
+    client = app.test_client()
+
+    repeated = client.post(
+        "/equipment/insert_equipment", json=equipment_item("5310B9D7")
+    )
+    unknown = client.post(
+        "/equipment/insert_equipment",
+        json=equipment_item("5310B9D9", vessel_code="MV999"),
+    )
+    batch = client.post(
+        "/equipment/insert_equipment_batch",
+        json=[equipment_item("5310B9D8"), equipment_item("5310B9DA")],
+    )
+
+    assert (repeated.status_code, repeated.get_json()) == (
+        409,
+        {"message": "REPEATED_CODE"},
+    )
+    assert (unknown.status_code, unknown.get_json()) == (
+        409,
+        {"message": "NO_VESSEL"},
+    )
+    assert [item["message"] for item in batch.get_json()] == ["REPEATED_CODE", "OK"]
+
+
+def test_summary_is_kept_by_the_triggers(app):
+    client = app.test_client()
+    client.put("/equipment/update_equipment_status", json={"code": "5310B9D7"})
+    with app.app_context():
+        compact_equipment_summary()
+        deltas = db.session.query(equipment_summary).count()
+
+    result = client.get("/equipment/summary")
+
+    assert deltas == 1
+    assert (result.get_json()["active"], result.get_json()["inactive"]) == (1, 1)
+
+
+def test_search_matches_glob_characters_literally(app):
+    client = app.test_client()
+    client.post(
+        "/equipment/insert_equipment",
+        json=equipment_item("5310B9D9", name="valve*[1]"),
+    )
+
+    prefix = client.get("/equipment/search?equipment_name=valve*[&mode=prefix")
+    icase = client.get("/equipment/search?equipment_name=COMP")
+    case_sensitive = client.get("/equipment/search?equipment_name=COMP&mode=prefix")
+
+    assert [item["name"] for item in prefix.get_json()] == ["valve*[1]"]
+    assert [item["code"] for item in icase.get_json()] == ["5310B9D7", "5310B9D8"]
+    assert case_sensitive.status_code == 409
+
+
+def test_postgres_only_requests(app):
+    client = app.test_client()
+
+    as_of = client.get(
+        "/equipment/active_equipments?vessel_code=MV102&as_of=2024-01-01T00:00:00"
+    )
+    fuzzy = client.get("/equipment/search?equipment_name=compresor&mode=fuzzy")
+
+    assert (as_of.status_code, as_of.get_json()) == (501, {"message": "NOT_SUPPORTED"})
+    assert fuzzy.status_code == 400
+
+
+@pytest.mark.parametrize(
+    "setting, value",
+    [("EQUIPMENT_INDEX", True), ("SQLALCHEMY_REPLICA_URIS", ["sqlite://"])],
+)
+def test_postgres_only_features_are_refused(tmp_path, monkeypatch, setting, value):
+    with pytest.raises(ValueError, match=setting):
+        create_app_with(
+            monkeypatch, f"sqlite:///{tmp_path / 'vessels.db'}", **{setting: value}
+        )
+
+
+def test_in_memory_database(monkeypatch):
+    app = create_app_with(monkeypatch, "sqlite://")
+    client = app.test_client()
+    client.post("/vessel/insert_vessel", json={"code": "MV102"})
+    client.post("/equipment/insert_equipment", json=equipment_item("5310B9D7"))
+
+    result = client.get("/equipment/active_equipments?vessel_code=MV102")
+    ready = client.get("/ready")
+
+    assert [item["code"] for item in result.get_json()] == ["5310B9D7"]
+    assert ready.status_code == 200
+    assert ready.get_json()["pool"] == {"size": 1}
+    vessel_id_cache.clear()
@@ -0,0 +1,144 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+import pytest
+from sqlalchemy import func
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.models.equipment import equipment
+from apis.models.equipment_status_history import equipment_status_history
+from apis.models.model import db
+from apis.services.equipments import status_update_coalescer
+from apis.utils.coalescer import Coalescer
+
+CODES = [f"5310C{n:03d}" for n in range(12)]
+
+# The updates are sent from concurrent threads.
+pytestmark = pytest.mark.commits
+
+
+@pytest.fixture(autouse=True)
+def equipments(app):
+    client = app.test_client()
+    client.post("/vessel/insert_vessel", json={"code": "MV102"})
+    client.post(
+        "/equipment/insert_equipment_batch",
+        json=[
+            {
+                "name": "compressor",
+                "code": code,
+                "location": "brazil",
+                "vessel_code": "MV102",
+            }
+            for code in CODES
+        ],
+    )
+    status_update_coalescer.configure(0.05, 1000)
+
+    yield
+
+    status_update_coalescer.configure(0, 1000)
+
+
+def concurrent_updates(app, bodies):
+    barrier = Barrier(len(bodies))
+
+    def update(body):
+        client = app.test_client()
+        barrier.wait()
+        result = client.put("/equipment/update_equipment_status", json=body)
+        return result.status_code, result.get_json()
+
+    with ThreadPoolExecutor(len(bodies)) as executor:
+        return list(executor.map(update, bodies))
+
+
+def active_codes(app):
+    with app.app_context():
+        return {
+            code
+            for (code,) in db.session.query(equipment.code).filter_by(active=True)
+        }
+
+
+def test_concurrent_updates_are_coalesced(app):
+    results = concurrent_updates(
+        app,
+        [
+            {"code": CODES[0]},
+            {"code": [CODES[1], CODES[2]]},
+            {"code": [CODES[3], "XXXXXXX1"]},
+            {"code": ["XXXXXXX2"]},
+            {"code": CODES[1]},
+        ],
+    )
+
+    assert results == [
+        (201, {"message": "OK"}),
+        (201, {"message": "OK"}),
+        (409, {"message": "NO_CODE", "codes": ["XXXXXXX1"]}),
+        (409, {"message": "NO_CODE", "codes": ["XXXXXXX2"]}),
+        (201, {"message": "OK"}),
+    ]
+    assert status_update_coalescer.batches == 1
+    assert active_codes(app) == set(CODES[3:])
+
+
+@pytest.mark.postgresql
+def test_coalesced_updates_share_a_transaction(app):
+    concurrent_updates(app, [{"code": CODES[0]}, {"code": [CODES[1], CODES[2]]}])
+
+    with app.app_context():
+        transactions = (
+            db.session.query(
+                func.count(func.distinct(equipment_status_history.transaction_id))
+            )
+            .filter(equipment_status_history.active.is_(False))
+            .scalar()
+        )
+    assert transactions == 1
+
+
+def test_single_update_with_coalescing(app):
+    result = app.test_client().put(
+        "/equipment/update_equipment_status", json={"code": CODES[3]}
+    )
+
+    assert result.status_code == 201
+    assert CODES[3] not in active_codes(app)
+
+
+def test_full_batch_is_applied_before_the_window(app):
+    status_update_coalescer.configure(10, 2)
+    try:
+        started = time.perf_counter()
+        results = concurrent_updates(app, [{"code": CODES[4]}, {"code": CODES[5]}])
+    finally:
+        status_update_coalescer.configure(0.05, 1000)
+
+    assert time.perf_counter() - started < 5
+    assert [status for status, _ in results] == [201, 201]
+    assert not active_codes(app) & set(CODES[4:6])
+
+
+def test_error_reaches_every_caller():
+    coalescer = Coalescer(0.05, 1000)
+    barrier = Barrier(3)
+
+    def apply(items):
+        raise RuntimeError("database is down")
+
+    def submit(item):
+        barrier.wait()
+        with pytest.raises(RuntimeError, match="database is down"):
+            coalescer.submit(item, apply)
+
+    with ThreadPoolExecutor(3) as executor:
+        list(executor.map(submit, range(3)))
+
+    assert coalescer.batches == 1
@@ -0,0 +1,220 @@
+import csv
+
+import pytest
+from sqlalchemy import text
+
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
+
+from apis.models.model import db
+from apis.services.equipments import compact_equipment_summary
+
+RECOUNT = text(
+    """
+    SELECT vessels.code, equipments.location,
+        count(*) FILTER (WHERE active), count(*) FILTER (WHERE NOT active)
+    FROM equipments JOIN vessels ON vessels.id = equipments.vessel_id
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    """
+)
+
+
+@pytest.fixture(autouse=True)
+def vessels(app):
+    client = app.test_client()
+    for code in ["MV101", "MV102", "MV103"]:
+        client.post("/vessel/insert_vessel", json={"code": code})
+
+
+@pytest.fixture
+def written(app, tmp_path):
+    """Insert and update equipments through every write path."""
+    client = app.test_client()
+    client.post(
+        "/equipment/insert_equipment",
+        json={
+            "name": "compressor",
+            "code": "5310B9D7",
+            "location": "brazil",
+            "vessel_code": "MV102",
+        },
+    )
+    client.post(
+        "/equipment/insert_equipment_batch",
+        json=[
+            {
+                "name": "pump",
+                "code": "5310B9D8",
+                "location": "brazil",
+                "vessel_code": "MV102",
+            },
+            {
+                "name": "pump",
+                "code": "5310B9D9",
+                "location": "chile",
+                "vessel_code": "MV101",
+            },
+        ],
+    )
+    source = tmp_path / "equipments.csv"
+    with open(source, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "code", "location", "vessel_code"])
+        writer.writerow(["valve", "5310B9DA", "chile", "MV102"])
+        writer.writerow(["valve", "5310B9DB", "chile", "MV102"])
+    app.test_cli_runner().invoke(args=["import-equipment", str(source)])
+    client.put(
+        "/equipment/update_equipment_status", json={"code": ["5310B9D8", "5310B9DA"]}
+    )
+
+
+def summary_counts(app):
+    summary = app.test_client().get("/equipment/summary").get_json()
+    return [
+        (
+            item["vessel_code"],
+            location["location"],
+            location["active"],
+            location["inactive"],
+        )
+        for item in summary["vessels"]
+        for location in item["locations"]
+    ]
+
+
+def recount(app):
+    with app.app_context():
+        return [tuple(row) for row in db.session.execute(RECOUNT)]
+
+
+def test_summary_without_equipments(app):
+    result = app.test_client().get("/equipment/summary")
+
+    assert result.status_code == 200
+    assert result.get_json() == {
+        "active": 0,
+        "inactive": 0,
+        "vessels": [
+            {"vessel_code": code, "active": 0, "inactive": 0, "locations": []}
+            for code in ["MV101", "MV102", "MV103"]
+        ],
+        "locations": [],
+    }
+
+
+def test_summary_follows_every_write_path(app, written):
+    assert summary_counts(app) == [
+        ("MV101", "chile", 1, 0),
+        ("MV102", "brazil", 1, 1),
+        ("MV102", "chile", 1, 1),
+    ]
+    assert summary_counts(app) == recount(app)
+
+    summary = app.test_client().get("/equipment/summary").get_json()
+    assert (summary["active"], summary["inactive"]) == (3, 2)
+    assert summary["vessels"][1]["active"] == 2
+    assert summary["vessels"][1]["inactive"] == 2
+    assert summary["locations"] == [
+        {"location": "brazil", "active": 1, "inactive": 1},
+        {"location": "chile", "active": 2, "inactive": 1},
+    ]
+
+
+def test_summary_follows_deletes(app, written):
+    with app.app_context():
+        db.session.execute(text("DELETE FROM equipments WHERE code = '5310B9D9'"))
+        db.session.commit()
+
+    assert summary_counts(app) == recount(app)
+    assert ("MV101", "chile", 1, 0) not in summary_counts(app)
+
+
+def delta_rows(app):
+    with app.app_context():
+        return db.session.execute(
+            text("SELECT count(*) FROM equipment_summary")
+        ).scalar()
+
+
+def test_compaction_keeps_the_summary(app, written):
+    counts = summary_counts(app)
+    assert delta_rows(app) > 3
+
+    with app.app_context():
+        compact_equipment_summary()
+
+    assert summary_counts(app) == counts
+    assert delta_rows(app) == 3
+
+
+def test_reads_compact_too_many_deltas(app, written, monkeypatch):
+    assert app.config["JOB_WORKERS"] == 0
+    monkeypatch.setitem(app.config, "SUMMARY_MAX_DELTAS", 100)
+    client = app.test_client()
+    for _ in range(60):
+        client.put("/equipment/update_equipment_status", json={"code": "5310B9D7"})
+        with app.app_context():
+            db.session.execute(
+                text("UPDATE equipments SET active = true WHERE code = '5310B9D7'")
+            )
+            db.session.commit()
+    assert delta_rows(app) > 100
+
+    counts = summary_counts(app)
+
+    assert delta_rows(app) == 3
+    assert summary_counts(app) == counts == recount(app)
+
+
+@pytest.mark.commits
+@pytest.mark.postgresql
+def test_writers_of_a_location_do_not_wait_for_each_other(app, written):
+    with app.app_context():
+        engine = db.engine
+    with engine.connect() as first, engine.connect() as second:
+        with first.begin(), second.begin():
+            first.execute(
+                text("UPDATE equipments SET active = false WHERE code = '5310B9D7'")
+            )
+            second.execute(text("SET LOCAL lock_timeout = '1s'"))
+            second.execute(
+                text("UPDATE equipments SET active = true WHERE code = '5310B9D8'")
+            )
+
+    assert summary_counts(app) == recount(app)
+    assert ("MV102", "brazil", 1, 1) in summary_counts(app)
+
+
+def test_summary_by_vessel(app, written, max_queries):
+    app.test_client().get("/equipment/summary?vessel_code=MV102")
+    with max_queries(1):
+        result = app.test_client().get("/equipment/summary?vessel_code=MV102")
+
+    assert result.status_code == 200
+    assert [item["vessel_code"] for item in result.get_json()["vessels"]] == ["MV102"]
+    assert result.get_json()["active"] == 2
+
+
+def test_summary_if_vessel_does_not_exist(app):
+    result = app.test_client().get("/equipment/summary?vessel_code=MV999")
+
+    assert result.status_code == 409
+    assert result.get_json().get("message") == "NO_VESSEL"
+
+
+def test_rebuild_summary_repairs_drift(app, written):
+    with app.app_context():
+        db.session.execute(
+            text("UPDATE equipment_summary SET active_count = active_count + 5")
+        )
+        db.session.commit()
+    assert summary_counts(app) != recount(app)
+
+    result = app.test_cli_runner().invoke(args=["rebuild-equipment-summary"])
+
+    assert result.exit_code == 0, result.output
+    assert "Rebuilt the summary of 3 vessel locations" in result.output
+    assert summary_counts(app) == recount(app)
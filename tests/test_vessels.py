@@ -1,5 +1,3 @@
-import pytest
-from flask_migrate import Migrate
 from sqlalchemy import func
 
 import sys
@@ -7,24 +5,15 @@ import os
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../"))
 
-from apis.app import create_app
 from apis.models.model import db
 from apis.models.vessel import vessel
+from apis.services.vessels import vessel_id_cache, vesselsService
 
 
-@pytest.fixture(scope="module")
-def app():
-    app = create_app(test_config=True)
-
+def count_vessels(app):
     with app.app_context():
-        db.create_all()
-        Migrate(app, db)
-
-    yield app
-
-    with app.app_context():
-        db.session.remove()
-        db.drop_all()
+        query = db.session.query(func.count(vessel.code))
+        return db.session.execute(query).scalar()
 
 
 def test_insert_clean_db(app):
@@ -39,14 +28,13 @@ def test_insert_clean_db(app):
 
 
 def test_insert_replicated(app):
+    app.test_client().post("/vessel/insert_vessel", json={"code": "MV102"})
+
     result = app.test_client().post("/vessel/insert_vessel", json={"code": "MV102"})
 
     assert result.get_json().get("message") == "FAIL"
     assert result.status_code == 409
-    with app.app_context():
-        query = db.session.query(func.count(vessel.code))
-        query_results = db.session.execute(query).all()
-        assert query_results[0][0] == 1
+    assert count_vessels(app) == 1
 
 
 def test_insert_without_parameter_code_or_empty_value(app):
@@ -60,10 +48,7 @@ def test_insert_without_parameter_code_or_empty_value(app):
         assert result.get_json().get("message") == "MISSING_PARAMETER"
         assert result.status_code == 400
 
-    with app.app_context():
-        query = db.session.query(func.count(vessel.code))
-        query_results = db.session.execute(query).all()
-        assert query_results[0][0] == 1
+    assert count_vessels(app) == 0
 
 
 def test_insert_wrong_format(app):
@@ -71,7 +56,17 @@ def test_insert_wrong_format(app):
 
     assert result.get_json().get("message") == "WRONG_FORMAT"
     assert result.status_code == 400
+    assert count_vessels(app) == 0
+
+
+def test_insert_invalidates_vessel_id_cache(app):
+    vessel_id_cache.set("MV103", 42)
+
+    result = app.test_client().post("/vessel/insert_vessel", json={"code": "MV103"})
+
+    assert result.status_code == 201
+    assert vessel_id_cache.get("MV103") is None
     with app.app_context():
-        query = db.session.query(func.count(vessel.code))
-        query_results = db.session.execute(query).all()
-        assert query_results[0][0] == 1
+        vessel_id = db.session.query(vessel.id).filter_by(code="MV103").scalar()
+        assert vesselsService.get_vessel_id("MV103") == vessel_id
+    assert vessel_id_cache.get("MV103") == vessel_id
@@ -0,0 +1,9 @@
+import os
+
+from apis.app import create_app
+
+# Served by gunicorn with gunicorn.conf.py, e.g. gunicorn wsgi:app
+app = create_app(production_conf=True)
+
+if __name__ == "__main__":
+    app.run(host="0.0.0.0", port=int(os.environ.get("PORT", "5000")))